@@ -0,0 +1,45 @@
+"""Recompute the per-project summary columns and section totals.
+
+Run from the repository root::
+
+    python -m backend.app.backfill            # every project
+    python -m backend.app.backfill --missing  # only projects never summarized
+
+On startup ``init_db`` summarizes projects that predate the summary columns,
+all in the startup transaction. On a large database, run this before
+upgrading so the service starts quickly. Each batch commits on its own, so an
+interrupted run can be resumed with ``--missing``. Run it without
+``--missing`` after the summary rules change.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from .database import get_connection, init_db, refresh_summaries, unsummarized_projects
+
+
+def backfill(recompute: bool = True, batch_size: int = 500) -> int:
+    """Summarize projects one batch per transaction; returns how many were summarized."""
+    init_db(summarize=False)
+    with get_connection() as conn:
+        project_ids = unsummarized_projects(conn, recompute)
+    for start in range(0, len(project_ids), batch_size):
+        with get_connection() as conn:
+            refresh_summaries(conn, project_ids[start:start + batch_size])
+    return len(project_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--missing", action="store_true", help="only projects without a summary yet")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    count = backfill(recompute=not args.missing, batch_size=args.batch_size)
+    print(f"Summarized {count} projects in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
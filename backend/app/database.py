@@ -1,26 +1,101 @@
 """Lightweight SQLite persistence for the production planner."""
 from __future__ import annotations
 
+import asyncio
+import base64
+import functools
+import hashlib
+import inspect
 import json
+import re
 import sqlite3
+import threading
+import typing
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 import os
 from pathlib import Path
-from typing import Any, Dict, Generator
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from .patching import apply_json_patch, diff_json
 
 DEFAULT_DB = Path(__file__).resolve().parent.parent / "data" / "production.db"
 DATABASE_PATH = Path(os.getenv("PRODUCTION_DB_PATH", DEFAULT_DB))
 DATABASE_PATH.parent.mkdir(parents=True, exist_ok=True)
 
 
+# Negative cache_size is in KiB, per connection.
+CACHE_SIZE_KIB = int(os.getenv("PRODUCTION_DB_CACHE_KIB", "16384"))
+BUSY_TIMEOUT_MS = int(os.getenv("PRODUCTION_DB_BUSY_TIMEOUT_MS", "5000"))
+PAYLOAD_COMPRESSION_LEVEL = int(os.getenv("PRODUCTION_DB_COMPRESSION_LEVEL", "6"))
+
+# Longest run of deltas before a revision is stored as a full snapshot again.
+REVISION_MAX_CHAIN = int(os.getenv("PRODUCTION_REVISION_MAX_CHAIN", "100"))
+
+# Threads that run blocking database work for async routes; each keeps its own connection.
+DB_WORKERS = int(os.getenv("PRODUCTION_DB_WORKERS", "4"))
+
+_local = threading.local()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+T = TypeVar("T")
+
+
 def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DATABASE_PATH)
+    """A new connection in WAL mode, so readers no longer wait for a saving writer."""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    # WAL is persistent; switching needs an exclusive lock, so only the first connection does it.
+    if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def _thread_connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.path != DATABASE_PATH:
+        conn = _connect()
+        _local.conn, _local.path, _local.depth = conn, DATABASE_PATH, 0
     return conn
 
 
-def init_db() -> None:
-    with _connect() as conn:
+def close_connection() -> None:
+    """Close the calling thread's connection; the next ``get_connection`` reopens it."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """Bring tables created by older versions up to the current schema."""
+    if column not in {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def init_db(summarize: bool = True) -> None:
+    """Create or migrate the schema; ``summarize=False`` leaves old projects to ``backend.app.backfill``."""
+    with get_connection() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS projects (
@@ -34,22 +109,719 @@ def init_db() -> None:
                 scheduled_for TEXT,
                 metadata_blob TEXT,
                 payload TEXT,
+                version INTEGER NOT NULL DEFAULT 1,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP,
                 updated_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
             """
         )
+        _add_column(conn, "projects", "version", "INTEGER NOT NULL DEFAULT 1")
+        for column, definition in SUMMARY_COLUMNS.items():
+            _add_column(conn, "projects", column, definition)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_projects_{column} ON projects ({column}, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_scheduled_for ON projects (scheduled_for)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_client ON projects (client, created_at, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_projects_type ON projects (project_type, created_at, id)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS optimization_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_components (
+                project_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                component_id TEXT NOT NULL,
+                type TEXT,
+                section TEXT NOT NULL,
+                material TEXT NOT NULL,
+                width REAL,
+                thickness REAL,
+                length REAL NOT NULL,
+                quantity INTEGER NOT NULL,
+                drawing TEXT,
+                drawing_hash TEXT,
+                metadata TEXT,
+                PRIMARY KEY (project_id, position)
+            )
+            """
+        )
+        _add_column(conn, "project_components", "drawing_hash", "TEXT")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                media_type TEXT NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_project_components_drawing ON project_components (drawing_hash)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_project_components_section ON project_components (section, material)"
+        )
+        _migrate_components(conn)
+        _migrate_drawings(conn)
+        # Contentful FTS5 index keyed by projects.id; rows are rewritten by index_projects.
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5(
+                name, client, metadata, components,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+            """
+        )
+        _migrate_search(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_section_totals (
+                project_id TEXT NOT NULL,
+                section TEXT NOT NULL,
+                material TEXT NOT NULL,
+                pieces INTEGER NOT NULL,
+                metres REAL NOT NULL,
+                PRIMARY KEY (project_id, section, material)
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_project_section_totals ON project_section_totals (section, material, metres)"
+        )
+        if summarize:
+            backfill_summaries(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_revisions (
+                project_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                snapshot INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                changes INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (project_id, version)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS revision_blobs (
+                project_id TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (project_id, hash)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_revision_blobs_hash ON revision_blobs (hash)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS project_optimizations (
+                project_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                section TEXT NOT NULL,
+                material TEXT NOT NULL,
+                result TEXT NOT NULL,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project_id, fingerprint)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS remnants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                section TEXT NOT NULL,
+                material TEXT NOT NULL,
+                length REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'available',
+                source TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                reserved_at TEXT
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_remnants_lookup ON remnants (section, material, status, length)"
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                request TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                expires_at TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs (expires_at)")
         conn.commit()
 
 
 @contextmanager
 def get_connection() -> Generator[sqlite3.Connection, None, None]:
-    conn = _connect()
+    """The calling thread's connection, kept open so its statement cache is reused.
+
+    The outermost block commits on success and rolls back on error; nested
+    blocks on the same thread join the open transaction.
+    """
+    conn = _thread_connection()
+    _local.depth += 1
     try:
         yield conn
-        conn.commit()
+        if _local.depth == 1:
+            conn.commit()
+    except BaseException:
+        if _local.depth == 1:
+            conn.rollback()
+        raise
     finally:
-        conn.close()
+        _local.depth -= 1
+
+
+def _db_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Await blocking ``func`` on the bounded DB executor.
+
+    The event loop stays free and Starlette's shared threadpool is left to
+    file I/O and other sync routes, so slow queries only queue behind each other.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor(), functools.partial(func, *args, **kwargs))
+
+
+def on_db_executor(func: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """Turn a blocking route body into an ``async def`` route that runs it through :func:`run_db`.
+
+    FastAPI reads the parameters from ``__signature__``; the annotations are
+    resolved here because the wrapper's globals are not the route module's.
+    """
+
+    @functools.wraps(func)
+    async def route(*args: Any, **kwargs: Any) -> T:
+        return await run_db(func, *args, **kwargs)
+
+    hints = typing.get_type_hints(func, include_extras=True)
+    signature = inspect.signature(func)
+    route.__signature__ = signature.replace(
+        parameters=[
+            parameter.replace(annotation=hints.get(name, parameter.annotation))
+            for name, parameter in signature.parameters.items()
+        ],
+        return_annotation=hints.get("return", signature.return_annotation),
+    )
+    return route
+
+
+COMPONENT_COLUMNS = (
+    "component_id, type, section, material, width, thickness, length, quantity, drawing, drawing_hash, metadata"
+)
+
+# Drawings stored in ``blobs`` are handed out as this URL plus their hash.
+BLOB_URL_PREFIX = "/api/blobs/"
+
+
+def split_components(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Payload without ``components``, plus the components that go to ``project_components``."""
+    stored = dict(payload)
+    return stored, stored.pop("components", None) or []
+
+
+def store_blob(conn: sqlite3.Connection, media_type: str, data: bytes) -> str:
+    """Store ``data`` once under its SHA-256 and return the hash."""
+    digest = hashlib.sha256(data).hexdigest()
+    conn.execute(
+        "INSERT OR IGNORE INTO blobs (hash, media_type, data, size) VALUES (?, ?, ?, ?)",
+        (digest, media_type, data, len(data)),
+    )
+    return digest
+
+
+def load_blob(conn: sqlite3.Connection, digest: str) -> Tuple[str, bytes] | None:
+    row = conn.execute("SELECT media_type, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+    return (row["media_type"], bytes(row["data"])) if row else None
+
+
+def drawing_hashes(drawings: Iterable[Optional[str]]) -> Set[str]:
+    """Blob hashes behind the ``/api/blobs/<hash>`` references among ``drawings``."""
+    return {
+        drawing[len(BLOB_URL_PREFIX):]
+        for drawing in drawings
+        if drawing and drawing.startswith(BLOB_URL_PREFIX)
+    }
+
+
+def _data_url(media_type: str, data: bytes) -> str:
+    return f"data:{media_type};base64,{base64.b64encode(data).decode()}"
+
+
+def inline_component_drawings(conn: sqlite3.Connection, components: List[Dict[str, Any]]) -> None:
+    """Swap ``/api/blobs/<hash>`` drawings in ``components`` for the stored data URLs, in place."""
+    hashes = sorted(drawing_hashes(component.get("drawing") for component in components))
+    urls: Dict[str, str] = {}
+    for chunk in _chunks(hashes):
+        rows = conn.execute(
+            f"SELECT hash, media_type, data FROM blobs WHERE hash IN ({','.join('?' for _ in chunk)})",
+            chunk,
+        )
+        urls.update({row["hash"]: _data_url(row["media_type"], row["data"]) for row in rows})
+    for component in components:
+        drawing = component.get("drawing")
+        if drawing and drawing.startswith(BLOB_URL_PREFIX):
+            component["drawing"] = urls.get(drawing[len(BLOB_URL_PREFIX):], drawing)
+
+
+def project_blobs(conn: sqlite3.Connection, project_id: str) -> Set[str]:
+    """Hashes a project's components or revisions refer to; collect them before deleting the project."""
+    rows = conn.execute(
+        "SELECT drawing_hash AS hash FROM project_components WHERE project_id = ? AND drawing_hash IS NOT NULL "
+        "UNION SELECT hash FROM revision_blobs WHERE project_id = ?",
+        (project_id, project_id),
+    )
+    return {row["hash"] for row in rows}
+
+
+def purge_orphan_blobs(conn: sqlite3.Connection, hashes: Iterable[str]) -> int:
+    """Drop those of ``hashes`` that no component or stored revision refers to any more.
+
+    Only the hashes an edit let go of are checked, each through the
+    ``drawing_hash`` and ``revision_blobs`` indexes, so the cost follows the
+    edit rather than the number of stored blobs.
+    """
+    purged = 0
+    for chunk in _chunks(sorted(hashes)):
+        purged += conn.execute(
+            f"""
+            DELETE FROM blobs
+            WHERE hash IN ({','.join('?' for _ in chunk)})
+              AND NOT EXISTS (SELECT 1 FROM project_components WHERE drawing_hash = blobs.hash)
+              AND NOT EXISTS (SELECT 1 FROM revision_blobs WHERE hash = blobs.hash)
+            """,
+            chunk,
+        ).rowcount
+    return purged
+
+
+def _split_drawing(conn: sqlite3.Connection, drawing: str | None) -> Tuple[str | None, str | None]:
+    """``(inline drawing, blob hash)`` for a component's ``drawing`` value.
+
+    Base64 data URLs move to ``blobs``; blob URLs handed out earlier keep
+    their hash. Anything else stays inline.
+    """
+    if not drawing:
+        return drawing, None
+    if drawing.startswith(BLOB_URL_PREFIX):
+        return None, drawing[len(BLOB_URL_PREFIX):]
+    header, _, encoded = drawing.partition(",")
+    if header.startswith("data:") and header.endswith(";base64") and encoded:
+        try:
+            data = base64.b64decode(encoded, validate=True)
+        except ValueError:
+            return drawing, None
+        if base64.b64encode(data).decode() == encoded:
+            return None, store_blob(conn, header[len("data:"):-len(";base64")], data)
+    return drawing, None
+
+
+def _component_row(conn: sqlite3.Connection, project_id: str, position: int, component: Dict[str, Any]) -> Tuple:
+    drawing, drawing_hash = _split_drawing(conn, component.get("drawing"))
+    return (
+        project_id,
+        position,
+        component["id"],
+        component.get("type"),
+        component["section"],
+        component["material"],
+        component.get("width"),
+        component.get("thickness"),
+        component["length"],
+        component.get("quantity", 1),
+        drawing,
+        drawing_hash,
+        json.dumps(component.get("metadata") or {}),
+    )
+
+
+def _insert_components(conn: sqlite3.Connection, rows: List[Tuple]) -> None:
+    conn.executemany(
+        f"INSERT INTO project_components (project_id, position, {COMPONENT_COLUMNS}) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def add_components(conn: sqlite3.Connection, components: Dict[str, List[Dict[str, Any]]]) -> None:
+    """Insert the components of projects that have none stored yet, in one ``executemany``."""
+    _insert_components(
+        conn,
+        [
+            _component_row(conn, project_id, position, component)
+            for project_id, project_components in components.items()
+            for position, component in enumerate(project_components)
+        ],
+    )
+
+
+def save_components(conn: sqlite3.Connection, project_id: str, components: List[Dict[str, Any]]) -> None:
+    conn.execute("DELETE FROM project_components WHERE project_id = ?", (project_id,))
+    add_components(conn, {project_id: components})
+
+
+def sync_components(
+    conn: sqlite3.Connection,
+    project_id: str,
+    before: List[Dict[str, Any]],
+    after: List[Tuple[int | None, Dict[str, Any]]],
+) -> int:
+    """Turn the stored ``before`` list into ``after``, writing only the rows that differ.
+
+    ``after`` pairs every component with the position it came from in
+    ``before`` (``None`` for new ones), so components that only shifted keep
+    their row and just get a new position. Returns the number of rows touched.
+    """
+    claimed: Dict[int, int] = {}
+    writes: List[int] = []
+    for position, (_, component) in enumerate(after):
+        if position < len(before) and before[position] == component:
+            claimed[position] = position
+    for position, (origin, component) in enumerate(after):
+        if claimed.get(position) == position:
+            continue
+        if origin is not None and origin not in claimed and before[origin] == component:
+            claimed[origin] = position
+        else:
+            writes.append(position)
+
+    removed = [(project_id, position) for position in range(len(before)) if position not in claimed]
+    moved = [(-1 - new, project_id, old) for old, new in claimed.items() if old != new]
+    conn.executemany("DELETE FROM project_components WHERE project_id = ? AND position = ?", removed)
+    if moved:
+        # Park moved rows on negative positions first so no two rows ever share a key.
+        conn.executemany("UPDATE project_components SET position = ? WHERE project_id = ? AND position = ?", moved)
+        conn.execute(
+            "UPDATE project_components SET position = -1 - position WHERE project_id = ? AND position < 0",
+            (project_id,),
+        )
+    _insert_components(conn, [_component_row(conn, project_id, position, after[position][1]) for position in writes])
+    return len(removed) + len(moved) + len(writes)
+
+
+def load_components(
+    conn: sqlite3.Connection,
+    project_ids: Sequence[str],
+    inline_drawings: bool = False,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Components per project in their original order, shaped like ``Component.model_dump()``.
+
+    Stored drawings come back as ``/api/blobs/<hash>`` references, or as the
+    original data URLs with ``inline_drawings``.
+    """
+    components: Dict[str, List[Dict[str, Any]]] = {project_id: [] for project_id in project_ids}
+    ids = list(components)
+    blob_columns = "b.media_type, b.data" if inline_drawings else "NULL AS media_type, NULL AS data"
+    blob_join = "LEFT JOIN blobs AS b ON b.hash = c.drawing_hash" if inline_drawings else ""
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT c.*, {blob_columns} FROM project_components AS c {blob_join} "
+            f"WHERE c.project_id IN ({','.join('?' for _ in chunk)}) ORDER BY c.project_id, c.position",
+            chunk,
+        ).fetchall()
+        for row in rows:
+            drawing = row["drawing"]
+            if row["drawing_hash"]:
+                if row["data"] is not None:
+                    drawing = _data_url(row["media_type"], row["data"])
+                else:
+                    drawing = BLOB_URL_PREFIX + row["drawing_hash"]
+            components[row["project_id"]].append(
+                {
+                    "id": row["component_id"],
+                    "type": row["type"],
+                    "section": row["section"],
+                    "material": row["material"],
+                    "width": row["width"],
+                    "thickness": row["thickness"],
+                    "length": row["length"],
+                    "quantity": row["quantity"],
+                    "drawing": drawing,
+                    "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+                }
+            )
+    return components
+
+
+def _migrate_components(conn: sqlite3.Connection) -> None:
+    """Compress payloads still stored as JSON text, moving embedded components to ``project_components``."""
+    rows = conn.execute("SELECT project_id, payload FROM projects WHERE typeof(payload) = 'text'").fetchall()
+    for row in rows:
+        payload = json.loads(row["payload"])
+        if "components" in payload:
+            payload, components = split_components(payload)
+            save_components(conn, row["project_id"], components)
+        conn.execute(
+            "UPDATE projects SET payload = ? WHERE project_id = ?", (serialize_payload(payload), row["project_id"])
+        )
+
+
+def _migrate_drawings(conn: sqlite3.Connection) -> None:
+    """Move inline data-URL drawings of already normalized components into ``blobs``."""
+    rows = conn.execute(
+        "SELECT project_id, position, drawing FROM project_components WHERE drawing LIKE 'data:%'"
+    ).fetchall()
+    for row in rows:
+        drawing, drawing_hash = _split_drawing(conn, row["drawing"])
+        if drawing_hash is not None:
+            conn.execute(
+                "UPDATE project_components SET drawing = NULL, drawing_hash = ? WHERE project_id = ? AND position = ?",
+                (drawing_hash, row["project_id"], row["position"]),
+            )
+
+
+def _chunks(values: Sequence[str], size: int = 500) -> Iterator[List[str]]:
+    for start in range(0, len(values), size):
+        yield list(values[start:start + size])
+
+
+def unindex_projects(conn: sqlite3.Connection, project_ids: Sequence[str]) -> None:
+    """Drop projects from ``project_search``; call before their ``projects`` rows go."""
+    for chunk in _chunks(project_ids):
+        conn.execute(
+            "DELETE FROM project_search WHERE rowid IN "
+            f"(SELECT id FROM projects WHERE project_id IN ({','.join('?' for _ in chunk)}))",
+            chunk,
+        )
+
+
+def index_projects(conn: sqlite3.Connection, project_ids: Sequence[str]) -> None:
+    """(Re)build the search rows of ``project_ids`` from their stored state.
+
+    Only metadata values are indexed, not keys; components contribute their
+    ids and types.
+    """
+    unindex_projects(conn, project_ids)
+    for chunk in _chunks(project_ids):
+        conn.execute(
+            f"""
+            INSERT INTO project_search (rowid, name, client, metadata, components)
+            SELECT
+                p.id,
+                p.name,
+                p.client,
+                (SELECT group_concat(value, ' ') FROM json_tree(p.metadata_blob)
+                 WHERE type IN ('text', 'integer', 'real')),
+                (SELECT group_concat(c.component_id || ' ' || coalesce(c.type, ''), ' ')
+                 FROM project_components AS c WHERE c.project_id = p.project_id)
+            FROM projects AS p
+            WHERE p.project_id IN ({','.join('?' for _ in chunk)})
+            """,
+            chunk,
+        )
+
+
+def _migrate_search(conn: sqlite3.Connection) -> None:
+    """Index every project when the search table is new or out of step with ``projects``."""
+    indexed = conn.execute("SELECT COUNT(*) FROM project_search").fetchone()[0]
+    if indexed != conn.execute("SELECT COUNT(*) FROM projects").fetchone()[0]:
+        conn.execute("DELETE FROM project_search")
+        index_projects(conn, [row["project_id"] for row in conn.execute("SELECT project_id FROM projects")])
+
+
+# Per-project figures kept on ``projects`` by ``refresh_summaries``; NULL until a project is summarized.
+SUMMARY_COLUMNS = {
+    "component_count": "INTEGER",
+    "piece_count": "INTEGER",
+    "total_metres": "REAL",
+    "pane_count": "INTEGER",
+}
+
+
+def pane_count(configuration: Dict[str, Any]) -> int:
+    """Glazed panes of a window configuration: ``totalPanes``, ``rows`` × ``cols`` or a ``"3x3"`` key."""
+    total = configuration.get("totalPanes")
+    if isinstance(total, int) and not isinstance(total, bool):
+        return total
+    rows, cols = configuration.get("rows"), configuration.get("cols")
+    if isinstance(rows, int) and isinstance(cols, int):
+        return rows * cols
+    match = re.fullmatch(r"(\d+)x(\d+)", str(configuration.get("key", "")))
+    return int(match[1]) * int(match[2]) if match else 0
+
+
+def refresh_summaries(conn: sqlite3.Connection, project_ids: Sequence[str]) -> None:
+    """Recompute the summary columns and section totals of ``project_ids`` from their stored state.
+
+    Component figures are aggregated from ``project_components`` in SQL; the
+    pane count needs the (small, component-free) payload's configuration.
+    """
+    for chunk in _chunks(project_ids):
+        marks = ",".join("?" for _ in chunk)
+        conn.execute(f"DELETE FROM project_section_totals WHERE project_id IN ({marks})", chunk)
+        conn.execute(
+            f"""
+            INSERT INTO project_section_totals (project_id, section, material, pieces, metres)
+            SELECT project_id, section, material, SUM(quantity), SUM(length * quantity) / 1000.0
+            FROM project_components
+            WHERE project_id IN ({marks})
+            GROUP BY project_id, section, material
+            """,
+            chunk,
+        )
+        panes = {
+            row["project_id"]: pane_count(row_to_dict(row)["payload"].get("configuration") or {})
+            for row in conn.execute(f"SELECT project_id, payload FROM projects WHERE project_id IN ({marks})", chunk)
+        }
+        conn.executemany(
+            """
+            UPDATE projects SET
+                component_count = (SELECT COUNT(*) FROM project_components AS c WHERE c.project_id = projects.project_id),
+                piece_count = (SELECT COALESCE(SUM(pieces), 0) FROM project_section_totals AS t
+                               WHERE t.project_id = projects.project_id),
+                total_metres = (SELECT COALESCE(SUM(metres), 0) FROM project_section_totals AS t
+                                WHERE t.project_id = projects.project_id),
+                pane_count = ?
+            WHERE project_id = ?
+            """,
+            [(count, project_id) for project_id, count in panes.items()],
+        )
+
+
+def unsummarized_projects(conn: sqlite3.Connection, recompute: bool = False) -> List[str]:
+    """Ids of projects without summary columns yet, or of every project with ``recompute``."""
+    where = "" if recompute else "WHERE component_count IS NULL"
+    return [row["project_id"] for row in conn.execute(f"SELECT project_id FROM projects {where} ORDER BY id")]
+
+
+def backfill_summaries(conn: sqlite3.Connection) -> None:
+    """Summarize projects stored before the summary columns existed."""
+    refresh_summaries(conn, unsummarized_projects(conn))
+
+
+def _compress_json(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode(), PAYLOAD_COMPRESSION_LEVEL)
+
+
+def _store_revision(
+    conn: sqlite3.Connection,
+    project_id: str,
+    version: int,
+    snapshot: bool,
+    data: bytes,
+    changes: int,
+    created_at: str,
+) -> None:
+    conn.execute(
+        "INSERT INTO project_revisions (project_id, version, snapshot, data, size, changes, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (project_id, version, int(snapshot), data, len(data), changes, created_at),
+    )
+
+
+def _revision_blobs(conn: sqlite3.Connection, project_id: str, document: Dict[str, Any]) -> None:
+    """Keep the drawings ``document`` links to alive after the project stops using them."""
+    hashes = drawing_hashes(component.get("drawing") for component in document.get("payload", {}).get("components", []))
+    conn.executemany(
+        "INSERT OR IGNORE INTO revision_blobs (project_id, hash) VALUES (?, ?)",
+        [(project_id, digest) for digest in hashes],
+    )
+
+
+def record_revision(
+    conn: sqlite3.Connection,
+    project_id: str,
+    before: Tuple[int, str, Dict[str, Any]],
+    after: Tuple[int, str, Dict[str, Any]],
+) -> None:
+    """Append the ``(version, timestamp, document)`` in ``after`` to the project's history.
+
+    ``after`` is stored as a delta against ``before``: the JSON Patch between
+    them, so its size follows the edit rather than the project. History starts
+    at the first edit, with ``before`` as a snapshot. A new snapshot is taken
+    once the deltas since the last one add up to its size, or after
+    ``REVISION_MAX_CHAIN`` deltas, which bounds the work to rebuild a revision.
+    """
+    (old_version, old_at, old_document), (version, created_at, document) = before, after
+    last = conn.execute(
+        "SELECT MAX(version) AS version FROM project_revisions WHERE project_id = ?", (project_id,)
+    ).fetchone()["version"]
+    if last != old_version:
+        _store_revision(conn, project_id, old_version, True, _compress_json(old_document), 0, old_at)
+        _revision_blobs(conn, project_id, old_document)
+    base = conn.execute(
+        "SELECT version, size FROM project_revisions WHERE project_id = ? AND snapshot = 1 "
+        "ORDER BY version DESC LIMIT 1",
+        (project_id,),
+    ).fetchone()
+    chain = conn.execute(
+        "SELECT COUNT(*) AS deltas, COALESCE(SUM(size), 0) AS size FROM project_revisions "
+        "WHERE project_id = ? AND version > ?",
+        (project_id, base["version"]),
+    ).fetchone()
+    operations = diff_json(old_document, document)
+    delta = _compress_json(operations)
+    if chain["deltas"] + 1 >= REVISION_MAX_CHAIN or chain["size"] + len(delta) >= base["size"]:
+        _store_revision(conn, project_id, version, True, _compress_json(document), len(operations), created_at)
+    else:
+        _store_revision(conn, project_id, version, False, delta, len(operations), created_at)
+    _revision_blobs(conn, project_id, document)
+
+
+def load_revision(conn: sqlite3.Connection, project_id: str, version: int) -> Tuple[Dict[str, Any], str] | None:
+    """Rebuild a stored revision from the nearest snapshot at or below it; ``(document, created_at)``."""
+    rows = conn.execute(
+        """
+        SELECT version, snapshot, data, created_at FROM project_revisions
+        WHERE project_id = ? AND version <= ? AND version >= (
+            SELECT MAX(version) FROM project_revisions WHERE project_id = ? AND version <= ? AND snapshot = 1
+        )
+        ORDER BY version
+        """,
+        (project_id, version, project_id, version),
+    ).fetchall()
+    if not rows or rows[-1]["version"] != version:
+        return None
+    document = json.loads(zlib.decompress(rows[0]["data"]))
+    for row in rows[1:]:
+        apply_json_patch(document, json.loads(zlib.decompress(row["data"])))
+    return document, rows[-1]["created_at"]
+
+
+def delete_revisions(conn: sqlite3.Connection, project_id: str) -> None:
+    conn.execute("DELETE FROM project_revisions WHERE project_id = ?", (project_id,))
+    conn.execute("DELETE FROM revision_blobs WHERE project_id = ?", (project_id,))
 
 
 def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
@@ -58,15 +830,16 @@ def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
         data["metadata_blob"] = json.loads(data["metadata_blob"])
     else:
         data["metadata_blob"] = {}
-    if data.get("payload"):
-        data["payload"] = json.loads(data["payload"])
-    else:
-        data["payload"] = {}
+    payload = data.get("payload")
+    if isinstance(payload, bytes):
+        payload = zlib.decompress(payload)
+    data["payload"] = json.loads(payload) if payload else {}
     return data
 
 
-def serialize_payload(payload: Dict[str, Any]) -> str:
-    return json.dumps(payload)
+def serialize_payload(payload: Dict[str, Any]) -> bytes:
+    """zlib-compressed JSON; rows written before compression still hold plain text."""
+    return _compress_json(payload)
 
 
 def serialize_metadata(metadata: Dict[str, Any] | None) -> str:
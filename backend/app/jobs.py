@@ -0,0 +1,201 @@
+"""Background jobs for long optimizations and report exports."""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from . import database
+from .models import ExcelReportRequest, JobStatus, OptimizationRequest, OptimizationResponse, ReportRequest
+
+OUTPUT_DIR = Path(__file__).resolve().parents[1] / "output"
+
+ProgressCallback = Callable[[float], None]
+
+
+def _run_optimize(payload: str, progress: ProgressCallback) -> Dict[str, Any]:
+    from .optimizer.cache import optimization_cache
+    from .optimizer.solver import iter_cutting_stock
+    from .routers.remnants import remnants_for
+
+    request = OptimizationRequest.model_validate_json(payload)
+    total = len({(component.section, component.material) for component in request.components}) or 1
+    results = {}
+    for index, group in iter_cutting_stock(
+        request.components, request.configuration, cache=optimization_cache, remnants=remnants_for(request)
+    ):
+        results[index] = group
+        progress(len(results) / total)
+    groups = [results[index] for index in range(len(results))]
+    return OptimizationResponse(groups=groups, configuration=request.configuration).model_dump(mode="json")
+
+
+def _run_pdf(payload: str, progress: ProgressCallback) -> Dict[str, Any]:
+    from .reports.pdf import build_pdf
+
+    request = ReportRequest.model_validate_json(payload)
+    filename = f"project_{request.project.project_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.pdf"
+    path = build_pdf(request, str(OUTPUT_DIR / filename))
+    return {"path": str(path), "filename": filename, "media_type": "application/pdf"}
+
+
+def _run_excel(payload: str, progress: ProgressCallback) -> Dict[str, Any]:
+    from .reports.excel import build_workbook
+
+    request = ExcelReportRequest.model_validate_json(payload)
+    filename = request.workbook_name or f"project_{uuid.uuid4().hex}.xlsx"
+    path = build_workbook(request, str(OUTPUT_DIR / filename))
+    return {
+        "path": str(path),
+        "filename": filename,
+        "media_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+
+
+JOB_HANDLERS: Dict[str, Callable[[str, ProgressCallback], Dict[str, Any]]] = {
+    "optimize": _run_optimize,
+    "pdf": _run_pdf,
+    "excel": _run_excel,
+}
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _row_to_status(row) -> JobStatus:
+    data = dict(row)
+    return JobStatus(
+        job_id=data["id"],
+        kind=data["kind"],
+        status=data["status"],
+        progress=round(data["progress"] * 100, 1),
+        error=data.get("error"),
+        created_at=datetime.fromisoformat(data["created_at"]),
+        started_at=datetime.fromisoformat(data["started_at"]) if data.get("started_at") else None,
+        finished_at=datetime.fromisoformat(data["finished_at"]) if data.get("finished_at") else None,
+        expires_at=datetime.fromisoformat(data["expires_at"]) if data.get("expires_at") else None,
+    )
+
+
+class JobManager:
+    """Bounded thread pool whose queue and results live in the ``jobs`` table.
+
+    Jobs left ``queued`` or ``running`` by a previous process are picked up
+    again by :meth:`resume`. Finished jobs are kept for ``retention_hours``.
+    """
+
+    def __init__(self, max_workers: int = 2, retention_hours: float = 24) -> None:
+        self.max_workers = max_workers
+        self.retention = timedelta(hours=retention_hours)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            return self._executor
+
+    def submit(self, kind: str, payload: str) -> JobStatus:
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind {kind}")
+        self.purge_expired()
+        job_id = uuid.uuid4().hex
+        with database.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, progress, request, created_at) VALUES (?, ?, 'queued', 0, ?, ?)",
+                (job_id, kind, payload, _now()),
+            )
+        self._pool().submit(self._run, job_id)
+        return self.status(job_id)
+
+    def resume(self) -> List[str]:
+        """Queue again every job that had not finished when the server stopped."""
+        self.purge_expired()
+        with database.get_connection() as conn:
+            conn.execute("UPDATE jobs SET status = 'queued', progress = 0 WHERE status = 'running'")
+            rows = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        job_ids = [row["id"] for row in rows]
+        for job_id in job_ids:
+            self._pool().submit(self._run, job_id)
+        return job_ids
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        with database.get_connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_status(row) if row else None
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with database.get_connection() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'", (job_id,)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs past their retention, including exported files."""
+        with database.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, result FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (_now(),)
+            ).fetchall()
+            for row in rows:
+                if row["kind"] != "optimize" and row["result"]:
+                    Path(json.loads(row["result"])["path"]).unlink(missing_ok=True)
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in rows])
+        return len(rows)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with database.get_connection() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job_id: str) -> None:
+        with database.get_connection() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ? AND status = 'queued'",
+                (_now(), job_id),
+            ).rowcount
+            row = conn.execute("SELECT kind, request FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not claimed or row is None:
+            return
+
+        def progress(fraction: float) -> None:
+            self._update(job_id, progress=min(max(fraction, 0.0), 1.0))
+
+        try:
+            result = JOB_HANDLERS[row["kind"]](row["request"], progress)
+        except Exception as exc:  # failures are reported through the job status
+            finished = datetime.utcnow()
+            self._update(
+                job_id,
+                status="failed",
+                error=str(exc),
+                finished_at=finished.isoformat(),
+                expires_at=(finished + self.retention).isoformat(),
+            )
+            return
+        finished = datetime.utcnow()
+        self._update(
+            job_id,
+            status="done",
+            progress=1.0,
+            result=json.dumps(result),
+            finished_at=finished.isoformat(),
+            expires_at=(finished + self.retention).isoformat(),
+        )
+
+
+job_manager = JobManager(
+    max_workers=int(os.getenv("JOB_WORKERS", "2")),
+    retention_hours=float(os.getenv("JOB_RETENTION_HOURS", "24")),
+)
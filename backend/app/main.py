@@ -1,14 +1,17 @@
 """FastAPI application entry point serving both API and Frontend."""
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from .database import init_db
-from .routers import optimize, projects, reports
+from .database import init_db, shutdown_executor
+from .jobs import job_manager
+from .optimizer.solver import shutdown_pool
+from .routers import blobs, components, jobs, optimize, projects, remnants, reports
 
 # Inicjalizacja bazy danych
 init_db()
@@ -16,10 +19,22 @@ init_db()
 # Ustalanie głównego katalogu projektu (dwa poziomy wyżej od tego pliku: app -> backend -> ROOT)
 BASE_DIR = Path(__file__).resolve().parents[2]
 
+
+# Zadania w tle: wznowienie kolejki po restarcie, zatrzymanie przy wyłączeniu
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    job_manager.resume()
+    yield
+    job_manager.shutdown()
+    shutdown_executor()
+    shutdown_pool()
+
+
 app = FastAPI(
     title="Sash Production Planner",
     description="Integrated Production System",
     version="2.2.0",
+    lifespan=lifespan,
 )
 
 # Konfiguracja CORS (nadal przydatna)
@@ -35,6 +50,10 @@ app.add_middleware(
 app.include_router(projects.router)
 app.include_router(optimize.router)
 app.include_router(reports.router)
+app.include_router(remnants.router)
+app.include_router(jobs.router)
+app.include_router(components.router)
+app.include_router(blobs.router)
 
 # --- SERWOWANIE FRONTENDU (Static Files) ---
 
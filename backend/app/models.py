@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
 
@@ -80,10 +80,27 @@ class ProjectUpdate(BaseModel):
 
 class ProjectRead(ProjectBase):
     project_id: str
+    version: int = 1
     created_at: datetime
     updated_at: datetime
 
 
+class ProjectRevision(BaseModel):
+    """One entry of a project's history; ``size`` is the stored (compressed) bytes."""
+
+    version: int
+    snapshot: bool
+    changes: int
+    size: int
+    created_at: datetime
+
+
+class ProjectRevisionDiff(BaseModel):
+    from_version: int
+    to_version: int
+    operations: List[Dict[str, Any]]
+
+
 class OptimizationComponent(BaseModel):
     id: str
     section: str
@@ -93,12 +110,33 @@ class OptimizationComponent(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class StockLength(BaseModel):
+    """A purchasable stock length; ``section``/``material`` limit where it applies."""
+
+    length: float = Field(gt=0)
+    cost: float = Field(default=0, ge=0)
+    available: Optional[int] = Field(default=None, ge=0)
+    section: Optional[str] = None
+    material: Optional[str] = None
+
+
 class OptimizationConfig(BaseModel):
     stock_length: float = Field(default=5900, gt=0)
+    stock_lengths: List[StockLength] = Field(default_factory=list)
     kerf: float = Field(default=3, ge=0)
     end_trim: float = Field(default=10, ge=0)
     minimum_piece: float = Field(default=200, gt=0)
     solver: str = Field(default="heuristic")
+    time_limit_ms: int = Field(default=2000, gt=0)
+    pattern_mode: bool = False
+    expand_patterns: bool = False
+    execution: Literal["serial", "process"] = "serial"
+    workers: Optional[int] = Field(default=None, ge=1)
+    use_cache: bool = True
+    improve: bool = False
+    use_remnants: bool = False
+    offcut_minimum: float = Field(default=500, ge=0)
+    track_pieces: bool = False
 
 
 class OptimizationRequest(BaseModel):
@@ -106,25 +144,180 @@ class OptimizationRequest(BaseModel):
     configuration: OptimizationConfig = Field(default_factory=OptimizationConfig)
 
 
+class PieceRef(BaseModel):
+    """Where a cut piece comes from when ``track_pieces`` is set."""
+
+    componentId: str
+    length: float
+    projectId: Optional[str] = None
+
+
 class OptimizationBar(BaseModel):
     barId: str
     cuts: List[float]
     waste: float
     utilization: float
+    stockLength: Optional[float] = None
+    cost: Optional[float] = None
+    remnantId: Optional[int] = None
+    offcut: Optional[float] = None
+    pieces: Optional[List[PieceRef]] = None
+
+
+class OptimizationPattern(BaseModel):
+    patternId: str
+    cuts: List[float]
+    count: int
+    waste: float
+    utilization: float
+    stockLength: Optional[float] = None
+    cost: Optional[float] = None
+    offcut: Optional[float] = None
 
 
 class OptimizationGroup(BaseModel):
     section: str
     material: str
     bars: List[OptimizationBar]
+    patterns: List[OptimizationPattern] = Field(default_factory=list)
     summary: Dict[str, Any]
 
+    def patterns_unexpanded(self) -> bool:
+        """True when new stock is only listed as ``patterns``; ``bars`` may still hold remnant bars."""
+        return bool(self.patterns) and all(bar.remnantId is not None for bar in self.bars)
+
 
 class OptimizationResponse(BaseModel):
     groups: List[OptimizationGroup]
     configuration: OptimizationConfig
 
 
+class SectionTotal(BaseModel):
+    section: str
+    material: str
+    pieces: int
+    metres: float
+
+
+class ProjectSummary(BaseModel):
+    """Project list row without the payload; the counts are stored on write, not computed per request."""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    project_id: str
+    name: str
+    client: Optional[str] = None
+    project_type: Optional[str] = Field(default=None, alias="type")
+    material: Optional[str] = None
+    section_sizes: Optional[str] = None
+    scheduled_for: Optional[date] = None
+    version: int = 1
+    component_count: int = 0
+    piece_count: int = 0
+    total_metres: float = 0.0
+    pane_count: int = 0
+    sections: List[SectionTotal] = Field(default_factory=list)
+    created_at: datetime
+    updated_at: datetime
+
+
+class ProjectSearchHit(ProjectSummary):
+    """Search result; lower ``rank`` is better (bm25)."""
+
+    rank: float
+    highlights: Dict[str, str] = Field(default_factory=dict)
+
+
+class ProjectSummaryPage(BaseModel):
+    items: List[ProjectSummary]
+    next_cursor: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    """A rejected line of an NDJSON import; ``line`` counts from 1."""
+
+    line: int
+    project_id: Optional[str] = None
+    detail: Any
+
+
+class ProjectImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+class ComponentTotal(BaseModel):
+    """One aggregate row; grouping columns not requested stay ``None``."""
+
+    section: Optional[str] = None
+    material: Optional[str] = None
+    scheduled_for: Optional[date] = None
+    project_id: Optional[str] = None
+    pieces: int
+    total_length: float
+    metres: float
+
+
+class GroupRef(BaseModel):
+    section: str
+    material: str
+
+
+class ProjectOptimizationResponse(OptimizationResponse):
+    recomputed: List[GroupRef]
+
+
+class ScheduleOptimizationRequest(BaseModel):
+    """Nest every project scheduled between ``date_from`` and ``date_to`` (inclusive)."""
+
+    date_from: date
+    date_to: date
+    configuration: OptimizationConfig = Field(default_factory=OptimizationConfig)
+
+
+class ScheduleOptimizationResponse(OptimizationResponse):
+    projects: List[str]
+
+
+class RemnantCreate(BaseModel):
+    section: str
+    material: str
+    length: float = Field(gt=0)
+    source: Optional[str] = None
+
+
+class Remnant(RemnantCreate):
+    id: int
+    status: str
+    created_at: datetime
+    reserved_at: Optional[datetime] = None
+
+
+class RemnantCommit(BaseModel):
+    """An optimization result whose remnant usage and offcuts should be recorded."""
+
+    groups: List[OptimizationGroup]
+    source: Optional[str] = None
+
+
+class RemnantCommitResult(BaseModel):
+    reserved: List[int]
+    created: List[Remnant]
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    progress: float
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+
 class ReportRequest(BaseModel):
     project: ProjectRead
     optimization: Optional[OptimizationResponse] = None
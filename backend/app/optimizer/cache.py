@@ -0,0 +1,177 @@
+"""Content-addressed cache of solved section groups."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .. import database
+from ..models import OptimizationConfig, OptimizationGroup
+
+# Fields that change how a run executes, or only annotate it, but not the bars it returns.
+_EXECUTION_FIELDS = {"execution", "workers", "use_cache", "track_pieces"}
+
+
+def group_cache_key(
+    section: str,
+    material: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    config: OptimizationConfig,
+    remnants: Sequence[Tuple[int, float]] = (),
+) -> str:
+    """Hash of the sorted piece lengths and the solver configuration for one group.
+
+    Component ids do not influence the bars, so identical length mixes share a
+    key whether they come in as individual pieces or ``length -> count`` demands.
+    Remnants offered to the group are part of the key when there are any.
+    """
+    if isinstance(pieces, dict):
+        counts = dict(pieces)
+    else:
+        counts = {}
+        for _, length in pieces:
+            counts[length] = counts.get(length, 0) + 1
+    canonical = {
+        "section": section,
+        "material": material,
+        "pieces": sorted([length, count] for length, count in counts.items()),
+        "config": config.model_dump(exclude=_EXECUTION_FIELDS),
+    }
+    if remnants:
+        canonical["remnants"] = sorted([remnant_id, length] for remnant_id, length in remnants)
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class OptimizationCache:
+    """Bounded in-memory LRU, optionally backed by the ``optimization_cache`` table.
+
+    The table keeps the ``persist_entries`` most recently stored groups; older
+    rows are trimmed in the same transaction as each insert.
+    """
+
+    def __init__(self, max_entries: int = 256, persist: bool = False, persist_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self.persist = persist
+        self.persist_entries = persist_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, OptimizationGroup]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[OptimizationGroup]:
+        with self._lock:
+            group = self._entries.get(key)
+            if group is not None:
+                self._entries.move_to_end(key)
+        if group is None and self.persist:
+            with database.get_connection() as conn:
+                row = conn.execute("SELECT result FROM optimization_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row:
+                group = OptimizationGroup.model_validate_json(row["result"])
+                self._remember(key, group)
+        with self._lock:
+            if group is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return group.model_copy(deep=True)
+
+    def put(self, key: str, group: OptimizationGroup) -> None:
+        self._remember(key, group.model_copy(deep=True))
+        if self.persist:
+            with database.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO optimization_cache (cache_key, result) VALUES (?, ?)",
+                    (key, group.model_dump_json()),
+                )
+                # REPLACE gives the row a new rowid, so rowid order is storage order.
+                conn.execute(
+                    """
+                    DELETE FROM optimization_cache WHERE rowid <= (
+                        SELECT rowid FROM optimization_cache ORDER BY rowid DESC LIMIT 1 OFFSET ?
+                    )
+                    """,
+                    (self.persist_entries,),
+                )
+
+    def _remember(self, key: str, group: OptimizationGroup) -> None:
+        with self._lock:
+            self._entries[key] = group
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+        if self.persist:
+            with database.get_connection() as conn:
+                conn.execute("DELETE FROM optimization_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "persistent": self.persist,
+                "persistEntries": self.persist_entries,
+            }
+
+
+class ProjectGroupStore:
+    """The last optimization of one project, keyed by each group's fingerprint.
+
+    Quacks like :class:`OptimizationCache` for :func:`iter_cutting_stock`:
+    groups whose fingerprint is unchanged come back as stored, the rest are
+    solved and listed in ``recomputed``. :meth:`save` then replaces the
+    stored run with the groups of the current one.
+    """
+
+    def __init__(self, project_id: str, conn: sqlite3.Connection) -> None:
+        self.project_id = project_id
+        rows = conn.execute(
+            "SELECT fingerprint, result FROM project_optimizations WHERE project_id = ?", (project_id,)
+        ).fetchall()
+        self._stored = {row["fingerprint"]: row["result"] for row in rows}
+        self._current: Dict[str, OptimizationGroup] = {}
+        self.recomputed: List[Tuple[str, str]] = []
+
+    def get(self, key: str) -> Optional[OptimizationGroup]:
+        if key not in self._stored:
+            return None
+        group = OptimizationGroup.model_validate_json(self._stored[key])
+        self._current[key] = group.model_copy(deep=True)
+        return group
+
+    def put(self, key: str, group: OptimizationGroup) -> None:
+        self._current[key] = group.model_copy(deep=True)
+        self.recomputed.append((group.section, group.material))
+
+    def save(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM project_optimizations WHERE project_id = ?", (self.project_id,))
+        conn.executemany(
+            """
+            INSERT INTO project_optimizations (project_id, fingerprint, section, material, result)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (self.project_id, key, group.section, group.material, group.model_dump_json())
+                for key, group in self._current.items()
+            ],
+        )
+
+
+optimization_cache = OptimizationCache(
+    max_entries=int(os.getenv("OPTIMIZATION_CACHE_SIZE", "256")),
+    persist=os.getenv("OPTIMIZATION_CACHE_PERSIST", "0") == "1",
+    persist_entries=int(os.getenv("OPTIMIZATION_CACHE_PERSIST_SIZE", "4096")),
+)
@@ -0,0 +1,394 @@
+"""Column generation for the one-dimensional cutting-stock problem.
+
+The master problem ``min sum(x_p) s.t. sum(a_ip * x_p) >= d_i`` is solved over a
+growing set of cutting patterns. New patterns are priced with a bounded knapsack
+on the row duals. The LP solution is then turned into whole bars either by the
+OR-Tools MIP solver (when installed) or by residual rounding, with the leftover
+pieces packed by the best-fit heuristic.
+"""
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..models import OptimizationConfig
+from .heuristics import _FIT_TOLERANCE, _Pattern, _bars_to_patterns, _lower_bound, _merge_patterns, _pack_best_fit
+
+try:  # pragma: no cover - optional dependency
+    from ortools.linear_solver import pywraplp  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pywraplp = None
+
+Pattern = Tuple[int, ...]
+
+_EPSILON = 1e-9
+_MAX_DISTINCT_LENGTHS = 400
+_KNAPSACK_NODE_LIMIT = 200_000
+_ROUNDING_PASSES = 3
+_DEGENERATE_PIVOTS = 50
+
+
+class _SimplexMaster:
+    """Pure-Python revised simplex for the restricted master LP.
+
+    Columns ``0..m-1`` are the homogeneous patterns, which give a diagonal and
+    feasible starting basis. Surplus variables (column ``-e_i``, cost 0) are
+    implicit and numbered ``-1..-m``.
+    """
+
+    def __init__(self, demand: Sequence[int], homogeneous: Sequence[Pattern]) -> None:
+        self.demand = list(demand)
+        self.rows = len(demand)
+        self.columns: List[Pattern] = list(homogeneous)
+        self.basis = list(range(self.rows))
+        self.binv = [[0.0] * self.rows for _ in range(self.rows)]
+        self.values = [0.0] * self.rows
+        for row, pattern in enumerate(homogeneous):
+            self.binv[row][row] = 1.0 / pattern[row]
+            self.values[row] = self.demand[row] / pattern[row]
+
+    def add_column(self, pattern: Pattern) -> None:
+        self.columns.append(pattern)
+
+    def _entries(self, index: int) -> List[Tuple[int, float]]:
+        if index < 0:
+            return [(-index - 1, -1.0)]
+        return [(row, float(count)) for row, count in enumerate(self.columns[index]) if count]
+
+    @staticmethod
+    def _order(index: int) -> Tuple[int, int]:
+        return (1, index) if index >= 0 else (0, -index)
+
+    def duals(self) -> List[float]:
+        pattern_rows = [self.binv[k] for k, index in enumerate(self.basis) if index >= 0]
+        if not pattern_rows:
+            return [0.0] * self.rows
+        return [sum(column) for column in zip(*pattern_rows)]
+
+    def optimize(self, deadline: float) -> bool:
+        """Pivot until optimal; returns ``False`` if the deadline interrupted.
+
+        Dantzig pricing is used until a run of degenerate pivots, after which
+        Bland's rule takes over to guarantee termination.
+        """
+        rows = self.rows
+        entries = {index: self._entries(index) for index in range(len(self.columns))}
+        entries.update({-(row + 1): self._entries(-(row + 1)) for row in range(rows)})
+        candidates = [-(row + 1) for row in range(rows)] + list(range(len(self.columns)))
+        degenerate = 0
+        while True:
+            if time.monotonic() > deadline:
+                return False
+            duals = self.duals()
+            in_basis = set(self.basis)
+            bland = degenerate > _DEGENERATE_PIVOTS
+            entering = None
+            best_reduced = -_EPSILON
+            for index in candidates:
+                if index in in_basis:
+                    continue
+                cost = 1.0 if index >= 0 else 0.0
+                reduced = cost - sum(duals[row] * count for row, count in entries[index])
+                if reduced < best_reduced:
+                    entering, best_reduced = index, reduced
+                    if bland:
+                        break
+            if entering is None:
+                return True
+
+            column = entries[entering]
+            direction = [sum(binv_row[row] * count for row, count in column) for binv_row in self.binv]
+            leaving = None
+            best_ratio = 0.0
+            for k in range(rows):
+                if direction[k] > _EPSILON:
+                    ratio = self.values[k] / direction[k]
+                    if (
+                        leaving is None
+                        or ratio < best_ratio - _EPSILON
+                        or (
+                            abs(ratio - best_ratio) <= _EPSILON
+                            and self._order(self.basis[k]) < self._order(self.basis[leaving])
+                        )
+                    ):
+                        leaving, best_ratio = k, ratio
+            if leaving is None:  # pragma: no cover - the master LP is bounded below by zero
+                return True
+            degenerate = degenerate + 1 if best_ratio <= _EPSILON else 0
+
+            pivot = direction[leaving]
+            self.binv[leaving] = [value / pivot for value in self.binv[leaving]]
+            self.values[leaving] = best_ratio
+            pivot_row = self.binv[leaving]
+            for k in range(rows):
+                if k != leaving and abs(direction[k]) > _EPSILON:
+                    factor = direction[k]
+                    self.binv[k] = [value - factor * pivot_value for value, pivot_value in zip(self.binv[k], pivot_row)]
+                    self.values[k] -= factor * best_ratio
+            self.basis[leaving] = entering
+
+    def solution(self) -> List[float]:
+        values = [0.0] * len(self.columns)
+        for k, index in enumerate(self.basis):
+            if index >= 0:
+                values[index] = max(self.values[k], 0.0)
+        return values
+
+    def solve_integer(self, time_limit: float, lower_bound: int) -> Optional[List[int]]:
+        """Round down, then round up the most fractional patterns still covering demand."""
+        values = self.solution()
+        counts = [int(math.floor(value + 1e-7)) for value in values]
+        residual = list(self.demand)
+        for pattern, count in zip(self.columns, counts):
+            for row, taken in enumerate(pattern):
+                residual[row] -= taken * count
+        order = sorted(range(len(values)), key=lambda index: values[index] - counts[index], reverse=True)
+        for index in order:
+            if values[index] - counts[index] <= 1e-7:
+                break
+            pattern = self.columns[index]
+            if any(taken and residual[row] > 0 for row, taken in enumerate(pattern)):
+                counts[index] += 1
+                for row, taken in enumerate(pattern):
+                    residual[row] -= taken
+        return counts
+
+
+class _OrToolsMaster:
+    """Restricted master solved with GLOP, with a SCIP/CBC pass over the final columns."""
+
+    def __init__(self, demand: Sequence[int], homogeneous: Sequence[Pattern]) -> None:
+        self.demand = list(demand)
+        self.columns: List[Pattern] = []
+        self.solver = pywraplp.Solver.CreateSolver("GLOP")
+        self.constraints = [self.solver.Constraint(float(value), self.solver.infinity()) for value in demand]
+        self.variables = []
+        self.solved = False
+        self.solver.Objective().SetMinimization()
+        for pattern in homogeneous:
+            self.add_column(pattern)
+
+    def add_column(self, pattern: Pattern) -> None:
+        variable = self.solver.NumVar(0.0, self.solver.infinity(), f"p{len(self.columns)}")
+        self.solver.Objective().SetCoefficient(variable, 1.0)
+        for row, count in enumerate(pattern):
+            if count:
+                self.constraints[row].SetCoefficient(variable, float(count))
+        self.columns.append(pattern)
+        self.variables.append(variable)
+
+    def optimize(self, deadline: float) -> bool:
+        self.solver.SetTimeLimit(max(int((deadline - time.monotonic()) * 1000), 1))
+        self.solved = self.solver.Solve() == pywraplp.Solver.OPTIMAL
+        return self.solved
+
+    def duals(self) -> List[float]:
+        return [constraint.dual_value() for constraint in self.constraints]
+
+    def solution(self) -> List[float]:
+        if not self.solved:
+            return [0.0] * len(self.variables)
+        return [variable.solution_value() for variable in self.variables]
+
+    def solve_integer(self, time_limit: float, lower_bound: int) -> Optional[List[int]]:
+        solver = pywraplp.Solver.CreateSolver("SCIP") or pywraplp.Solver.CreateSolver("CBC")
+        if solver is None or time_limit <= 0 or not self.solved:
+            return None
+        variables = [solver.IntVar(0, solver.infinity(), f"p{index}") for index in range(len(self.columns))]
+        for row, value in enumerate(self.demand):
+            solver.Add(
+                sum(pattern[row] * variable for pattern, variable in zip(self.columns, variables) if pattern[row])
+                >= value
+            )
+        solver.Minimize(sum(variables))
+        solver.SetTimeLimit(max(int(time_limit * 1000), 1))
+        # Stop as soon as an incumbent reaches the rounded-up LP bound.
+        parameters = pywraplp.MPSolverParameters()
+        lp_value = sum(self.solution())
+        parameters.SetDoubleParam(
+            pywraplp.MPSolverParameters.RELATIVE_MIP_GAP,
+            max((lower_bound - lp_value) / lower_bound, 0.0) + 1e-6,
+        )
+        if solver.Solve(parameters) not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            return None
+        return [int(round(variable.solution_value())) for variable in variables]
+
+
+def _price_pattern(
+    duals: Sequence[float],
+    weights: Sequence[float],
+    bounds: Sequence[int],
+    capacity: float,
+) -> Tuple[float, Pattern]:
+    """Bounded knapsack maximising the dual value of a single bar."""
+    items = sorted(
+        (index for index in range(len(duals)) if duals[index] > _EPSILON),
+        key=lambda index: duals[index] / weights[index],
+        reverse=True,
+    )
+    counts = [0] * len(duals)
+    best_value = 0.0
+    best_pattern: Pattern = tuple(counts)
+    nodes = 0
+
+    def search(position: int, remaining: float, value: float) -> None:
+        nonlocal best_value, best_pattern, nodes
+        nodes += 1
+        if value > best_value + _EPSILON:
+            best_value = value
+            best_pattern = tuple(counts)
+        if position == len(items) or nodes > _KNAPSACK_NODE_LIMIT:
+            return
+        index = items[position]
+        if value + remaining * duals[index] / weights[index] <= best_value + _EPSILON:
+            return
+        most = min(bounds[index], int((remaining + _FIT_TOLERANCE) // weights[index]))
+        for take in range(most, -1, -1):
+            counts[index] = take
+            search(position + 1, remaining - take * weights[index], value + take * duals[index])
+        counts[index] = 0
+
+    search(0, capacity, 0.0)
+    return best_value, best_pattern
+
+
+def _generate_columns(
+    demand: Sequence[int],
+    weights: Sequence[float],
+    capacity: float,
+    deadline: float,
+) -> Optional[Tuple[object, int]]:
+    """Run column generation; returns the master and a valid lower bound on bars.
+
+    Farley's bound ``z / max_reduced_value`` stops the loop as soon as its
+    rounded value meets the rounded restricted LP, which cuts the long tail of
+    columns that cannot change the integer bound.
+    """
+    homogeneous: List[Pattern] = []
+    for row, weight in enumerate(weights):
+        pattern = [0] * len(weights)
+        pattern[row] = min(demand[row], int((capacity + _FIT_TOLERANCE) // weight))
+        if pattern[row] < 1:
+            return None
+        homogeneous.append(tuple(pattern))
+
+    master = (_OrToolsMaster if pywraplp is not None else _SimplexMaster)(demand, homogeneous)
+    seen = set(homogeneous)
+    lower_bound = 1
+    while True:
+        if not master.optimize(deadline):
+            return master, lower_bound
+        objective = sum(master.solution())
+        value, pattern = _price_pattern(master.duals(), weights, demand, capacity)
+        if value <= 1 + 1e-7 or pattern in seen:
+            return master, max(math.ceil(objective - 1e-6), lower_bound)
+        lower_bound = max(math.ceil(objective / value - 1e-6), lower_bound)
+        if lower_bound >= math.ceil(objective - 1e-6):
+            return master, lower_bound
+        seen.add(pattern)
+        master.add_column(pattern)
+
+
+def _solve_patterns(
+    demand: List[int],
+    weights: Sequence[float],
+    capacity: float,
+    deadline: float,
+    upper_bound: Optional[int],
+) -> Optional[Tuple[List[Tuple[Pattern, int]], List[int]]]:
+    """Return integer pattern counts and the residual demand left uncovered.
+
+    ``None`` means the LP bound shows ``upper_bound`` bars cannot be beaten.
+    """
+    generated = _generate_columns(demand, weights, capacity, deadline)
+    if generated is None:
+        return None
+    master, lower_bound = generated
+    if upper_bound is not None and lower_bound >= upper_bound:
+        return None
+
+    counts = master.solve_integer(deadline - time.monotonic(), lower_bound)
+    if counts is None:
+        counts = [int(math.floor(value + 1e-7)) for value in master.solution()]
+
+    residual = list(demand)
+    chosen: List[Tuple[Pattern, int]] = []
+    for pattern, count in zip(master.columns, counts):
+        if count <= 0:
+            continue
+        chosen.append((pattern, count))
+        for row, taken in enumerate(pattern):
+            residual[row] -= taken * count
+    return chosen, [max(value, 0) for value in residual]
+
+
+def column_generation(
+    section: str,
+    demand: Dict[float, int],
+    config: OptimizationConfig,
+    upper_bound: Optional[int] = None,
+) -> Optional[List[_Pattern]]:
+    """Near-exact patterns for one section group, or ``None`` when the model does not apply.
+
+    ``upper_bound`` is the bar count of a known solution; the search gives up
+    early when the LP bound proves it optimal. The search stops at
+    ``config.time_limit_ms``; whatever integer solution is available by then is
+    completed with the best-fit heuristic.
+    """
+    deadline = time.monotonic() + config.time_limit_ms / 1000
+    usable_length = config.stock_length - (2 * config.end_trim)
+    capacity = usable_length + config.kerf
+
+    distinct = sorted(demand, reverse=True)
+    if not distinct or len(distinct) > _MAX_DISTINCT_LENGTHS or distinct[0] > usable_length:
+        return None
+    weights = [length + config.kerf for length in distinct]
+    if upper_bound is not None and _lower_bound(demand, config) >= upper_bound:
+        return None
+
+    residual = [demand[length] for length in distinct]
+    chosen: List[Tuple[Pattern, int]] = []
+    for attempt in range(_ROUNDING_PASSES):
+        if not any(residual) or time.monotonic() > deadline:
+            break
+        solved = _solve_patterns(residual, weights, capacity, deadline, upper_bound if attempt == 0 else None)
+        if solved is None:
+            return None
+        patterns, residual = solved
+        if not patterns:
+            break
+        chosen.extend(patterns)
+
+    # Turn pattern counts into cuts, dropping any over-production from the LP rounding.
+    needed = dict(demand)
+    result: List[_Pattern] = []
+
+    def take(pattern: Pattern) -> List[float]:
+        cuts: List[float] = []
+        for row, taken in enumerate(pattern):
+            length = distinct[row]
+            count = min(taken, needed[length])
+            needed[length] -= count
+            cuts.extend([length] * count)
+        return cuts
+
+    for pattern, count in chosen:
+        used = [row for row, taken in enumerate(pattern) if taken]
+        full = min([count] + [needed[distinct[row]] // pattern[row] for row in used])
+        if full:
+            cuts = take(pattern)
+            for row in used:
+                needed[distinct[row]] -= pattern[row] * (full - 1)
+            result.append(_Pattern(cuts=cuts, count=full, remaining=0.0))
+        for _ in range(count - full):
+            cuts = take(pattern)
+            if not cuts:
+                break
+            result.append(_Pattern(cuts=cuts, count=1, remaining=0.0))
+    for pattern in result:
+        pattern.remaining = usable_length - sum(pattern.cuts) - config.kerf * (len(pattern.cuts) - 1)
+
+    leftovers = [("", length) for length in distinct for _ in range(needed[length])]
+    result.extend(_bars_to_patterns(_pack_best_fit(section, leftovers, config)))
+    return _merge_patterns(result)
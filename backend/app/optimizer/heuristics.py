@@ -1,23 +1,44 @@
 """Cutting optimization heuristics for sash production."""
 from __future__ import annotations
 
-from collections import defaultdict
+import math
+import random
+import time
+from collections import defaultdict, deque
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Tuple
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from sortedcontainers import SortedList
 
 from ..models import (
     OptimizationBar,
     OptimizationConfig,
     OptimizationComponent,
     OptimizationGroup,
+    OptimizationPattern,
+    PieceRef,
+    StockLength,
 )
 
+_FIT_TOLERANCE = 1e-6
+_SUBSET_NODE_LIMIT = 5_000
+
 
 @dataclass
 class _Bar:
     identifier: str
     cuts: List[float]
     remaining: float
+    stock: Optional[StockLength] = None
+    remnant_id: Optional[int] = None
+
+
+@dataclass
+class _Pattern:
+    cuts: List[float]
+    count: int
+    remaining: float
+    stock: Optional[StockLength] = None
 
 
 def _group_components(components: Iterable[OptimizationComponent]) -> Dict[Tuple[str, str], List[Tuple[str, float]]]:
@@ -29,85 +50,636 @@ def _group_components(components: Iterable[OptimizationComponent]) -> Dict[Tuple
     return grouped
 
 
-def best_fit_decreasing(
-    components: Iterable[OptimizationComponent],
-    config: OptimizationConfig,
-) -> List[OptimizationGroup]:
-    """Execute a Best-Fit Decreasing heuristic for the pre-pre cut stage."""
+def _group_demands(components: Iterable[OptimizationComponent]) -> Dict[Tuple[str, str], Dict[float, int]]:
+    """Group components into ``length -> count`` demands without expanding quantities."""
+    grouped: Dict[Tuple[str, str], Dict[float, int]] = defaultdict(dict)
+    for component in components:
+        demand = grouped[(component.section, component.material)]
+        demand[component.length] = demand.get(component.length, 0) + component.quantity
+    return grouped
 
-    grouped_components = _group_components(components)
-    groups: List[OptimizationGroup] = []
 
-    for (section, material), lengths in grouped_components.items():
-        ordered = sorted(lengths, key=lambda item: item[1], reverse=True)
-        usable_length = config.stock_length - (2 * config.end_trim)
-        bars: List[_Bar] = []
-        bar_index = 1
-
-        for _, length in ordered:
-            if length < config.minimum_piece:
-                raise ValueError(
-                    f"Component length {length} for section {section} is below minimum allowed {config.minimum_piece}"
+def _lower_bound(demand: Dict[float, int], config: OptimizationConfig) -> int:
+    """Martello-Toth L2 bound on the bars needed for ``length -> count`` demand.
+
+    Every piece weighs its length plus one kerf and a bar holds the usable
+    length plus one kerf, which turns the kerf rule into plain bin packing.
+    Oversized pieces count as a full bar each. L2 is never below L1.
+    """
+    capacity = config.stock_length - (2 * config.end_trim) + config.kerf
+    items = sorted(
+        ((min(length + config.kerf, capacity), count) for length, count in demand.items() if count > 0),
+        reverse=True,
+    )
+    if not items:
+        return 0
+    weights = [weight for weight, _ in items]
+    counts = [0]
+    volumes = [0.0]
+    for weight, count in items:
+        counts.append(counts[-1] + count)
+        volumes.append(volumes[-1] + weight * count)
+
+    def first_at_most(limit: float) -> int:
+        # Index of the first (largest) weight that is <= limit; weights are descending.
+        low, high = 0, len(weights)
+        while low < high:
+            middle = (low + high) // 2
+            if weights[middle] <= limit + _FIT_TOLERANCE:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    best = math.ceil(volumes[-1] / capacity - 1e-9)
+    half = capacity / 2
+    for threshold in [0.0] + [weight for weight in weights if weight <= half + _FIT_TOLERANCE]:
+        large = first_at_most(capacity - threshold)  # J1: w > C - K, one bar each
+        medium = first_at_most(half)  # J2: C - K >= w > C / 2
+        small = len(weights) if threshold == 0 else first_at_most(threshold - 2 * _FIT_TOLERANCE)
+        medium_count = counts[medium] - counts[large]
+        free = medium_count * capacity - (volumes[medium] - volumes[large])
+        small_volume = volumes[small] - volumes[medium]
+        bound = counts[medium] + max(0, math.ceil((small_volume - free) / capacity - 1e-9))
+        best = max(best, bound)
+    return best
+
+
+def _bar_identifier(section: str, index: int) -> str:
+    return f"{section.replace(' ', '')}-{index:04d}"
+
+
+def _pack_best_fit(section: str, lengths: List[Tuple[str, float]], config: OptimizationConfig) -> List[_Bar]:
+    """Best-fit placement of the pieces of a single section group.
+
+    Open bars are indexed by ``(remaining, index)`` so each lookup is a
+    logarithmic bisect instead of a scan over every bar. Ties resolve to the
+    earliest opened bar, which keeps the output identical to a linear scan.
+    """
+    ordered = sorted(lengths, key=lambda item: item[1], reverse=True)
+    usable_length = config.stock_length - (2 * config.end_trim)
+    bars: List[_Bar] = []
+    capacity_index = SortedList()
+
+    for _, length in ordered:
+        if length < config.minimum_piece:
+            raise ValueError(
+                f"Component length {length} for section {section} is below minimum allowed {config.minimum_piece}"
+            )
+
+        # Every open bar already holds a cut, so each placement costs a kerf.
+        required = length + config.kerf
+        position = capacity_index.bisect_left((required, -1))
+        best_fit_index = None
+        if position < len(capacity_index):
+            best_remaining = capacity_index[position][0] - required
+            best_fit_index = capacity_index[position][1]
+            # Equal capacities are ordered by index, so the bisect hit is the
+            # lowest of its run. Distinct capacities can still round to the same
+            # remainder; hop run by run, as the linear scan kept the lowest index.
+            while True:
+                position = capacity_index.bisect_right((capacity_index[position][0], math.inf))
+                if position == len(capacity_index) or capacity_index[position][0] - required != best_remaining:
+                    break
+                best_fit_index = min(best_fit_index, capacity_index[position][1])
+
+        if best_fit_index is None:
+            bars.append(
+                _Bar(
+                    identifier=_bar_identifier(section, len(bars) + 1),
+                    cuts=[length],
+                    remaining=usable_length - length,
                 )
+            )
+            capacity_index.add((bars[-1].remaining, len(bars) - 1))
+        else:
+            bar = bars[best_fit_index]
+            capacity_index.remove((bar.remaining, best_fit_index))
+            bar.cuts.append(length)
+            bar.remaining -= required
+            capacity_index.add((bar.remaining, best_fit_index))
+
+    return bars
 
-            best_fit_index = None
-            best_remaining = None
-
-            for index, bar in enumerate(bars):
-                required = length if not bar.cuts else length + config.kerf
-                if required <= bar.remaining:
-                    remaining_after = bar.remaining - required
-                    if best_remaining is None or remaining_after < best_remaining:
-                        best_remaining = remaining_after
-                        best_fit_index = index
-
-            if best_fit_index is None:
-                bar_id = f"{section.replace(' ', '')}-{bar_index:04d}"
-                bar_index += 1
-                bars.append(
-                    _Bar(
-                        identifier=bar_id,
-                        cuts=[length],
-                        remaining=usable_length - length,
-                    )
+
+def _pack_patterns(section: str, demand: Dict[float, int], config: OptimizationConfig) -> List[_Pattern]:
+    """Greedy pattern packing on ``(length, count)`` pairs.
+
+    Each pass fills one bar longest-first, taking as many copies of a length
+    as fit, then repeats that bar as often as the remaining demand allows. The
+    number of passes depends on the distinct lengths, not on the quantities.
+    """
+    lengths = sorted(demand, reverse=True)
+    for length in lengths:
+        if length < config.minimum_piece:
+            raise ValueError(
+                f"Component length {length} for section {section} is below minimum allowed {config.minimum_piece}"
+            )
+
+    usable_length = config.stock_length - (2 * config.end_trim)
+    remaining = dict(demand)
+    patterns: List[_Pattern] = []
+    while True:
+        open_lengths = [length for length in lengths if remaining[length]]
+        if not open_lengths:
+            return patterns
+
+        space = usable_length + config.kerf
+        taken: List[Tuple[float, int]] = []
+        for length in open_lengths:
+            take = min(remaining[length], int((space + _FIT_TOLERANCE) // (length + config.kerf)))
+            if take:
+                taken.append((length, take))
+                space -= take * (length + config.kerf)
+        if not taken:
+            # Oversized pieces still get a bar of their own, as in best-fit.
+            taken = [(open_lengths[0], 1)]
+
+        count = min(remaining[length] // take for length, take in taken)
+        cuts: List[float] = []
+        for length, take in taken:
+            remaining[length] -= take * count
+            cuts.extend([length] * take)
+        patterns.append(
+            _Pattern(cuts=cuts, count=count, remaining=usable_length - sum(cuts) - config.kerf * (len(cuts) - 1))
+        )
+
+
+def _merge_patterns(patterns: Iterable[_Pattern]) -> List[_Pattern]:
+    """Merge patterns with identical cuts, keeping first-seen order."""
+    merged: Dict[Tuple[Tuple[float, ...], Optional[float]], _Pattern] = {}
+    for pattern in patterns:
+        key = (tuple(pattern.cuts), pattern.stock.length if pattern.stock else None)
+        if key in merged:
+            merged[key].count += pattern.count
+        else:
+            merged[key] = _Pattern(
+                cuts=list(pattern.cuts), count=pattern.count, remaining=pattern.remaining, stock=pattern.stock
+            )
+    return list(merged.values())
+
+
+def _bars_to_patterns(bars: Iterable[_Bar]) -> List[_Pattern]:
+    return _merge_patterns(
+        _Pattern(cuts=bar.cuts, count=1, remaining=bar.remaining, stock=bar.stock) for bar in bars
+    )
+
+
+def _expand_patterns(section: str, patterns: Iterable[_Pattern]) -> List[_Bar]:
+    bars: List[_Bar] = []
+    for pattern in patterns:
+        for _ in range(pattern.count):
+            bars.append(
+                _Bar(
+                    identifier=_bar_identifier(section, len(bars) + 1),
+                    cuts=list(pattern.cuts),
+                    remaining=pattern.remaining,
+                    stock=pattern.stock,
                 )
-            else:
-                bar = bars[best_fit_index]
-                required = length if not bar.cuts else length + config.kerf
-                bar.cuts.append(length)
-                bar.remaining -= required
-
-        total_waste = 0.0
-        optimization_bars: List[OptimizationBar] = []
-        for bar in bars:
-            waste = bar.remaining + (2 * config.end_trim)
-            utilization = 1 - (waste / config.stock_length)
-            total_waste += waste
-            optimization_bars.append(
-                OptimizationBar(
-                    barId=bar.identifier,
-                    cuts=bar.cuts,
-                    waste=round(waste, 2),
-                    utilization=round(utilization, 3),
+            )
+    return bars
+
+
+def _stock_options(config: OptimizationConfig, section: str, material: str) -> List[StockLength]:
+    """Stock lengths configured for a group; empty means the single ``stock_length``."""
+    return [
+        option
+        for option in config.stock_lengths
+        if option.section in (None, section) and option.material in (None, material)
+    ]
+
+
+def _assign_stock(
+    patterns: List[_Pattern],
+    options: List[StockLength],
+    primary: OptimizationConfig,
+) -> Optional[List[_Pattern]]:
+    """Move each packed bar onto the cheapest stock length that still holds its cuts.
+
+    The longest loads pick first so availability goes where only long stock
+    fits. A pattern may be split across stock lengths when one runs out.
+    Returns ``None`` when availability cannot cover every bar.
+    """
+    primary_usable = primary.stock_length - (2 * primary.end_trim)
+    left = {id(option): option.available for option in options}
+    by_cost = sorted(options, key=lambda option: (option.cost, option.length))
+    longest = max(option.length for option in options)
+    assigned: List[List[_Pattern]] = [[] for _ in patterns]
+
+    order = sorted(range(len(patterns)), key=lambda index: patterns[index].remaining)
+    for index in order:
+        pattern = patterns[index]
+        load = primary_usable - pattern.remaining
+        count = pattern.count
+        for option in by_cost:
+            usable = option.length - (2 * primary.end_trim)
+            if count == 0:
+                break
+            # Oversized pieces go on the longest stock, as they do with a single length.
+            if usable + _FIT_TOLERANCE < load and option.length != longest:
+                continue
+            take = count if left[id(option)] is None else min(count, left[id(option)])
+            if take:
+                assigned[index].append(
+                    _Pattern(cuts=pattern.cuts, count=take, remaining=usable - load, stock=option)
                 )
+                count -= take
+                if left[id(option)] is not None:
+                    left[id(option)] -= take
+        if count:
+            return None
+    return [part for parts in assigned for part in parts]
+
+
+def _cheapest_stock_mix(
+    section: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    options: List[StockLength],
+    config: OptimizationConfig,
+    improve: bool = False,
+) -> List[_Pattern]:
+    """Pack once per candidate primary stock length and keep the cheapest assignment.
+
+    Each packing uses one length as if it were ``stock_length``; its bars are
+    then moved onto cheaper shorter stock where they still fit. Ties on cost
+    go to the fewer bars. With ``improve`` each packing is run through the
+    local search before stock is assigned.
+    """
+    best: Optional[Tuple[Tuple[float, int], List[_Pattern]]] = None
+    for option in sorted(options, key=lambda option: option.length, reverse=True):
+        primary = config.model_copy(update={"stock_length": option.length})
+        if config.pattern_mode:
+            packed = _pack_patterns(section, pieces, primary)
+        else:
+            packed = [
+                _Pattern(cuts=bar.cuts, count=1, remaining=bar.remaining)
+                for bar in _pack_best_fit(section, pieces, primary)
+            ]
+        if improve:
+            # The local-search budget is shared between the candidate packings.
+            budget = primary.model_copy(update={"time_limit_ms": max(1, config.time_limit_ms // len(options))})
+            packed = _bars_to_patterns(_improve_bars(section, _expand_patterns(section, packed), budget))
+        assigned = _assign_stock(packed, options, primary)
+        if assigned is None:
+            continue
+        rank = (
+            sum(pattern.stock.cost * pattern.count for pattern in assigned),
+            sum(pattern.count for pattern in assigned),
+        )
+        if best is None or rank < best[0]:
+            best = (rank, assigned)
+    if best is None:
+        raise ValueError(f"Not enough stock available for section {section}")
+    return best[1]
+
+
+def _fill_remnants(
+    section: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    remnants: List[Tuple[int, float]],
+    config: OptimizationConfig,
+) -> Tuple[List[_Bar], Union[List[Tuple[str, float]], Dict[float, int]]]:
+    """Cut as many pieces as possible from stored remnants before new stock is opened.
+
+    Remnants are taken longest first and each is filled with the subset of
+    the remaining pieces that uses it best. Returns the remnant bars and the
+    pieces that are left for new stock, in the same form they came in.
+    """
+    if isinstance(pieces, dict):
+        items = [(None, length) for length, count in pieces.items() for _ in range(count)]
+    else:
+        items = list(pieces)
+    for _, length in items:
+        if length < config.minimum_piece:
+            raise ValueError(
+                f"Component length {length} for section {section} is below minimum allowed {config.minimum_piece}"
             )
+    items.sort(key=lambda item: item[1], reverse=True)
 
-        summary = {
-            "totalBars": len(bars),
-            "avgWaste": round(total_waste / max(len(bars), 1), 2) if bars else 0.0,
-            "avgUtil": round(
-                sum(item.utilization for item in optimization_bars) / max(len(optimization_bars), 1) * 100,
-                1,
-            ) if optimization_bars else 0.0,
-        }
-
-        groups.append(
-            OptimizationGroup(
-                section=section,
-                material=material,
-                bars=optimization_bars,
-                summary=summary,
+    bars: List[_Bar] = []
+    for remnant_id, remnant_length in sorted(remnants, key=lambda remnant: remnant[1], reverse=True):
+        if not items:
+            break
+        usable_length = remnant_length - (2 * config.end_trim)
+        chosen = _best_subset([length for _, length in items], usable_length + config.kerf, config.kerf)
+        if not chosen:
+            continue
+        cuts = [items[index][1] for index in chosen]
+        bars.append(
+            _Bar(
+                identifier=f"{section.replace(' ', '')}-R{remnant_id:04d}",
+                cuts=cuts,
+                remaining=usable_length - sum(cuts) - config.kerf * (len(cuts) - 1),
+                stock=StockLength(length=remnant_length),
+                remnant_id=remnant_id,
             )
         )
+        taken = set(chosen)
+        items = [item for index, item in enumerate(items) if index not in taken]
+
+    if isinstance(pieces, dict):
+        left: Dict[float, int] = {}
+        for _, length in items:
+            left[length] = left.get(length, 0) + 1
+        return bars, left
+    return bars, items
+
+
+def _offcut(remaining: float, cuts: List[float], config: OptimizationConfig) -> Optional[float]:
+    """Length of the reusable end left on a bar, or ``None`` below ``offcut_minimum``.
+
+    The far end trim stays on the offcut; separating it costs one kerf.
+    """
+    if not config.use_remnants or not cuts:
+        return None
+    length = remaining + config.end_trim - config.kerf
+    if length < max(config.offcut_minimum, 2 * config.end_trim + _FIT_TOLERANCE):
+        return None
+    return round(length, 2)
+
+
+def _best_subset(pieces: List[float], capacity: float, kerf: float) -> List[int]:
+    """Indices of the subset of ``pieces`` (longest first) that fills one bar most.
+
+    Depth-first subset-sum with a node limit; equal lengths are branched on
+    once per level.
+    """
+    suffix = [0.0] * (len(pieces) + 1)
+    for index in range(len(pieces) - 1, -1, -1):
+        suffix[index] = suffix[index + 1] + pieces[index] + kerf
+    best: List[int] = []
+    best_load = 0.0
+    chosen: List[int] = []
+    nodes = 0
+
+    def search(start: int, load: float) -> None:
+        nonlocal best, best_load, nodes
+        nodes += 1
+        if load > best_load:
+            best, best_load = list(chosen), load
+        if nodes > _SUBSET_NODE_LIMIT or capacity - best_load < _FIT_TOLERANCE:
+            return
+        for index in range(start, len(pieces)):
+            if load + suffix[index] <= best_load:
+                return
+            if index > start and pieces[index] == pieces[index - 1]:
+                continue
+            weight = pieces[index] + kerf
+            if load + weight <= capacity + _FIT_TOLERANCE:
+                chosen.append(index)
+                search(index + 1, load + weight)
+                chosen.pop()
+
+    search(0, 0.0)
+    return best
+
+
+def _improve_bars(section: str, bars: List[_Bar], config: OptimizationConfig, seed: int = 0) -> List[_Bar]:
+    """Ruin-and-recreate search that tries to empty the least-utilised bars.
+
+    Each step removes the emptiest bar plus a few random ones, refills their
+    pieces one bar at a time with the best-filling subset, then tries to
+    spread the emptiest refilled bar over all other bars. Solutions are ranked
+    by bar count, then by the sum of squared bar loads, which favours
+    concentrating waste in bars that can later be emptied. Runs until
+    ``config.time_limit_ms`` expires or the volume bound is reached and returns
+    the best solution seen.
+    """
+    if len(bars) < 2:
+        return bars
+    deadline = time.monotonic() + config.time_limit_ms / 1000
+    usable_length = config.stock_length - (2 * config.end_trim)
+    kerf = config.kerf
+    capacity = usable_length + kerf
+    rng = random.Random(seed)
+
+    def load(cuts: List[float]) -> float:
+        return sum(cuts) + kerf * (len(cuts) - 1)
+
+    def score(loads: List[float]) -> Tuple[int, float]:
+        return len(loads), -sum(value * value for value in loads)
+
+    volume = sum(cut + kerf for bar in bars for cut in bar.cuts)
+    bound = math.ceil(volume / capacity - 1e-9)
+
+    current = [list(bar.cuts) for bar in bars]
+    current_loads = [load(cuts) for cuts in current]
+    current_score = score(current_loads)
+    initial_score = current_score
+    best, best_score = current, current_score
+
+    while best_score[0] > bound and time.monotonic() < deadline:
+        weakest = min(range(len(current)), key=current_loads.__getitem__)
+        victims = {weakest, *rng.sample(range(len(current)), k=min(rng.randint(1, 4), len(current)))}
+        candidate = [list(cuts) for index, cuts in enumerate(current) if index not in victims]
+        loads = [value for index, value in enumerate(current_loads) if index not in victims]
+        pool = sorted((cut for index in victims for cut in current[index]), reverse=True)
+
+        refilled: List[List[float]] = []
+        while pool:
+            chosen = _best_subset(pool, capacity, kerf) or [0]
+            refilled.append([pool[index] for index in chosen])
+            pool = [cut for index, cut in enumerate(pool) if index not in set(chosen)]
+        refilled.sort(key=load)
+        spread = refilled.pop(0)
+        candidate.extend(refilled)
+        loads.extend(load(cuts) for cuts in refilled)
+
+        for piece in sorted(spread, reverse=True):
+            best_index = None
+            best_gap = None
+            for index, value in enumerate(loads):
+                gap = usable_length - value - piece - kerf
+                if gap >= -_FIT_TOLERANCE and (best_gap is None or gap < best_gap):
+                    best_index, best_gap = index, gap
+            if best_index is None:
+                candidate.append([piece])
+                loads.append(piece)
+            else:
+                candidate[best_index].append(piece)
+                loads[best_index] += piece + kerf
+
+        candidate_score = score(loads)
+        # Accept sideways moves that lose a little squared load to escape plateaus.
+        if candidate_score[0] < current_score[0] or (
+            candidate_score[0] == current_score[0] and candidate_score[1] <= current_score[1] * 0.999
+        ):
+            current, current_loads, current_score = candidate, loads, candidate_score
+            if current_score < best_score:
+                best, best_score = current, current_score
+
+    if best_score >= initial_score:
+        return bars
+    return [
+        _Bar(
+            identifier=_bar_identifier(section, index),
+            cuts=sorted(cuts, reverse=True),
+            remaining=usable_length - load(cuts),
+        )
+        for index, cuts in enumerate(best, start=1)
+    ]
+
+
+def _summary(total_bars: int, total_waste: float, utilization_total: float) -> Dict[str, float]:
+    return {
+        "totalBars": total_bars,
+        "avgWaste": round(total_waste / max(total_bars, 1), 2) if total_bars else 0.0,
+        "avgUtil": round(utilization_total / max(total_bars, 1) * 100, 1) if total_bars else 0.0,
+    }
+
+
+def _gap_summary(total_bars: int, lower_bound: int) -> Dict[str, float]:
+    """Bar count against the lower bound: the most any solver could still save."""
+    gap = total_bars - lower_bound
+    return {
+        "lowerBound": lower_bound,
+        "gapBars": gap,
+        "gapPct": round(gap / lower_bound * 100, 1) if lower_bound else 0.0,
+    }
+
+
+def _stock_summary(patterns: Iterable[Union[_Bar, _Pattern]]) -> Dict[str, object]:
+    """Cost and per-length bar counts for groups cut from configured stock lengths."""
+    total_cost = 0.0
+    usage: Dict[str, int] = {}
+    for item in patterns:
+        if getattr(item, "remnant_id", None) is not None:
+            continue
+        if item.stock is None:
+            return {}
+        count = getattr(item, "count", 1)
+        total_cost += item.stock.cost * count
+        key = f"{item.stock.length:g}"
+        usage[key] = usage.get(key, 0) + count
+    if not usage:
+        return {}
+    return {"totalCost": round(total_cost, 2), "stockUsage": usage}
+
+
+def _build_group(
+    section: str,
+    material: str,
+    bars: List[_Bar],
+    config: OptimizationConfig,
+) -> OptimizationGroup:
+    total_waste = 0.0
+    optimization_bars: List[OptimizationBar] = []
+    for bar in bars:
+        stock_length = bar.stock.length if bar.stock else config.stock_length
+        waste = bar.remaining + (2 * config.end_trim)
+        utilization = 1 - (waste / stock_length)
+        total_waste += waste
+        optimization_bars.append(
+            OptimizationBar(
+                barId=bar.identifier,
+                cuts=bar.cuts,
+                waste=round(waste, 2),
+                utilization=round(utilization, 3),
+                stockLength=bar.stock.length if bar.stock else None,
+                cost=bar.stock.cost if bar.stock else None,
+                remnantId=bar.remnant_id,
+                offcut=_offcut(bar.remaining, bar.cuts, config),
+            )
+        )
+
+    summary = _summary(len(bars), total_waste, sum(item.utilization for item in optimization_bars))
+    summary.update(_stock_summary(bars))
+
+    return OptimizationGroup(
+        section=section,
+        material=material,
+        bars=optimization_bars,
+        summary=summary,
+    )
+
+
+def _build_pattern_group(
+    section: str,
+    material: str,
+    patterns: List[_Pattern],
+    config: OptimizationConfig,
+) -> OptimizationGroup:
+    """Group output as repeated patterns, with per-bar rows only when ``expand_patterns`` is set."""
+    total_bars = 0
+    total_waste = 0.0
+    utilization_total = 0.0
+    optimization_patterns: List[OptimizationPattern] = []
+    for index, pattern in enumerate(patterns, start=1):
+        stock_length = pattern.stock.length if pattern.stock else config.stock_length
+        waste = pattern.remaining + (2 * config.end_trim)
+        utilization = round(1 - (waste / stock_length), 3)
+        total_bars += pattern.count
+        total_waste += waste * pattern.count
+        utilization_total += utilization * pattern.count
+        optimization_patterns.append(
+            OptimizationPattern(
+                patternId=f"{section.replace(' ', '')}-P{index:03d}",
+                cuts=pattern.cuts,
+                count=pattern.count,
+                waste=round(waste, 2),
+                utilization=utilization,
+                stockLength=pattern.stock.length if pattern.stock else None,
+                cost=pattern.stock.cost if pattern.stock else None,
+                offcut=_offcut(pattern.remaining, pattern.cuts, config),
+            )
+        )
+
+    bars: List[OptimizationBar] = []
+    if config.expand_patterns:
+        bars = _build_group(section, material, _expand_patterns(section, patterns), config).bars
+
+    summary = _summary(total_bars, total_waste, utilization_total)
+    summary.update(_stock_summary(patterns))
+    summary["totalPatterns"] = len(patterns)
+    return OptimizationGroup(
+        section=section,
+        material=material,
+        bars=bars,
+        patterns=optimization_patterns,
+        summary=summary,
+    )
+
+
+def _add_remnant_bars(group: OptimizationGroup, bars: List[_Bar], config: OptimizationConfig) -> None:
+    """Put the remnant bars ahead of the new stock and count them in the summary.
+
+    The existing summary figures keep describing new stock only.
+    """
+    remnant_group = _build_group(group.section, group.material, bars, config)
+    group.bars = remnant_group.bars + group.bars
+    group.summary["remnantsUsed"] = len(bars)
+    group.summary["remnantWaste"] = round(sum(bar.waste for bar in remnant_group.bars), 2)
+
+
+def _attribute_pieces(group: OptimizationGroup, components: Iterable[OptimizationComponent]) -> None:
+    """Fill ``bar.pieces`` by handing out the group's pieces to cuts of equal length.
+
+    Equal lengths are interchangeable on the saw, so this works the same for
+    every solver and for cached groups.
+    """
+    available: Dict[float, Deque[PieceRef]] = defaultdict(deque)
+    for component in components:
+        piece = PieceRef(
+            componentId=component.id,
+            length=component.length,
+            projectId=component.metadata.get("project_id"),
+        )
+        available[component.length].extend(piece for _ in range(component.quantity))
+    for bar in group.bars:
+        bar.pieces = [available[cut].popleft() for cut in bar.cuts]
+
+
+def best_fit_decreasing(
+    components: Iterable[OptimizationComponent],
+    config: OptimizationConfig,
+) -> List[OptimizationGroup]:
+    """Execute a Best-Fit Decreasing heuristic for the pre-pre cut stage."""
+
+    grouped_components = _group_components(components)
+    groups: List[OptimizationGroup] = []
+
+    for (section, material), lengths in grouped_components.items():
+        bars = _pack_best_fit(section, lengths, config)
+        groups.append(_build_group(section, material, bars, config))
 
     return groups
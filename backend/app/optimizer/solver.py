@@ -1,25 +1,386 @@
 """Integration with advanced solvers (optional OR-Tools support)."""
 from __future__ import annotations
 
-from typing import Iterable, List
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from ..models import OptimizationConfig, OptimizationComponent, OptimizationGroup
-from .heuristics import best_fit_decreasing
+from ..models import OptimizationConfig, OptimizationComponent, OptimizationGroup, StockLength
+from .cache import OptimizationCache, ProjectGroupStore, group_cache_key
+from .column_generation import column_generation
+from .heuristics import (
+    _Bar,
+    _Pattern,
+    _bars_to_patterns,
+    _build_group,
+    _add_remnant_bars,
+    _attribute_pieces,
+    _build_pattern_group,
+    _cheapest_stock_mix,
+    _expand_patterns,
+    _fill_remnants,
+    _gap_summary,
+    _group_components,
+    _group_demands,
+    _improve_bars,
+    _lower_bound,
+    _pack_best_fit,
+    _pack_patterns,
+    _stock_options,
+)
 
-try:  # pragma: no cover - optional dependency
-    from ortools.linear_solver import pywraplp  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    pywraplp = None
+# Worker processes shared by every ``execution="process"`` run; ``workers`` only caps one run's share.
+SOLVER_WORKERS = int(os.getenv("PRODUCTION_SOLVER_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SOLVER_WORKERS)
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died, so the next run starts a fresh one instead of failing too."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _exact_bars(
+    section: str,
+    lengths: List[Tuple[str, float]],
+    config: OptimizationConfig,
+) -> Tuple[List[_Bar], str]:
+    """Column generation for one group, keeping the heuristic bars unless it saves stock."""
+    bars = _pack_best_fit(section, lengths, config)
+    exact = column_generation(section, _as_demand(lengths), config, upper_bound=len(bars))
+    if exact is not None and sum(pattern.count for pattern in exact) < len(bars):
+        return _expand_patterns(section, exact), "column_generation"
+    return bars, "heuristic"
+
+
+def _pattern_solution(
+    section: str,
+    demand: Dict[float, int],
+    config: OptimizationConfig,
+) -> Tuple[List[_Pattern], str]:
+    """Quantity-aware solve on ``(length, count)`` pairs."""
+    patterns = _pack_patterns(section, demand, config)
+    if config.solver == "ortools":
+        total_bars = sum(pattern.count for pattern in patterns)
+        exact = column_generation(section, demand, config, upper_bound=total_bars)
+        if exact is not None and sum(pattern.count for pattern in exact) < total_bars:
+            return exact, "column_generation"
+    return patterns, "heuristic"
+
+
+def _as_demand(pieces: Union[List[Tuple[str, float]], Dict[float, int]]) -> Dict[float, int]:
+    if isinstance(pieces, dict):
+        return pieces
+    demand: Dict[float, int] = {}
+    for _, length in pieces:
+        demand[length] = demand.get(length, 0) + 1
+    return demand
+
+
+def _total_waste(bars: List[_Bar], config: OptimizationConfig) -> float:
+    return sum(bar.remaining + (2 * config.end_trim) for bar in bars)
+
+
+def _stock_cost(patterns: List[_Pattern]) -> float:
+    return sum(pattern.stock.cost * pattern.count for pattern in patterns)
+
+
+def _stock_mix_group(
+    section: str,
+    material: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    options: List[StockLength],
+    config: OptimizationConfig,
+) -> OptimizationGroup:
+    """Cost-aware solve for groups with several stock lengths to choose from."""
+    patterns = _cheapest_stock_mix(section, pieces, options, config)
+    improvement = None
+    if config.improve:
+        improved = _cheapest_stock_mix(section, pieces, options, config, improve=True)
+        if _stock_cost(improved) > _stock_cost(patterns):
+            improved = patterns
+        before = _expand_patterns(section, patterns)
+        after = _expand_patterns(section, improved)
+        improvement = {
+            "improvedBars": len(before) - len(after),
+            "improvedWaste": round(_total_waste(before, config) - _total_waste(after, config), 2),
+        }
+        patterns = improved
+
+    if config.pattern_mode:
+        group = _build_pattern_group(section, material, patterns, config)
+    else:
+        group = _build_group(section, material, _expand_patterns(section, patterns), config)
+    if config.solver == "ortools":
+        group.summary["engine"] = "heuristic"
+    if improvement is not None:
+        group.summary.update(improvement)
+    return group
+
+
+def _solve_group(
+    section: str,
+    material: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    config: OptimizationConfig,
+    remnants: Sequence[Tuple[int, float]] = (),
+) -> OptimizationGroup:
+    """Solve one ``(section, material)`` group; module-level so worker processes can run it."""
+    remnant_bars: List[_Bar] = []
+    if config.use_remnants and remnants:
+        remnant_bars, pieces = _fill_remnants(section, pieces, list(remnants), config)
+
+    options = _stock_options(config, section, material)
+    if options:
+        group = _stock_mix_group(section, material, pieces, options, config)
+        longest = config.model_copy(update={"stock_length": max(option.length for option in options)})
+        lower_bound = _lower_bound(_as_demand(pieces), longest)
+    else:
+        group = _stock_group(section, material, pieces, config)
+        lower_bound = _lower_bound(_as_demand(pieces), config)
+    group.summary.update(_gap_summary(group.summary["totalBars"], lower_bound))
+    if config.use_remnants:
+        _add_remnant_bars(group, remnant_bars, config)
+    return group
+
+
+def _stock_group(
+    section: str,
+    material: str,
+    pieces: Union[List[Tuple[str, float]], Dict[float, int]],
+    config: OptimizationConfig,
+) -> OptimizationGroup:
+    """Single stock length solve with the configured solver and optional improvement."""
+    engine = "heuristic"
+    bars: List[_Bar] = []
+    if config.pattern_mode:
+        patterns, engine = _pattern_solution(section, pieces, config)
+        if config.improve:
+            bars = _expand_patterns(section, patterns)
+    elif config.solver == "ortools":
+        bars, engine = _exact_bars(section, pieces, config)
+    else:
+        bars = _pack_best_fit(section, pieces, config)
+
+    improvement = None
+    if config.improve:
+        improved = _improve_bars(section, bars, config)
+        improvement = {
+            "improvedBars": len(bars) - len(improved),
+            "improvedWaste": round(_total_waste(bars, config) - _total_waste(improved, config), 2),
+        }
+        bars = improved
+        if config.pattern_mode:
+            patterns = _bars_to_patterns(bars)
+
+    if config.pattern_mode:
+        group = _build_pattern_group(section, material, patterns, config)
+    else:
+        group = _build_group(section, material, bars, config)
+    if config.solver == "ortools":
+        group.summary["engine"] = engine
+    if improvement is not None:
+        group.summary.update(improvement)
+    return group
+
+
+def _group_tasks(
+    components: Iterable[OptimizationComponent],
+    config: OptimizationConfig,
+) -> List[Tuple[str, str, Union[List[Tuple[str, float]], Dict[float, int]]]]:
+    grouped = _group_demands(components) if config.pattern_mode else _group_components(components)
+    return [(section, material, pieces) for (section, material), pieces in grouped.items()]
+
+
+def _applies(option: StockLength, section: str, material: str) -> bool:
+    return option.section in (None, section) and option.material in (None, material)
+
+
+def _shared_limits(config: OptimizationConfig, tasks: Sequence[Tuple[str, str, object]]) -> Dict[int, int]:
+    """``available`` per stock entry that more than one group of the run can draw from."""
+    limits: Dict[int, int] = {}
+    for position, option in enumerate(config.stock_lengths):
+        if option.available is None:
+            continue
+        users = sum(1 for section, material, _ in tasks if _applies(option, section, material))
+        if users > 1:
+            limits[position] = option.available
+    return limits
+
+
+def _with_availability(config: OptimizationConfig, left: Dict[int, int]) -> OptimizationConfig:
+    return config.model_copy(
+        update={
+            "stock_lengths": [
+                option.model_copy(update={"available": left[position]}) if position in left else option
+                for position, option in enumerate(config.stock_lengths)
+            ]
+        }
+    )
+
+
+def _consume_stock(config: OptimizationConfig, left: Dict[int, int], group: OptimizationGroup) -> None:
+    """Take the bars ``group`` cut from shared limited stock off ``left``.
+
+    Bars only name their length and cost, so they are matched to stock
+    entries on those two.
+    """
+    used: Dict[Tuple[float, float], int] = {}
+    rows = [(pattern.stockLength, pattern.cost, pattern.count) for pattern in group.patterns] or [
+        (bar.stockLength, bar.cost, 1) for bar in group.bars if bar.remnantId is None
+    ]
+    for length, cost, count in rows:
+        used[(length, cost)] = used.get((length, cost), 0) + count
+    for position in left:
+        option = config.stock_lengths[position]
+        if _applies(option, group.section, group.material):
+            take = min(left[position], used.get((option.length, option.cost), 0))
+            left[position] -= take
+            used[(option.length, option.cost)] = used.get((option.length, option.cost), 0) - take
+
+
+def iter_cutting_stock(
+    components: Iterable[OptimizationComponent],
+    config: OptimizationConfig,
+    cache: Optional[OptimizationCache] = None,
+    remnants: Optional[Dict[Tuple[str, str], List[Tuple[int, float]]]] = None,
+) -> Iterator[Tuple[int, OptimizationGroup]]:
+    """Yield ``(group index, group)`` pairs as soon as each group is solved.
+
+    Cached groups come first, the rest in completion order; groups sharing a
+    stock length with limited ``available`` come last, solved one after the
+    other. The index is the group's position in a full
+    :func:`solve_cutting_stock` result. With
+    ``track_pieces`` every bar lists the component (and project) of each cut.
+    """
+    components = list(components)
+    tasks = _group_tasks(components, config)
+    members: Dict[Tuple[str, str], List[OptimizationComponent]] = {}
+    if config.track_pieces:
+        for component in components:
+            members.setdefault((component.section, component.material), []).append(component)
+    offered = [
+        (remnants or {}).get((section, material), []) if config.use_remnants else []
+        for section, material, _ in tasks
+    ]
+    def annotate(index: int, group: OptimizationGroup) -> Tuple[int, OptimizationGroup]:
+        if config.track_pieces:
+            _attribute_pieces(group, members[(group.section, group.material)])
+        return index, group
+
+    # ``use_cache=False`` bypasses the shared cache entirely; a project store
+    # still records every group so its next run can skip the unchanged ones.
+    record = cache is not None and (config.use_cache or isinstance(cache, ProjectGroupStore))
+    # Stock with limited availability counts for the whole run, so groups that
+    # share such a length are solved in turn against what the others left.
+    left = _shared_limits(config, tasks)
+    chained = [
+        index
+        for index, (section, material, _) in enumerate(tasks)
+        if any(_applies(config.stock_lengths[position], section, material) for position in left)
+    ]
+    keys: List[Optional[str]] = [None] * len(tasks)
+    pending: List[int] = []
+    for index, (section, material, pieces) in enumerate(tasks):
+        if index in chained:
+            continue
+        if record:
+            keys[index] = group_cache_key(section, material, pieces, config, offered[index])
+        if keys[index] is not None and config.use_cache:
+            group = cache.get(keys[index])
+            if group is not None:
+                yield annotate(index, group)
+                continue
+        pending.append(index)
+
+    def store(index: int, group: OptimizationGroup) -> Tuple[int, OptimizationGroup]:
+        if keys[index] is not None:
+            cache.put(keys[index], group)
+        return annotate(index, group)
+
+    workers = min(config.workers or SOLVER_WORKERS, len(pending))
+    if config.execution != "process" or workers < 2:
+        for index in pending:
+            yield store(index, _solve_group(*tasks[index], config, offered[index]))
+    else:
+        pool = _process_pool()
+        queue = iter(pending)
+        running: Dict[Future, int] = {}
+        try:
+            while True:
+                for index in queue:
+                    running[pool.submit(_solve_group, *tasks[index], config, offered[index])] = index
+                    if len(running) >= workers:
+                        break
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield store(running.pop(future), future.result())
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+        finally:
+            for future in running:
+                future.cancel()
+
+    for index in chained:
+        section, material, pieces = tasks[index]
+        group_config = _with_availability(config, left)
+        group = None
+        if record:
+            keys[index] = group_cache_key(section, material, pieces, group_config, offered[index])
+            if config.use_cache:
+                group = cache.get(keys[index])
+        if group is None:
+            _, group = store(index, _solve_group(section, material, pieces, group_config, offered[index]))
+        else:
+            annotate(index, group)
+        _consume_stock(config, left, group)
+        yield index, group
 
 
 def solve_cutting_stock(
     components: Iterable[OptimizationComponent],
     config: OptimizationConfig,
+    cache: Optional[OptimizationCache] = None,
+    remnants: Optional[Dict[Tuple[str, str], List[Tuple[int, float]]]] = None,
 ) -> List[OptimizationGroup]:
-    """Route to either heuristic or an optional CP-SAT solver."""
-    if config.solver != "ortools" or pywraplp is None:
-        return best_fit_decreasing(components, config)
+    """Route to either the heuristic or the column generation solver.
 
-    # Placeholder exact optimisation using heuristic fallback if OR-Tools not configured.
-    # A full CP-SAT model can be implemented in the future.
-    return best_fit_decreasing(components, config)
+    ``solver="ortools"`` uses OR-Tools for the master problems when it is
+    installed and a pure-Python simplex otherwise, so results are available on
+    every deployment. ``pattern_mode`` works on ``(length, count)`` pairs and
+    returns repeated patterns instead of one row per bar. With
+    ``execution="process"`` the groups are solved in a worker process pool;
+    results keep the input group order either way. When a ``cache`` is given,
+    groups whose inputs were solved before are served from it. Groups with
+    matching ``stock_lengths`` are cut from the cheapest mix of those lengths.
+    With ``use_remnants``, the ``(remnant id, length)`` pairs given per
+    ``(section, material)`` are filled before any new stock is opened.
+    """
+    results: Dict[int, OptimizationGroup] = dict(iter_cutting_stock(components, config, cache, remnants))
+    return [results[index] for index in range(len(results))]
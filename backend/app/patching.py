@@ -0,0 +1,192 @@
+"""JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) for project payloads."""
+from __future__ import annotations
+
+import copy
+from typing import Any, Dict, List, Tuple
+
+JSON_PATCH = "application/json-patch+json"
+MERGE_PATCH = "application/merge-patch+json"
+
+
+class PatchError(ValueError):
+    """The patch document is malformed or points somewhere that does not exist."""
+
+
+class PatchTestFailed(PatchError):
+    """A ``test`` operation did not match the current document."""
+
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: List[Any], token: str, pointer: str, allow_end: bool = False) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise PatchError(f"Invalid array index in {pointer!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range in {pointer!r}")
+    return index
+
+
+def _parent(document: Any, pointer: str) -> Tuple[Any, str]:
+    """The container holding ``pointer``'s target, and the last token."""
+    tokens = _parse_pointer(pointer)
+    if not tokens:
+        raise PatchError("Operations on the whole payload are not supported")
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, dict):
+            if token not in target:
+                raise PatchError(f"Path {pointer!r} does not exist")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token, pointer)]
+        else:
+            raise PatchError(f"Path {pointer!r} does not exist")
+    return target, tokens[-1]
+
+
+def _get(document: Any, pointer: str) -> Any:
+    parent, token = _parent(document, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f"Path {pointer!r} does not exist")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_index(parent, token, pointer)]
+    raise PatchError(f"Path {pointer!r} does not exist")
+
+
+def _add(document: Any, pointer: str, value: Any) -> None:
+    parent, token = _parent(document, pointer)
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, token, pointer, allow_end=True), value)
+    else:
+        raise PatchError(f"Path {pointer!r} does not exist")
+
+
+def _remove(document: Any, pointer: str) -> Any:
+    parent, token = _parent(document, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f"Path {pointer!r} does not exist")
+        return parent.pop(token)
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, token, pointer))
+    raise PatchError(f"Path {pointer!r} does not exist")
+
+
+def apply_json_patch(document: Dict[str, Any], operations: List[Dict[str, Any]]) -> None:
+    """Apply RFC 6902 ``operations`` to ``document`` in place.
+
+    Values that are not replaced keep their identity, which lets the caller
+    tell untouched list entries from new ones. Callers roll back on error.
+    """
+    for operation in operations:
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise PatchError("Every operation needs 'op' and 'path'")
+        op, path = operation["op"], operation["path"]
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise PatchError(f"'{op}' needs a 'value'")
+        if op in ("move", "copy") and "from" not in operation:
+            raise PatchError(f"'{op}' needs a 'from'")
+
+        if op == "add":
+            _add(document, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _get(document, path)
+            parent, token = _parent(document, path)
+            if isinstance(parent, list):
+                parent[_index(parent, token, path)] = copy.deepcopy(operation["value"])
+            else:
+                parent[token] = copy.deepcopy(operation["value"])
+        elif op == "move":
+            source = operation["from"]
+            if path.startswith(source + "/"):
+                raise PatchError(f"Cannot move {source!r} into itself")
+            _add(document, path, _remove(document, source))
+        elif op == "copy":
+            _add(document, path, copy.deepcopy(_get(document, operation["from"])))
+        elif op == "test":
+            if _get(document, path) != operation["value"]:
+                raise PatchTestFailed(f"Test failed at {path!r}")
+        else:
+            raise PatchError(f"Unknown operation {op!r}")
+
+
+def apply_merge_patch(target: Any, patch: Any) -> Any:
+    """RFC 7396 merge: objects merge key by key, ``null`` deletes, anything else replaces."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
+
+
+def _pointer(path: str, token: Any) -> str:
+    return f"{path}/{str(token).replace('~', '~0').replace('/', '~1')}"
+
+
+def _same(before: Any, after: Any) -> bool:
+    """JSON equality; unlike ``==`` it tells ``1`` from ``1.0`` and ``true``."""
+    if type(before) is not type(after):
+        return False
+    if isinstance(before, dict):
+        return before.keys() == after.keys() and all(_same(before[key], after[key]) for key in before)
+    if isinstance(before, list):
+        return len(before) == len(after) and all(_same(a, b) for a, b in zip(before, after))
+    return before == after
+
+
+def diff_json(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+    """RFC 6902 operations that turn ``before`` into ``after``, for ``apply_json_patch``.
+
+    Objects are compared key by key. Lists are trimmed of their common head
+    and tail first, so inserting or deleting one component costs one
+    operation instead of rewriting every entry after it.
+    """
+    if isinstance(before, dict) and isinstance(after, dict):
+        operations = [{"op": "remove", "path": _pointer(path, key)} for key in before if key not in after]
+        for key, value in after.items():
+            if key not in before:
+                operations.append({"op": "add", "path": _pointer(path, key), "value": value})
+            else:
+                operations.extend(diff_json(before[key], value, _pointer(path, key)))
+        return operations
+    if isinstance(before, list) and isinstance(after, list):
+        head = 0
+        while head < min(len(before), len(after)) and _same(before[head], after[head]):
+            head += 1
+        tail = 0
+        while tail < min(len(before), len(after)) - head and _same(before[-1 - tail], after[-1 - tail]):
+            tail += 1
+        old, new = before[head:len(before) - tail], after[head:len(after) - tail]
+        operations = []
+        for offset, (a, b) in enumerate(zip(old, new)):
+            operations.extend(diff_json(a, b, _pointer(path, head + offset)))
+        common = head + min(len(old), len(new))
+        operations.extend({"op": "remove", "path": _pointer(path, common)} for _ in range(len(old) - len(new)))
+        operations.extend(
+            {"op": "add", "path": _pointer(path, common + offset), "value": value}
+            for offset, value in enumerate(new[len(old):])
+        )
+        return operations
+    if _same(before, after):
+        return []
+    return [{"op": "replace", "path": path, "value": after}]
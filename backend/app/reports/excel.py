@@ -78,6 +78,15 @@ def build_workbook(report: ReportRequest, output_path: str) -> Path:
                 pre_sheet.cell(row=row, column=5, value=bar.waste)
                 pre_sheet.cell(row=row, column=6, value=bar.utilization * 100)
                 row += 1
+            if group.patterns_unexpanded():
+                for pattern in group.patterns:
+                    pre_sheet.cell(row=row, column=1, value=f"{pattern.patternId} ×{pattern.count}")
+                    pre_sheet.cell(row=row, column=2, value=group.section)
+                    pre_sheet.cell(row=row, column=3, value=group.material)
+                    pre_sheet.cell(row=row, column=4, value=", ".join(str(cut) for cut in pattern.cuts))
+                    pre_sheet.cell(row=row, column=5, value=pattern.waste)
+                    pre_sheet.cell(row=row, column=6, value=pattern.utilization * 100)
+                    row += 1
 
     output = Path(output_path)
     output.parent.mkdir(parents=True, exist_ok=True)
@@ -12,10 +12,17 @@ from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import (SimpleDocTemplate, Spacer, Paragraph, Table,
                                 TableStyle, Image)
 
+from ..database import BLOB_URL_PREFIX, get_connection, load_blob
 from ..models import OptimizationResponse, ProjectRead, ReportRequest
 
 
 def _decode_image(data_url: str) -> BytesIO:
+    if data_url.startswith(BLOB_URL_PREFIX):
+        with get_connection() as conn:
+            blob = load_blob(conn, data_url[len(BLOB_URL_PREFIX):])
+        if blob is None:
+            raise ValueError(f"Unknown drawing {data_url}")
+        return BytesIO(blob[1])
     header, encoded = data_url.split(",", 1)
     return BytesIO(base64.b64decode(encoded))
 
@@ -70,6 +77,18 @@ def _optimization_table(optimization: OptimizationResponse) -> Table:
                     f"{bar.utilization * 100:.1f}",
                 ]
             )
+        if group.patterns_unexpanded():
+            for pattern in group.patterns:
+                rows.append(
+                    [
+                        f"{pattern.patternId} ×{pattern.count}",
+                        group.section,
+                        group.material,
+                        ", ".join(f"{cut:.0f}" for cut in pattern.cuts),
+                        f"{pattern.waste:.0f}",
+                        f"{pattern.utilization * 100:.1f}",
+                    ]
+                )
     table = Table(rows, repeatRows=1)
     table.setStyle(
         TableStyle(
@@ -0,0 +1,23 @@
+"""Content-addressed drawings referenced by project components."""
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from ..database import get_connection, load_blob
+
+router = APIRouter(prefix="/api/blobs", tags=["blobs"])
+
+
+@router.get("/{digest}")
+def get_blob(digest: str) -> Response:
+    """Raw drawing bytes; the hash is the content, so clients may cache them forever."""
+    with get_connection() as conn:
+        blob = load_blob(conn, digest)
+    if blob is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blob not found")
+    media_type, data = blob
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{digest}"'},
+    )
@@ -0,0 +1,81 @@
+"""Aggregates over the normalized component table."""
+from __future__ import annotations
+
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..database import get_connection
+from ..models import ComponentTotal
+
+router = APIRouter(prefix="/api/components", tags=["components"])
+
+# group_by value -> (SQL expression, ComponentTotal field)
+_GROUPINGS = {
+    "section": ("c.section", "section"),
+    "material": ("c.material", "material"),
+    "date": ("p.scheduled_for", "scheduled_for"),
+    "project": ("c.project_id", "project_id"),
+}
+
+
+@router.get("/totals", response_model=List[ComponentTotal])
+def component_totals(
+    group_by: List[str] = Query(default=["section", "material"]),
+    scheduled_from: Optional[date] = None,
+    scheduled_to: Optional[date] = None,
+    section: Optional[str] = None,
+    material: Optional[str] = None,
+) -> List[ComponentTotal]:
+    """Piece counts and run length summed in SQL, e.g. metres of 57x57 scheduled next week."""
+    unknown = [name for name in group_by if name not in _GROUPINGS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot group by {', '.join(unknown)}; use {', '.join(_GROUPINGS)}",
+        )
+    columns = [_GROUPINGS[name] for name in dict.fromkeys(group_by)]
+
+    clauses: List[str] = []
+    params: List[object] = []
+    for expression, value in (
+        ("p.scheduled_for >= ?", scheduled_from.isoformat() if scheduled_from else None),
+        ("p.scheduled_for <= ?", scheduled_to.isoformat() if scheduled_to else None),
+        ("c.section = ?", section),
+        ("c.material = ?", material),
+    ):
+        if value is not None:
+            clauses.append(expression)
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    selected = "".join(f"{expression} AS {field}, " for expression, field in columns)
+    grouped = f"GROUP BY {', '.join(expression for expression, _ in columns)}" if columns else ""
+    ordered = f"ORDER BY {', '.join(expression for expression, _ in columns)}" if columns else ""
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {selected}SUM(c.quantity) AS pieces, SUM(c.length * c.quantity) AS total_length
+            FROM project_components AS c
+            JOIN projects AS p ON p.project_id = c.project_id
+            {where}
+            {grouped}
+            {ordered}
+            """,
+            params,
+        ).fetchall()
+    totals = []
+    for row in rows:
+        data = dict(row)
+        total_length = data.pop("total_length") or 0.0
+        pieces = data.pop("pieces") or 0
+        totals.append(
+            ComponentTotal(
+                **data,
+                pieces=pieces,
+                total_length=round(total_length, 1),
+                metres=round(total_length / 1000, 3),
+            )
+        )
+    return totals
@@ -0,0 +1,48 @@
+"""Background job endpoints for long optimizations and exports."""
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from ..jobs import job_manager
+from ..models import ExcelReportRequest, JobStatus, OptimizationRequest, OptimizationResponse, ReportRequest
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("/optimize", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+def submit_optimization(request: OptimizationRequest) -> JobStatus:
+    return job_manager.submit("optimize", request.model_dump_json())
+
+
+@router.post("/pdf", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+def submit_pdf(request: ReportRequest) -> JobStatus:
+    return job_manager.submit("pdf", request.model_dump_json())
+
+
+@router.post("/excel", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+def submit_excel(request: ExcelReportRequest) -> JobStatus:
+    return job_manager.submit("excel", request.model_dump_json())
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+def get_job(job_id: str) -> JobStatus:
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}/result")
+def get_job_result(job_id: str):
+    """The optimization response, or the exported file, once the job is done."""
+    job = get_job(job_id)
+    if job.status == "failed":
+        # The request could not be processed; 409 stays reserved for jobs that are not finished yet.
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=job.error)
+    result = job_manager.result(job_id)
+    if result is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is {job.status}")
+    if job.kind == "optimize":
+        return OptimizationResponse.model_validate(result)
+    return FileResponse(result["path"], filename=result["filename"], media_type=result["media_type"])
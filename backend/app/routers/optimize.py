@@ -1,10 +1,25 @@
 """Optimization endpoints."""
 from __future__ import annotations
 
+import json
+import sqlite3
+from datetime import date
+from typing import Any, Dict, Iterator, List, Tuple
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
-from ..models import OptimizationRequest, OptimizationResponse
-from ..optimizer.solver import solve_cutting_stock
+from ..database import get_connection
+from ..models import (
+    OptimizationComponent,
+    OptimizationRequest,
+    OptimizationResponse,
+    ScheduleOptimizationRequest,
+    ScheduleOptimizationResponse,
+)
+from ..optimizer.cache import optimization_cache
+from ..optimizer.solver import iter_cutting_stock, solve_cutting_stock
+from .remnants import remnants_for
 
 router = APIRouter(prefix="/api", tags=["optimizer"])
 
@@ -13,7 +28,101 @@ router = APIRouter(prefix="/api", tags=["optimizer"])
 def run_optimization(request: OptimizationRequest) -> OptimizationResponse:
     """Execute the requested optimization strategy."""
     try:
-        groups = solve_cutting_stock(request.components, request.configuration)
+        groups = solve_cutting_stock(
+            request.components, request.configuration, cache=optimization_cache, remnants=remnants_for(request)
+        )
     except ValueError as exc:  # validation issues from heuristic
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     return OptimizationResponse(groups=groups, configuration=request.configuration)
+
+
+def _scheduled_components(
+    conn: sqlite3.Connection,
+    date_from: date,
+    date_to: date,
+) -> Tuple[List[str], List[OptimizationComponent]]:
+    """Components of every project scheduled in the range, read straight from ``project_components``."""
+    rows = conn.execute(
+        """
+        SELECT p.project_id, c.component_id, c.section, c.material, c.length, c.quantity
+        FROM projects AS p
+        JOIN project_components AS c ON c.project_id = p.project_id
+        WHERE p.scheduled_for BETWEEN ? AND ?
+        ORDER BY p.scheduled_for, p.project_id, c.position
+        """,
+        (date_from.isoformat(), date_to.isoformat()),
+    ).fetchall()
+    project_ids: Dict[str, None] = {}
+    components: List[OptimizationComponent] = []
+    for row in rows:
+        project_ids[row["project_id"]] = None
+        components.append(
+            OptimizationComponent(
+                id=str(row["component_id"]),
+                section=row["section"],
+                material=row["material"],
+                length=row["length"],
+                quantity=row["quantity"] or 1,
+                metadata={"project_id": row["project_id"]},
+            )
+        )
+    return list(project_ids), components
+
+
+@router.post("/optimize/schedule", response_model=ScheduleOptimizationResponse)
+def run_schedule_optimization(request: ScheduleOptimizationRequest) -> ScheduleOptimizationResponse:
+    """Nest all projects of a production-day range into one run per section and material."""
+    if request.date_from > request.date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    with get_connection() as conn:
+        project_ids, components = _scheduled_components(conn, request.date_from, request.date_to)
+    configuration = request.configuration.model_copy(update={"track_pieces": True})
+    nested = OptimizationRequest(components=components, configuration=configuration)
+    try:
+        groups = solve_cutting_stock(
+            components, configuration, cache=optimization_cache, remnants=remnants_for(nested)
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return ScheduleOptimizationResponse(projects=project_ids, groups=groups, configuration=configuration)
+
+
+@router.post("/optimize/stream")
+def stream_optimization(request: OptimizationRequest) -> StreamingResponse:
+    """NDJSON variant of ``/optimize`` that sends each group as soon as it is solved."""
+    remnants = remnants_for(request)
+
+    def records() -> Iterator[str]:
+        total_groups = 0
+        total_bars = 0
+        try:
+            for index, group in iter_cutting_stock(
+                request.components, request.configuration, cache=optimization_cache, remnants=remnants
+            ):
+                total_groups += 1
+                total_bars += group.summary.get("totalBars", 0)
+                yield json.dumps({"type": "group", "index": index, "group": group.model_dump(mode="json")}) + "\n"
+        except ValueError as exc:
+            yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+            return
+        summary = {
+            "type": "summary",
+            "groups": total_groups,
+            "totalBars": total_bars,
+            "configuration": request.configuration.model_dump(mode="json"),
+        }
+        yield json.dumps(summary) + "\n"
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
+
+@router.get("/optimize/cache")
+def cache_stats() -> Dict[str, Any]:
+    """Hit and miss counters of the per-group result cache."""
+    return optimization_cache.stats()
+
+
+@router.delete("/optimize/cache")
+def clear_cache() -> Dict[str, Any]:
+    optimization_cache.clear()
+    return optimization_cache.stats()
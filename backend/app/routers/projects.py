@@ -1,21 +1,82 @@
 """Project management endpoints."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import List
+import base64
+import copy
+import hashlib
+import json
+import re
+from datetime import date, datetime
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from ..database import get_connection, row_to_dict, serialize_metadata, serialize_payload
-from ..models import ProjectCreate, ProjectPayload, ProjectRead, ProjectUpdate
+from ..database import (
+    COMPONENT_COLUMNS,
+    add_components,
+    delete_revisions,
+    drawing_hashes,
+    get_connection,
+    index_projects,
+    inline_component_drawings,
+    load_components,
+    load_revision,
+    on_db_executor,
+    project_blobs,
+    purge_orphan_blobs,
+    record_revision,
+    refresh_summaries,
+    row_to_dict,
+    run_db,
+    save_components,
+    serialize_metadata,
+    serialize_payload,
+    split_components,
+    sync_components,
+    unindex_projects,
+)
+from ..models import (
+    GroupRef,
+    ImportRowError,
+    OptimizationComponent,
+    OptimizationConfig,
+    OptimizationRequest,
+    ProjectCreate,
+    ProjectImportResult,
+    ProjectOptimizationResponse,
+    ProjectPayload,
+    ProjectRead,
+    ProjectRevision,
+    ProjectRevisionDiff,
+    ProjectSearchHit,
+    ProjectSummary,
+    ProjectSummaryPage,
+    ProjectUpdate,
+    SectionTotal,
+)
+from ..optimizer.cache import ProjectGroupStore
+from ..patching import (
+    JSON_PATCH,
+    MERGE_PATCH,
+    PatchError,
+    PatchTestFailed,
+    apply_json_patch,
+    apply_merge_patch,
+    diff_json,
+)
+from ..optimizer.solver import solve_cutting_stock
+from .remnants import remnants_for
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
 
-def _row_to_schema(row) -> ProjectRead:
+def _row_to_schema(row, components: List[Dict[str, Any]]) -> ProjectRead:
     data = row_to_dict(row)
-    payload = ProjectPayload.model_validate(data["payload"])
+    payload = ProjectPayload.model_validate({**data["payload"], "components": components})
     created_at = datetime.fromisoformat(data["created_at"])
     updated_at = datetime.fromisoformat(data["updated_at"])
     scheduled = datetime.fromisoformat(data["scheduled_for"]).date() if data.get("scheduled_for") else None
@@ -29,70 +90,484 @@ def _row_to_schema(row) -> ProjectRead:
         scheduled_for=scheduled,
         metadata=data.get("metadata_blob", {}),
         payload=payload,
+        version=data["version"],
         created_at=created_at,
         updated_at=updated_at,
     )
 
 
+def _project_etag(row_id: int, version: int, inline_drawings: bool = False) -> str:
+    """``"<row id>-<version>"``; the row id is never reused, so a re-created project gets new tags."""
+    tag = f"{row_id}-{version}"
+    return f'"{tag}-inline"' if inline_drawings else f'"{tag}"'
+
+
+def _if_match(header: Optional[str], row_id: int, version: int) -> None:
+    """Reject a stale ``If-Match``; either representation's tag of the current row matches."""
+    if header is not None and not _etag_matches(
+        header, _project_etag(row_id, version), _project_etag(row_id, version, True)
+    ):
+        raise _precondition_failed(row_id, version)
+
+
+def _etag_matches(header: str, *etags: str) -> bool:
+    """``If-Match``/``If-None-Match`` check; weak and strong tags compare equal."""
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or any(etag in tags for etag in etags)
+
+
+def _precondition_failed(row_id: int, version: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Project was changed by someone else; reload it and try again",
+        headers={"ETag": _project_etag(row_id, version)},
+    )
+
+
+def _not_modified(etag: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def _set_etag(response: Optional[Response], etag: str) -> None:
+    # ``response`` is injected by FastAPI; direct callers may leave it out.
+    if response is not None:
+        response.headers["ETag"] = etag
+
+
 @router.get("", response_model=List[ProjectRead])
-def list_projects() -> List[ProjectRead]:
+@on_db_executor
+def list_projects(
+    inline_drawings: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    response: Response = None,
+) -> List[ProjectRead]:
+    """All projects; the ETag covers every id and version, so an unchanged list answers 304."""
     with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, project_id, version FROM projects ORDER BY datetime(created_at) DESC"
+        ).fetchall()
+        digest = hashlib.sha256(
+            "\n".join(f"{row['id']}:{row['project_id']}:{row['version']}" for row in rows).encode()
+        ).hexdigest()[:32]
+        etag = f'"{digest}-inline"' if inline_drawings else f'"{digest}"'
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            raise _not_modified(etag)
         rows = conn.execute("SELECT * FROM projects ORDER BY datetime(created_at) DESC").fetchall()
-        return [_row_to_schema(row) for row in rows]
+        components = load_components(conn, [row["project_id"] for row in rows], inline_drawings)
+        _set_etag(response, etag)
+        return [_row_to_schema(row, components[row["project_id"]]) for row in rows]
+
+
+_SUMMARY_COLUMNS = (
+    "id, project_id, name, client, project_type, material, section_sizes, scheduled_for, version, "
+    "component_count, piece_count, total_metres, pane_count, created_at, updated_at"
+)
+# Columns ``GET /summary`` can sort by; each has a ``(column, id)`` index for keyset paging.
+_SUMMARY_SORTS = ("created_at", "component_count", "piece_count", "total_metres", "pane_count")
+
+
+def _summary(row, sections: Optional[List[SectionTotal]] = None) -> ProjectSummary:
+    return ProjectSummary(
+        project_id=row["project_id"],
+        name=row["name"],
+        client=row["client"],
+        project_type=row["project_type"],
+        material=row["material"],
+        section_sizes=row["section_sizes"],
+        scheduled_for=date.fromisoformat(row["scheduled_for"]) if row["scheduled_for"] else None,
+        version=row["version"],
+        component_count=row["component_count"] or 0,
+        piece_count=row["piece_count"] or 0,
+        total_metres=row["total_metres"] or 0.0,
+        pane_count=row["pane_count"] or 0,
+        sections=sections or [],
+        created_at=datetime.fromisoformat(row["created_at"]),
+        updated_at=datetime.fromisoformat(row["updated_at"]),
+    )
+
+
+def _section_totals(conn, project_ids: List[str]) -> Dict[str, List[SectionTotal]]:
+    """Stored per-section totals for one page of projects, in one query."""
+    totals: Dict[str, List[SectionTotal]] = {project_id: [] for project_id in project_ids}
+    if project_ids:
+        rows = conn.execute(
+            "SELECT * FROM project_section_totals "
+            f"WHERE project_id IN ({','.join('?' for _ in project_ids)}) ORDER BY project_id, metres DESC",
+            project_ids,
+        )
+        for row in rows:
+            totals[row["project_id"]].append(
+                SectionTotal(section=row["section"], material=row["material"], pieces=row["pieces"], metres=row["metres"])
+            )
+    return totals
+
+
+def _encode_cursor(value: Any, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(value, (str, int, float)):
+            raise TypeError("cursor value must be a scalar")
+        return value, int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+@router.get("/summary", response_model=ProjectSummaryPage)
+@on_db_executor
+def list_project_summaries(
+    client: Optional[str] = None,
+    project_type: Optional[str] = Query(default=None, alias="type"),
+    scheduled_from: Optional[date] = None,
+    scheduled_to: Optional[date] = None,
+    section: Optional[str] = None,
+    min_metres: Optional[float] = None,
+    max_metres: Optional[float] = None,
+    min_panes: Optional[int] = None,
+    max_panes: Optional[int] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = None,
+) -> ProjectSummaryPage:
+    """Project list without payloads, newest first unless ``sort``/``order`` say otherwise.
+
+    Counts, metres and panes are stored columns, so filtering and sorting by
+    them reads no payloads. Pages follow a ``(sort column, id)`` keyset cursor.
+    """
+    if sort not in _SUMMARY_SORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot sort by {sort}; use {', '.join(_SUMMARY_SORTS)}",
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="order must be asc or desc")
+
+    clauses: List[str] = []
+    params: List[object] = []
+    for expression, value in (
+        ("client = ?", client),
+        ("project_type = ?", project_type),
+        ("scheduled_for >= ?", scheduled_from.isoformat() if scheduled_from else None),
+        ("scheduled_for <= ?", scheduled_to.isoformat() if scheduled_to else None),
+        (
+            "EXISTS (SELECT 1 FROM project_section_totals AS t "
+            "WHERE t.project_id = projects.project_id AND t.section = ?)",
+            section,
+        ),
+        ("total_metres >= ?", min_metres),
+        ("total_metres <= ?", max_metres),
+        ("pane_count >= ?", min_panes),
+        ("pane_count <= ?", max_panes),
+    ):
+        if value is not None:
+            clauses.append(expression)
+            params.append(value)
+    if cursor is not None:
+        value, row_id = _decode_cursor(cursor)
+        # A row-value comparison lets SQLite seek the (column, id) index to the cursor.
+        clauses.append(f"({sort}, id) {'<' if order == 'desc' else '>'} (?, ?)")
+        params.extend([value, row_id])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM projects {where} ORDER BY {sort} {order}, id {order} LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        sections = _section_totals(conn, [row["project_id"] for row in rows[:limit]])
+    items = [_summary(row, sections[row["project_id"]]) for row in rows[:limit]]
+    next_cursor = _encode_cursor(rows[limit - 1][sort], rows[limit - 1]["id"]) if len(rows) > limit else None
+    return ProjectSummaryPage(items=items, next_cursor=next_cursor)
+
+
+_SEARCH_COLUMNS = ("name", "client", "metadata", "components")
+# bm25 weight per column: a hit in the name counts most, one in a component id least.
+_SEARCH_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+
+def _search_query(text: str) -> str:
+    """Every word of ``text`` as a quoted prefix term, so user input is never parsed as FTS syntax."""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+@router.get("/search", response_model=List[ProjectSearchHit])
+@on_db_executor
+def search_projects(q: str, limit: int = Query(default=20, ge=1, le=100)) -> List[ProjectSearchHit]:
+    """Ranked full-text search over names, clients, metadata values and component ids/types.
+
+    Every word must match, as a prefix. ``highlights`` holds the matching
+    columns with hits wrapped in ``<mark>``.
+    """
+    query = _search_query(q)
+    if not query:
+        return []
+    marks = ", ".join(
+        f"snippet(project_search, {index}, '<mark>', '</mark>', '…', 12) AS hl_{column}"
+        for index, column in enumerate(_SEARCH_COLUMNS)
+    )
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {', '.join(f'p.{column}' for column in _SUMMARY_COLUMNS.split(', '))},
+                   bm25(project_search, {', '.join(map(str, _SEARCH_WEIGHTS))}) AS rank,
+                   {marks}
+            FROM project_search
+            JOIN projects AS p ON p.id = project_search.rowid
+            WHERE project_search MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (query, limit),
+        ).fetchall()
+        sections = _section_totals(conn, [row["project_id"] for row in rows])
+    return [
+        ProjectSearchHit(
+            **_summary(row, sections[row["project_id"]]).model_dump(),
+            rank=row["rank"],
+            highlights={
+                column: row[f"hl_{column}"]
+                for column in _SEARCH_COLUMNS
+                if row[f"hl_{column}"] and "<mark>" in row[f"hl_{column}"]
+            },
+        )
+        for row in rows
+    ]
+
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_PAGE_SIZE = 500
+# The error list in an import response is capped; ``failed`` still counts every rejected line.
+MAX_REPORTED_ERRORS = 1000
+
+
+def _import_batch(lines: List[Tuple[int, bytes]]) -> Tuple[int, List[ImportRowError]]:
+    """Validate and insert one batch of NDJSON lines in a single transaction.
+
+    Lines that fail validation or reuse an existing ``project_id`` are
+    reported and skipped; the rest go in with one ``executemany`` per table.
+    """
+    errors: List[ImportRowError] = []
+    projects: List[Tuple[int, str, ProjectCreate]] = []
+    for line, raw in lines:
+        try:
+            project = ProjectCreate.model_validate_json(raw)
+        except ValidationError as exc:
+            errors.append(ImportRowError(line=line, detail=exc.errors(include_url=False, include_context=False)))
+            continue
+        projects.append((line, project.project_id or str(uuid4()), project))
+
+    with get_connection() as conn:
+        ids = [project_id for _, project_id, _ in projects]
+        existing = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            existing.update(
+                row["project_id"]
+                for row in conn.execute(
+                    f"SELECT project_id FROM projects WHERE project_id IN ({','.join('?' for _ in chunk)})", chunk
+                )
+            )
+        rows = []
+        components: Dict[str, List[Dict[str, Any]]] = {}
+        for line, project_id, project in projects:
+            if project_id in existing or project_id in components:
+                errors.append(ImportRowError(line=line, project_id=project_id, detail="Project already exists"))
+                continue
+            row, components[project_id] = _project_row(project_id, project)
+            rows.append(row)
+        conn.executemany(_INSERT_PROJECT, rows)
+        add_components(conn, components)
+        index_projects(conn, list(components))
+        refresh_summaries(conn, list(components))
+    return len(rows), errors
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+@router.post("/import", response_model=ProjectImportResult)
+async def import_projects(request: Request) -> ProjectImportResult:
+    """Create projects from an NDJSON body, one ``ProjectCreate`` object per line.
+
+    The body is read as it streams in and inserted every ``IMPORT_BATCH_SIZE``
+    lines, so a failed line never rolls back the others.
+    """
+    imported = failed = 0
+    errors: List[ImportRowError] = []
+    batch: List[Tuple[int, bytes]] = []
+
+    async def flush() -> None:
+        nonlocal imported, failed
+        count, batch_errors = await run_db(_import_batch, batch[:])
+        batch.clear()
+        imported += count
+        failed += len(batch_errors)
+        errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+
+    line_number = 0
+    async for line in _ndjson_lines(request):
+        line_number += 1
+        if line.strip():
+            batch.append((line_number, line))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return ProjectImportResult(imported=imported, failed=failed, errors=errors)
+
+
+def _export_page(
+    cursor: Optional[Tuple[str, int]], inline_drawings: bool
+) -> Tuple[str, Optional[Tuple[str, int]]]:
+    """One keyset page as NDJSON, plus the cursor of the next page (``None`` after the last)."""
+    with get_connection() as conn:
+        if cursor is None:
+            rows = conn.execute(
+                "SELECT * FROM projects ORDER BY created_at, id LIMIT ?", (EXPORT_PAGE_SIZE,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM projects WHERE (created_at, id) > (?, ?) ORDER BY created_at, id LIMIT ?",
+                (*cursor, EXPORT_PAGE_SIZE),
+            ).fetchall()
+        components = load_components(conn, [row["project_id"] for row in rows], inline_drawings)
+    chunk = "".join(
+        _row_to_schema(row, components[row["project_id"]]).model_dump_json(by_alias=True) + "\n" for row in rows
+    )
+    next_cursor = (rows[-1]["created_at"], rows[-1]["id"]) if len(rows) == EXPORT_PAGE_SIZE else None
+    return chunk, next_cursor
+
+
+@router.get("/export")
+async def export_projects(inline_drawings: bool = True) -> StreamingResponse:
+    """Every project as NDJSON, oldest first, in the shape ``/import`` accepts.
+
+    Projects are read and serialized on the DB executor in keyset pages of
+    ``EXPORT_PAGE_SIZE``, so memory use does not grow with the number of
+    projects. Drawings are inlined by default so the file is self-contained.
+    """
+
+    async def pages() -> AsyncIterator[str]:
+        cursor: Optional[Tuple[str, int]] = None
+        while True:
+            chunk, cursor = await run_db(_export_page, cursor, inline_drawings)
+            if chunk:
+                yield chunk
+            if cursor is None:
+                return
+
+    return StreamingResponse(
+        pages(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="projects.ndjson"'},
+    )
 
 
 @router.get("/{project_id}", response_model=ProjectRead)
-def get_project(project_id: str) -> ProjectRead:
+@on_db_executor
+def get_project(
+    project_id: str,
+    inline_drawings: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    response: Response = None,
+) -> ProjectRead:
+    """A saved project; drawings are ``/api/blobs/<hash>`` links unless ``inline_drawings`` is set.
+
+    The ETag is the row id and version; a matching ``If-None-Match`` answers
+    304 without loading the payload.
+    """
     with get_connection() as conn:
-        row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
-        if not row:
+        current = conn.execute("SELECT id, version FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        if not current:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-        return _row_to_schema(row)
+        etag = _project_etag(current["id"], current["version"], inline_drawings)
+        if if_none_match is not None and _etag_matches(if_none_match, etag):
+            raise _not_modified(etag)
+        row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        project = _row_to_schema(row, load_components(conn, [project_id], inline_drawings)[project_id])
+    _set_etag(response, _project_etag(row["id"], project.version, inline_drawings))
+    return project
+
+
+_INSERT_PROJECT = """
+    INSERT INTO projects (
+        project_id, name, client, project_type, material, section_sizes,
+        scheduled_for, metadata_blob, payload
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _project_row(project_id: str, project: ProjectCreate) -> Tuple[Tuple, List[Dict[str, Any]]]:
+    """``projects`` row values for a new project, plus its components."""
+    payload, components = split_components(project.payload.model_dump(by_alias=True))
+    row = (
+        project_id,
+        project.name,
+        project.client,
+        project.project_type,
+        project.material,
+        project.section_sizes,
+        project.scheduled_for.isoformat() if project.scheduled_for else None,
+        serialize_metadata(project.metadata),
+        serialize_payload(payload),
+    )
+    return row, components
 
 
 @router.post("", response_model=ProjectRead, status_code=status.HTTP_201_CREATED)
-def create_project(project: ProjectCreate) -> ProjectRead:
+@on_db_executor
+def create_project(project: ProjectCreate, response: Response = None) -> ProjectRead:
     project_id = project.project_id or str(uuid4())
-    payload_json = serialize_payload(project.payload.model_dump(by_alias=True))
-    metadata_json = serialize_metadata(project.metadata)
-    scheduled_for = project.scheduled_for.isoformat() if project.scheduled_for else None
+    row, components = _project_row(project_id, project)
 
     with get_connection() as conn:
-        conn.execute(
-            """
-            INSERT INTO projects (
-                project_id, name, client, project_type, material, section_sizes,
-                scheduled_for, metadata_blob, payload
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                project_id,
-                project.name,
-                project.client,
-                project.project_type,
-                project.material,
-                project.section_sizes,
-                scheduled_for,
-                metadata_json,
-                payload_json,
-            ),
-        )
+        conn.execute(_INSERT_PROJECT, row)
+        save_components(conn, project_id, components)
+        index_projects(conn, [project_id])
+        refresh_summaries(conn, [project_id])
         row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
-        return _row_to_schema(row)
+        created = _row_to_schema(row, load_components(conn, [project_id])[project_id])
+    _set_etag(response, _project_etag(row["id"], created.version))
+    return created
 
 
 @router.put("/{project_id}", response_model=ProjectRead)
-def update_project(project_id: str, update: ProjectUpdate) -> ProjectRead:
+@on_db_executor
+def update_project(
+    project_id: str,
+    update: ProjectUpdate,
+    if_match: Annotated[Optional[str], Header()] = None,
+    response: Response = None,
+) -> ProjectRead:
+    """Update a project; with ``If-Match`` a stale version fails with 412 instead of overwriting."""
     with get_connection() as conn:
         row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
         if not row:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
         data = row_to_dict(row)
-        payload = update.payload.model_dump(by_alias=True) if update.payload else data["payload"]
+        version = data["version"]
+        _if_match(if_match, row["id"], version)
+        previous = _row_to_schema(row, load_components(conn, [project_id])[project_id])
+        payload = data["payload"]
+        if update.payload:
+            payload, components = split_components(update.payload.model_dump(by_alias=True))
+            save_components(conn, project_id, components)
         metadata = update.metadata if update.metadata is not None else data.get("metadata_blob", {})
 
-        conn.execute(
+        result = conn.execute(
             """
             UPDATE projects SET
                 name = ?,
@@ -103,8 +578,9 @@ def update_project(project_id: str, update: ProjectUpdate) -> ProjectRead:
                 scheduled_for = ?,
                 metadata_blob = ?,
                 payload = ?,
+                version = version + 1,
                 updated_at = CURRENT_TIMESTAMP
-            WHERE project_id = ?
+            WHERE project_id = ? AND version = ?
             """,
             (
                 update.name or data["name"],
@@ -116,21 +592,126 @@ def update_project(project_id: str, update: ProjectUpdate) -> ProjectRead:
                 serialize_metadata(metadata),
                 serialize_payload(payload),
                 project_id,
+                version,
             ),
         )
+        if result.rowcount == 0:
+            # Another writer saved between our read and this update.
+            raise _precondition_failed(row["id"], version)
+        index_projects(conn, [project_id])
+        refresh_summaries(conn, [project_id])
         updated = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
-        return _row_to_schema(updated)
+        project = _row_to_schema(updated, load_components(conn, [project_id])[project_id])
+        record_revision(conn, project_id, _revision(previous), _revision(project))
+        if update.payload:
+            # After recording, so drawings the previous revision links to are kept.
+            purge_orphan_blobs(conn, drawing_hashes(component.drawing for component in previous.payload.components))
+    _set_etag(response, _project_etag(updated["id"], project.version))
+    return project
+
+
+@router.patch("/{project_id}", response_model=ProjectRead)
+@on_db_executor
+def patch_project(
+    project_id: str,
+    patch: Annotated[Union[List[Dict[str, Any]], Dict[str, Any]], Body()],
+    content_type: Annotated[Optional[str], Header()] = None,
+    if_match: Annotated[Optional[str], Header()] = None,
+    response: Response = None,
+) -> ProjectRead:
+    """Apply a JSON Patch or merge patch to the payload in one transaction.
+
+    Only the component rows the patch changes are written, and the rest of
+    the payload only when it changed, so a one-field edit stays a one-row write.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    merge = media_type == MERGE_PATCH or (media_type != JSON_PATCH and isinstance(patch, dict))
+    if merge != isinstance(patch, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="JSON Patch takes a list of operations, merge patch a single object",
+        )
+
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        version = row["version"]
+        _if_match(if_match, row["id"], version)
+
+        stored = row_to_dict(row)["payload"]
+        before = load_components(conn, [project_id])[project_id]
+        previous = _row_to_schema(row, before)
+        entries = [dict(component) for component in before]
+        origins = {id(entry): position for position, entry in enumerate(entries)}
+        document: Dict[str, Any] = {**copy.deepcopy(stored), "components": entries}
+        try:
+            if merge:
+                document = apply_merge_patch(document, patch)
+            else:
+                apply_json_patch(document, patch)
+        except PatchTestFailed as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+        except PatchError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        try:
+            patched = ProjectPayload.model_validate(document)
+        except ValidationError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=exc.errors(include_url=False, include_context=False),
+            ) from exc
+
+        after = [
+            (origins.get(id(entry)), component.model_dump())
+            for entry, component in zip(document["components"], patched.components)
+        ]
+        touched = sync_components(conn, project_id, before, after)
+        # The search index only holds component ids and types.
+        if touched and [(item["id"], item["type"]) for item in before] != [(item["id"], item["type"]) for _, item in after]:
+            index_projects(conn, [project_id])
+        rest, _ = split_components(patched.model_dump(by_alias=True))
+        result = conn.execute(
+            """
+            UPDATE projects SET
+                payload = COALESCE(?, payload),
+                version = version + 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE project_id = ? AND version = ?
+            """,
+            (serialize_payload(rest) if rest != stored else None, project_id, version),
+        )
+        if result.rowcount == 0:
+            raise _precondition_failed(row["id"], version)
+        if touched or rest.get("configuration") != stored.get("configuration"):
+            refresh_summaries(conn, [project_id])
+        updated = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        project = _row_to_schema(updated, load_components(conn, [project_id])[project_id])
+        record_revision(conn, project_id, _revision(previous), _revision(project))
+        if touched:
+            purge_orphan_blobs(conn, drawing_hashes(item["drawing"] for item in before))
+    _set_etag(response, _project_etag(updated["id"], project.version))
+    return project
 
 
 @router.delete("/{project_id}")
+@on_db_executor
 def delete_project(project_id: str) -> None:
     with get_connection() as conn:
+        unindex_projects(conn, [project_id])
+        released = project_blobs(conn, project_id)
         result = conn.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
         if result.rowcount == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        conn.execute("DELETE FROM project_components WHERE project_id = ?", (project_id,))
+        conn.execute("DELETE FROM project_optimizations WHERE project_id = ?", (project_id,))
+        conn.execute("DELETE FROM project_section_totals WHERE project_id = ?", (project_id,))
+        delete_revisions(conn, project_id)
+        purge_orphan_blobs(conn, released)
 
 
 @router.post("/{project_id}/duplicate", response_model=ProjectRead)
+@on_db_executor
 def duplicate_project(project_id: str) -> ProjectRead:
     with get_connection() as conn:
         row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
@@ -140,12 +721,7 @@ def duplicate_project(project_id: str) -> ProjectRead:
         data = row_to_dict(row)
         new_id = str(uuid4())
         conn.execute(
-            """
-            INSERT INTO projects (
-                project_id, name, client, project_type, material, section_sizes,
-                scheduled_for, metadata_blob, payload
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_PROJECT,
             (
                 new_id,
                 f"{data['name']} (Copy)",
@@ -158,5 +734,153 @@ def duplicate_project(project_id: str) -> ProjectRead:
                 serialize_payload(data.get("payload", {})),
             ),
         )
+        conn.execute(
+            f"""
+            INSERT INTO project_components (project_id, position, {COMPONENT_COLUMNS})
+            SELECT ?, position, {COMPONENT_COLUMNS} FROM project_components WHERE project_id = ?
+            """,
+            (new_id, project_id),
+        )
+        index_projects(conn, [new_id])
+        refresh_summaries(conn, [new_id])
         duplicate = conn.execute("SELECT * FROM projects WHERE project_id = ?", (new_id,)).fetchone()
-        return _row_to_schema(duplicate)
+        return _row_to_schema(duplicate, load_components(conn, [new_id])[new_id])
+
+
+# Fields of ProjectRead that describe the stored row rather than the project.
+_REVISION_EXCLUDE = {"project_id", "version", "created_at", "updated_at"}
+
+
+def _revision(project: ProjectRead) -> Tuple[int, str, Dict[str, Any]]:
+    """``(version, timestamp, document)`` as kept in the revision history."""
+    document = project.model_dump(mode="json", by_alias=True, exclude=_REVISION_EXCLUDE)
+    return project.version, project.updated_at.isoformat(sep=" "), document
+
+
+def _load_revision(conn, project_id: str, version: int, inline: bool = False) -> ProjectRead:
+    row = conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    if version == row["version"]:
+        return _row_to_schema(row, load_components(conn, [project_id], inline)[project_id])
+    revision = load_revision(conn, project_id, version)
+    if revision is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Revision {version} not found")
+    document, created_at = revision
+    if inline:
+        inline_component_drawings(conn, document["payload"]["components"])
+    return ProjectRead.model_validate(
+        {
+            **document,
+            "project_id": project_id,
+            "version": version,
+            "created_at": row["created_at"],
+            "updated_at": created_at,
+        }
+    )
+
+
+@router.get("/{project_id}/revisions", response_model=List[ProjectRevision])
+@on_db_executor
+def list_revisions(project_id: str) -> List[ProjectRevision]:
+    """Recorded versions, newest first. History starts with the version the first edit replaced."""
+    with get_connection() as conn:
+        if not conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone():
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        rows = conn.execute(
+            "SELECT version, snapshot, changes, size, created_at FROM project_revisions "
+            "WHERE project_id = ? ORDER BY version DESC",
+            (project_id,),
+        ).fetchall()
+    return [
+        ProjectRevision(
+            version=row["version"],
+            snapshot=bool(row["snapshot"]),
+            changes=row["changes"],
+            size=row["size"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+        )
+        for row in rows
+    ]
+
+
+@router.get("/{project_id}/revisions/diff", response_model=ProjectRevisionDiff)
+@on_db_executor
+def diff_revisions(
+    project_id: str,
+    from_version: int = Query(alias="from"),
+    to_version: int = Query(alias="to"),
+) -> ProjectRevisionDiff:
+    """JSON Patch operations that turn revision ``from`` into revision ``to``."""
+    with get_connection() as conn:
+        documents = [
+            _revision(_load_revision(conn, project_id, version))[2] for version in (from_version, to_version)
+        ]
+    return ProjectRevisionDiff(
+        from_version=from_version, to_version=to_version, operations=diff_json(*documents)
+    )
+
+
+@router.get("/{project_id}/revisions/{version}", response_model=ProjectRead)
+@on_db_executor
+def get_revision(project_id: str, version: int, inline_drawings: bool = False) -> ProjectRead:
+    """The project as it was at ``version``, rebuilt from the nearest snapshot and the deltas after it.
+
+    Drawings are ``/api/blobs/<hash>`` links unless ``inline_drawings`` is set, as for the project itself.
+    """
+    with get_connection() as conn:
+        return _load_revision(conn, project_id, version, inline_drawings)
+
+
+def _optimization_inputs(
+    project_id: str, configuration: OptimizationConfig
+) -> Tuple[List[OptimizationComponent], ProjectGroupStore, Dict[Tuple[str, str], List[Tuple[int, float]]]]:
+    with get_connection() as conn:
+        row = conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        if not row:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+        components = [
+            OptimizationComponent(
+                id=component["id"],
+                section=component["section"],
+                material=component["material"],
+                length=component["length"],
+                quantity=component["quantity"],
+                metadata=component["metadata"],
+            )
+            for component in load_components(conn, [project_id])[project_id]
+        ]
+        request = OptimizationRequest(components=components, configuration=configuration)
+        return components, ProjectGroupStore(project_id, conn), remnants_for(request)
+
+
+def _save_optimization(project_id: str, store: ProjectGroupStore) -> None:
+    with get_connection() as conn:
+        # The project may have been deleted while it was being solved.
+        if conn.execute("SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone():
+            store.save(conn)
+
+
+@router.post("/{project_id}/optimize", response_model=ProjectOptimizationResponse)
+async def optimize_project(
+    project_id: str, configuration: Optional[OptimizationConfig] = None
+) -> ProjectOptimizationResponse:
+    """Optimize a saved project, re-solving only the section groups that changed since its last run.
+
+    Loading and saving go through the DB executor; the solve itself runs in
+    the general threadpool so it never holds a database worker.
+    """
+    configuration = configuration or OptimizationConfig()
+    components, store, remnants = await run_db(_optimization_inputs, project_id, configuration)
+    try:
+        groups = await run_in_threadpool(
+            solve_cutting_stock, components, configuration, cache=store, remnants=remnants
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    await run_db(_save_optimization, project_id, store)
+    return ProjectOptimizationResponse(
+        groups=groups,
+        configuration=configuration,
+        recomputed=[GroupRef(section=section, material=material) for section, material in store.recomputed],
+    )
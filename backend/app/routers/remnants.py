@@ -0,0 +1,143 @@
+"""Offcut inventory endpoints."""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..database import get_connection
+from ..models import OptimizationRequest, Remnant, RemnantCommit, RemnantCommitResult, RemnantCreate
+
+router = APIRouter(prefix="/api/remnants", tags=["remnants"])
+
+
+def _row_to_schema(row) -> Remnant:
+    data = dict(row)
+    return Remnant(
+        id=data["id"],
+        section=data["section"],
+        material=data["material"],
+        length=data["length"],
+        source=data.get("source"),
+        status=data["status"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+        reserved_at=datetime.fromisoformat(data["reserved_at"]) if data.get("reserved_at") else None,
+    )
+
+
+def available_remnants(
+    conn: sqlite3.Connection,
+    groups: List[Tuple[str, str]],
+) -> Dict[Tuple[str, str], List[Tuple[int, float]]]:
+    """``(id, length)`` of the available remnants for each ``(section, material)`` group."""
+    remnants: Dict[Tuple[str, str], List[Tuple[int, float]]] = {}
+    for section, material in groups:
+        rows = conn.execute(
+            """
+            SELECT id, length FROM remnants
+            WHERE section = ? AND material = ? AND status = 'available'
+            ORDER BY length DESC
+            """,
+            (section, material),
+        ).fetchall()
+        remnants[(section, material)] = [(row["id"], row["length"]) for row in rows]
+    return remnants
+
+
+def remnants_for(request: OptimizationRequest) -> Optional[Dict[Tuple[str, str], List[Tuple[int, float]]]]:
+    """Available remnants for the request's groups, or ``None`` when ``use_remnants`` is off."""
+    if not request.configuration.use_remnants:
+        return None
+    keys = sorted({(component.section, component.material) for component in request.components})
+    with get_connection() as conn:
+        return available_remnants(conn, keys)
+
+
+def _insert(conn: sqlite3.Connection, remnant: RemnantCreate) -> int:
+    cursor = conn.execute(
+        "INSERT INTO remnants (section, material, length, source) VALUES (?, ?, ?, ?)",
+        (remnant.section, remnant.material, remnant.length, remnant.source),
+    )
+    return cursor.lastrowid
+
+
+@router.get("", response_model=List[Remnant])
+def list_remnants(
+    section: Optional[str] = None,
+    material: Optional[str] = None,
+    status_filter: Optional[str] = Query(default="available", alias="status"),
+) -> List[Remnant]:
+    clauses = []
+    params: List[object] = []
+    for column, value in (("section", section), ("material", material), ("status", status_filter)):
+        if value:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with get_connection() as conn:
+        rows = conn.execute(f"SELECT * FROM remnants {where} ORDER BY section, material, length DESC", params).fetchall()
+        return [_row_to_schema(row) for row in rows]
+
+
+@router.post("", response_model=Remnant, status_code=status.HTTP_201_CREATED)
+def create_remnant(remnant: RemnantCreate) -> Remnant:
+    with get_connection() as conn:
+        remnant_id = _insert(conn, remnant)
+        row = conn.execute("SELECT * FROM remnants WHERE id = ?", (remnant_id,)).fetchone()
+        return _row_to_schema(row)
+
+
+@router.delete("/{remnant_id}")
+def delete_remnant(remnant_id: int) -> None:
+    with get_connection() as conn:
+        cursor = conn.execute("DELETE FROM remnants WHERE id = ?", (remnant_id,))
+        if cursor.rowcount == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Remnant not found")
+
+
+@router.post("/commit", response_model=RemnantCommitResult)
+def commit_run(run: RemnantCommit) -> RemnantCommitResult:
+    """Reserve the remnants an optimization used and store the offcuts it leaves, atomically.
+
+    If any remnant is no longer available nothing is written and the request
+    fails with 409, so the run can be re-optimized against current stock.
+    """
+    reserved: List[int] = []
+    created: List[int] = []
+    with get_connection() as conn:
+        for group in run.groups:
+            offcuts: List[float] = []
+            for bar in group.bars:
+                if bar.remnantId is not None:
+                    cursor = conn.execute(
+                        """
+                        UPDATE remnants SET status = 'reserved', reserved_at = CURRENT_TIMESTAMP
+                        WHERE id = ? AND status = 'available'
+                        """,
+                        (bar.remnantId,),
+                    )
+                    if cursor.rowcount != 1:
+                        conn.rollback()
+                        raise HTTPException(
+                            status_code=status.HTTP_409_CONFLICT,
+                            detail=f"Remnant {bar.remnantId} is no longer available",
+                        )
+                    reserved.append(bar.remnantId)
+                if bar.offcut is not None:
+                    offcuts.append(bar.offcut)
+            if group.patterns_unexpanded():
+                offcuts.extend(
+                    pattern.offcut for pattern in group.patterns if pattern.offcut is not None
+                    for _ in range(pattern.count)
+                )
+            for length in offcuts:
+                remnant = RemnantCreate(section=group.section, material=group.material, length=length, source=run.source)
+                created.append(_insert(conn, remnant))
+
+        rows = []
+        if created:
+            placeholders = ",".join("?" for _ in created)
+            rows = conn.execute(f"SELECT * FROM remnants WHERE id IN ({placeholders}) ORDER BY id", created).fetchall()
+        return RemnantCommitResult(reserved=reserved, created=[_row_to_schema(row) for row in rows])
@@ -0,0 +1,179 @@
+"""Latency of the project routes under concurrent clients, Starlette threadpool vs. DB executor.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.api_load --clients 100 --seconds 10
+
+Each mode gets its own uvicorn server process and database; the clients run
+in this process and talk to it over HTTP.
+
+``threadpool`` serves the project routes as plain ``def`` functions, the way
+they ran before the DB executor: Starlette runs each in its shared
+threadpool. ``executor`` is the app as shipped, with ``async def`` routes on
+the bounded DB executor. Every client loops over a mix of reads, summary
+pages, searches and saves; ``/health`` is probed alongside to show how
+long the event loop itself takes to answer.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from fastapi.routing import APIRoute
+
+MIX = [("get", 0.6), ("summary", 0.15), ("search", 0.1), ("put", 0.15)]
+
+
+def _build_app(mode: str) -> FastAPI:
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    import backend.app.routers.projects as projects
+    importlib.reload(projects)
+
+    router = projects.router
+    if mode == "threadpool":
+        router = APIRouter()
+        for route in projects.router.routes:
+            assert isinstance(route, APIRoute)
+            router.add_api_route(
+                route.path,
+                getattr(route.endpoint, "__wrapped__", route.endpoint),
+                methods=list(route.methods),
+                response_model=route.response_model,
+                status_code=route.status_code,
+            )
+    app = FastAPI()
+    app.include_router(router)
+
+    @app.get("/health")
+    async def health() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    return app
+
+
+async def _seed(base_url: str, projects: int) -> List[str]:
+    components = [
+        {"id": f"C{index}", "type": "sash_stile", "section": "57x57", "material": "Softwood",
+         "width": 57, "thickness": 57, "length": 1000 + index, "quantity": 2}
+        for index in range(40)
+    ]
+    body = "".join(
+        json.dumps({"project_id": f"P{index}", "name": f"Project {index}", "client": f"Client {index % 50}",
+                    "payload": {"configuration": {}, "components": components}}) + "\n"
+        for index in range(projects)
+    )
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        await client.post("/api/projects/import", content=body.encode(), headers={"Content-Type": "application/x-ndjson"})
+    return [f"P{index}" for index in range(projects)]
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 1)
+
+    return {"count": len(ordered), "p50Ms": pick(0.50), "p95Ms": pick(0.95), "p99Ms": pick(0.99)}
+
+
+async def _load(base_url: str, ids: List[str], clients: int, seconds: float) -> Dict[str, Dict[str, float]]:
+    samples: Dict[str, List[float]] = {name: [] for name, _ in MIX}
+    samples["health"] = []
+    stop = time.monotonic() + seconds
+    limits = httpx.Limits(max_connections=clients + 1, max_keepalive_connections=clients + 1)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+
+        async def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            while time.monotonic() < stop:
+                kind = rng.choices([name for name, _ in MIX], weights=[weight for _, weight in MIX])[0]
+                project_id = rng.choice(ids)
+                started = time.perf_counter()
+                if kind == "get":
+                    await client.get(f"/api/projects/{project_id}")
+                elif kind == "summary":
+                    await client.get("/api/projects/summary", params={"limit": 50})
+                elif kind == "search":
+                    await client.get("/api/projects/search", params={"q": f"client {rng.randrange(50)}"})
+                else:
+                    await client.put(f"/api/projects/{project_id}", json={"name": f"Project {project_id} {seed}"})
+                samples[kind].append(time.perf_counter() - started)
+
+        async def probe() -> None:
+            while time.monotonic() < stop:
+                started = time.perf_counter()
+                await client.get("/health")
+                samples["health"].append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(probe(), *(worker(index) for index in range(clients)))
+
+    everything = [value for name, values in samples.items() if name != "health" for value in values]
+    report = {name: _percentiles(values) for name, values in samples.items()}
+    report["all"] = {**_percentiles(everything), "requestsPerSecond": round(len(everything) / seconds, 1)}
+    return report
+
+
+def _serve(mode: str, database_path: str, port: int) -> None:
+    import uvicorn
+
+    os.environ["PRODUCTION_DB_PATH"] = database_path
+    uvicorn.run(_build_app(mode), host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _wait_ready(base_url: str) -> None:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for _ in range(200):
+            try:
+                await client.get("/health")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", choices=["threadpool", "executor"], default=["threadpool", "executor"])
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in args.modes:
+            server = multiprocessing.Process(
+                target=_serve, args=(mode, str(Path(directory) / f"{mode}.db"), args.port), daemon=True
+            )
+            server.start()
+            base_url = f"http://127.0.0.1:{args.port}"
+            try:
+                asyncio.run(_wait_ready(base_url))
+                ids = asyncio.run(_seed(base_url, args.projects))
+                results[mode] = asyncio.run(_load(base_url, ids, args.clients, args.seconds))
+            finally:
+                server.terminate()
+                server.join()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
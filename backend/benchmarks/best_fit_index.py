@@ -0,0 +1,102 @@
+"""Compare the indexed best-fit packer against the original linear scan.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.best_fit_index --sizes 10000 100000
+
+Each size is timed on random lengths and on two repeated lengths; the
+repeated case opens thousands of bars with the same remaining capacity.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from backend.app.models import OptimizationConfig
+from backend.app.optimizer.heuristics import _Bar, _bar_identifier, _pack_best_fit
+
+
+def linear_best_fit(section: str, lengths: List[Tuple[str, float]], config: OptimizationConfig) -> List[_Bar]:
+    """The pre-index implementation: scan every open bar for each piece."""
+    ordered = sorted(lengths, key=lambda item: item[1], reverse=True)
+    usable_length = config.stock_length - (2 * config.end_trim)
+    bars: List[_Bar] = []
+
+    for _, length in ordered:
+        best_fit_index = None
+        best_remaining = None
+        for index, bar in enumerate(bars):
+            required = length if not bar.cuts else length + config.kerf
+            if required <= bar.remaining:
+                remaining_after = bar.remaining - required
+                if best_remaining is None or remaining_after < best_remaining:
+                    best_remaining = remaining_after
+                    best_fit_index = index
+
+        if best_fit_index is None:
+            bars.append(
+                _Bar(
+                    identifier=_bar_identifier(section, len(bars) + 1),
+                    cuts=[length],
+                    remaining=usable_length - length,
+                )
+            )
+        else:
+            bar = bars[best_fit_index]
+            required = length if not bar.cuts else length + config.kerf
+            bar.cuts.append(length)
+            bar.remaining -= required
+    return bars
+
+
+def random_pieces(count: int, seed: int) -> List[Tuple[str, float]]:
+    rng = random.Random(seed)
+    sizes = [round(rng.uniform(250, 2600), 1) for _ in range(400)]
+    return [(f"P{index}", rng.choice(sizes)) for index in range(count)]
+
+
+def repeated_pieces(count: int, seed: int) -> List[Tuple[str, float]]:
+    """Half the pieces at 1000 mm and half at 700 mm, as in a run of identical sashes."""
+    return [(f"A{index}", 1000.0) for index in range(count // 2)] + [
+        (f"B{index}", 700.0) for index in range(count - count // 2)
+    ]
+
+
+WORKLOADS = {"random": random_pieces, "repeated": repeated_pieces}
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skip-linear-above", type=int, default=None,
+                        help="only time the indexed packer for larger inputs")
+    args = parser.parse_args()
+
+    config = OptimizationConfig()
+    print(f"{'workload':>9} {'pieces':>8} {'bars':>7} {'linear s':>10} {'indexed s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        for workload, make_pieces in WORKLOADS.items():
+            pieces = make_pieces(size, args.seed)
+            indexed, indexed_seconds = _timed(_pack_best_fit, "57x57", pieces, config)
+            if args.skip_linear_above is not None and size > args.skip_linear_above:
+                print(f"{workload:>9} {size:>8} {len(indexed):>7} {'-':>10} {indexed_seconds:>10.3f} {'-':>8}")
+                continue
+            linear, linear_seconds = _timed(linear_best_fit, "57x57", pieces, config)
+            assert [(bar.cuts, bar.remaining) for bar in linear] == [(bar.cuts, bar.remaining) for bar in indexed]
+            print(
+                f"{workload:>9} {size:>8} {len(indexed):>7} {linear_seconds:>10.3f} {indexed_seconds:>10.3f} "
+                f"{linear_seconds / indexed_seconds:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
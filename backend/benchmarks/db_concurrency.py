@@ -0,0 +1,117 @@
+"""Concurrent read/write throughput of the SQLite layer, per-request connections vs. per-thread WAL.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.db_concurrency --readers 8 --writers 2 --seconds 5
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterator
+
+PAYLOAD = json.dumps({"configuration": {}, "components": [{"id": f"C{index}", "length": 1000} for index in range(60)]})
+
+
+def _legacy_factory(path: Path) -> Callable[[], ContextManager[sqlite3.Connection]]:
+    """The pre-WAL behaviour: a fresh rollback-journal connection for every request."""
+
+    @contextmanager
+    def get_connection() -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    return get_connection
+
+
+def _seed(path: Path, projects: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executemany(
+        "INSERT INTO projects (project_id, name, payload) VALUES (?, ?, ?)",
+        [(f"P{index}", f"Project {index}", PAYLOAD) for index in range(projects)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _run(get_connection, readers: int, writers: int, seconds: float, projects: int) -> Dict[str, float]:
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def worker(write: bool, seed: int) -> None:
+        rng = random.Random(seed)
+        done = errors = 0
+        while time.monotonic() < stop:
+            project_id = f"P{rng.randrange(projects)}"
+            try:
+                with get_connection() as conn:
+                    if write:
+                        conn.execute(
+                            "UPDATE projects SET payload = ?, updated_at = CURRENT_TIMESTAMP WHERE project_id = ?",
+                            (PAYLOAD, project_id),
+                        )
+                    else:
+                        conn.execute("SELECT * FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+                done += 1
+            except sqlite3.OperationalError:
+                errors += 1
+        with lock:
+            counts["writes" if write else "reads"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=worker, args=(False, index)) for index in range(readers)]
+    threads += [threading.Thread(target=worker, args=(True, 1000 + index)) for index in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "readsPerSecond": round(counts["reads"] / seconds, 1),
+        "writesPerSecond": round(counts["writes"] / seconds, 1),
+        "errors": counts["errors"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--projects", type=int, default=500)
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("legacy", "wal"):
+            path = Path(directory) / f"{mode}.db"
+            os.environ["PRODUCTION_DB_PATH"] = str(path)
+            import backend.app.database as database
+            importlib.reload(database)
+            database.init_db()
+            database.close_connection()
+            _seed(path, args.projects)
+            factory = _legacy_factory(path) if mode == "legacy" else database.get_connection
+            with factory():
+                pass  # switch the file to WAL before the threads start
+            results[mode] = _run(factory, args.readers, args.writers, args.seconds, args.projects)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
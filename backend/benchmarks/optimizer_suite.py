@@ -0,0 +1,203 @@
+"""Optimizer benchmark suite on synthetic sash window orders.
+
+Run from the repository root::
+
+    python -m backend.benchmarks.optimizer_suite --output bench.json
+    python -m backend.benchmarks.optimizer_suite --baseline backend/benchmarks/optimizer_baseline.json
+
+The generator mirrors ``js/calculations.js``: every window contributes its
+frame and liner members plus two sashes with rails, stiles and the glazing
+bars of a 2x2 to 9x9 grid. Results are JSON; with ``--baseline`` each entry
+is compared against the stored run and the exit code is 1 on a regression.
+``optimizer_baseline.json`` holds the default suite; bars and waste are
+deterministic, timings need a baseline from the same machine.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Sequence
+
+from backend.app.models import OptimizationComponent, OptimizationConfig
+from backend.app.optimizer.solver import solve_cutting_stock
+
+GRIDS = {"2x2": (2, 2), "3x3": (3, 3), "4x4": (4, 4), "6x6": (6, 6), "9x9": (9, 9)}
+
+# Deductions and allowances from js/calculations.js (CONSTANTS).
+SASH_WIDTH_DEDUCTION = 178
+SASH_HEIGHT_DEDUCTION = 92
+SASH_HEIGHT_DIFFERENCE = 33
+JAMB_HEIGHT_DEDUCTION = 106
+EXTERNAL_HEAD_LINER_DEDUCTION = 204
+INTERNAL_HEAD_LINER_DEDUCTION = 170
+STILE_WIDTH = 57
+TOP_RAIL_WIDTH = 57
+BOTTOM_RAIL_WIDTH = 90
+HORN_ALLOWANCE_VERTICAL = 70
+HORN_ALLOWANCE_HORIZONTAL = 30
+
+SOLVERS: Dict[str, Dict[str, Any]] = {
+    "heuristic": {},
+    "pattern": {"pattern_mode": True},
+    "improve": {"improve": True, "time_limit_ms": 500},
+    "ortools": {"solver": "ortools", "time_limit_ms": 1000},
+}
+
+DEFAULT_SIZES = [1, 10, 50, 200, 1000]
+DEFAULT_SOLVERS = ["heuristic", "pattern"]
+
+
+def window_components(index: int, grid: str, width: float, height: float) -> List[OptimizationComponent]:
+    """Pre-cut components of one sash window, as the front end sends them to the optimizer."""
+    rows, cols = GRIDS[grid]
+    sash_width = width - SASH_WIDTH_DEDUCTION
+    top_sash = (height - SASH_HEIGHT_DEDUCTION - SASH_HEIGHT_DIFFERENCE) / 2
+    members = [
+        ("head", "28 x 141", "Hardwood", width, 1),
+        ("jamb", "28 x 141", "Hardwood", height - JAMB_HEIGHT_DEDUCTION, 2),
+        ("sill", "69 x 127", "Hardwood", width, 1),
+        ("ext-head-liner", "17 x 102", "Softwood", width - EXTERNAL_HEAD_LINER_DEDUCTION, 1),
+        ("int-head-liner", "17 x 85", "Softwood", width - INTERNAL_HEAD_LINER_DEDUCTION, 1),
+        ("ext-jamb-liner", "17 x 102", "Softwood", height, 2),
+        ("int-jamb-liner", "17 x 86", "Softwood", height, 2),
+    ]
+    for sash, sash_height in (("top", top_sash), ("bottom", top_sash + SASH_HEIGHT_DIFFERENCE)):
+        rail = sash_width - 2 * STILE_WIDTH
+        members += [
+            (f"{sash}-stile", "57 x 57", "Hardwood", sash_height + HORN_ALLOWANCE_VERTICAL, 2),
+            (f"{sash}-top-rail", "57 x 57", "Hardwood", rail + HORN_ALLOWANCE_HORIZONTAL, 1),
+            (f"{sash}-meeting-rail", "57 x 43", "Hardwood", rail + HORN_ALLOWANCE_HORIZONTAL, 1),
+            (f"{sash}-bottom-rail", "57 x 90", "Hardwood", rail + HORN_ALLOWANCE_HORIZONTAL, 1),
+        ]
+        if cols > 1:
+            glazing_height = sash_height - TOP_RAIL_WIDTH - BOTTOM_RAIL_WIDTH
+            members.append((f"{sash}-vertical-bar", "18 x 35", "Hardwood", glazing_height, cols - 1))
+        if rows > 1:
+            members.append((f"{sash}-horizontal-bar", "18 x 35", "Hardwood", rail, rows - 1))
+    return [
+        OptimizationComponent(
+            id=f"W{index:04d}-{name}",
+            section=section,
+            material=material,
+            length=round(length),
+            quantity=quantity,
+        )
+        for name, section, material, length, quantity in members
+    ]
+
+
+def window_mix(windows: int, seed: int) -> List[OptimizationComponent]:
+    """A seeded order of ``windows`` windows; sizes repeat the way real terraces do."""
+    rng = random.Random(seed)
+    sizes = [(rng.randrange(600, 1800, 5), rng.randrange(900, 2400, 5)) for _ in range(max(windows // 4, 1))]
+    components: List[OptimizationComponent] = []
+    for index in range(1, windows + 1):
+        width, height = rng.choice(sizes)
+        components.extend(window_components(index, rng.choice(list(GRIDS)), width, height))
+    return components
+
+
+def run_case(solver: str, windows: int, seed: int) -> Dict[str, Any]:
+    components = window_mix(windows, seed)
+    config = OptimizationConfig(**SOLVERS[solver])
+    tracemalloc.start()
+    started = time.perf_counter()
+    groups = solve_cutting_stock(components, config)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    waste = 0.0
+    for group in groups:
+        if group.bars:
+            waste += sum(bar.waste for bar in group.bars)
+        else:
+            waste += sum(pattern.waste * pattern.count for pattern in group.patterns)
+    return {
+        "solver": solver,
+        "windows": windows,
+        "pieces": sum(component.quantity for component in components),
+        "groups": len(groups),
+        "seconds": round(seconds, 4),
+        "peakKiB": round(peak / 1024, 1),
+        "bars": sum(group.summary["totalBars"] for group in groups),
+        "lowerBound": sum(group.summary["lowerBound"] for group in groups),
+        "waste": round(waste, 1),
+    }
+
+
+def run_suite(sizes: Sequence[int], solvers: Sequence[str], seed: int) -> Dict[str, Any]:
+    return {
+        "meta": {
+            "seed": seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "config": OptimizationConfig().model_dump(include={"stock_length", "kerf", "end_trim"}),
+        },
+        "results": [run_case(solver, windows, seed) for solver in solvers for windows in sizes],
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], time_tolerance: float) -> List[Dict[str, Any]]:
+    """Per-case deltas against ``baseline``; more bars or waste, or a slowdown beyond tolerance, regress."""
+    previous = {(entry["solver"], entry["windows"]): entry for entry in baseline["results"]}
+    comparison = []
+    for entry in current["results"]:
+        before = previous.get((entry["solver"], entry["windows"]))
+        if before is None:
+            continue
+        ratio = entry["seconds"] / before["seconds"] if before["seconds"] else 1.0
+        regressions = []
+        if entry["bars"] > before["bars"]:
+            regressions.append("bars")
+        if entry["waste"] > before["waste"] + 1e-6:
+            regressions.append("waste")
+        # Sub-10 ms cases are dominated by timer noise.
+        if ratio > 1 + time_tolerance and entry["seconds"] - before["seconds"] > 0.01:
+            regressions.append("seconds")
+        comparison.append(
+            {
+                "solver": entry["solver"],
+                "windows": entry["windows"],
+                "barsDelta": entry["bars"] - before["bars"],
+                "wasteDelta": round(entry["waste"] - before["waste"], 1),
+                "timeRatio": round(ratio, 3),
+                "peakKiBDelta": round(entry["peakKiB"] - before["peakKiB"], 1),
+                "regressions": regressions,
+            }
+        )
+    return comparison
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="window counts")
+    parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS), default=DEFAULT_SOLVERS)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--time-tolerance", type=float, default=0.5,
+                        help="allowed relative slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.solvers, args.seed)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            report["comparison"] = compare(report, json.load(handle), args.time_tolerance)
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(encoded + "\n")
+    else:
+        print(encoded)
+    return 1 if any(entry["regressions"] for entry in report.get("comparison", [])) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -54,14 +54,645 @@ def test_project_lifecycle(tmp_path):
         payload=payload,
     )
 
-    created = projects.create_project(project_request)
-    fetched = projects.get_project(created.project_id)
+    created = asyncio.run(projects.create_project(project_request))
+    fetched = asyncio.run(projects.get_project(created.project_id))
     assert fetched.project_id == created.project_id
 
     update_request = ProjectUpdate(name="Updated", payload=payload)
-    updated = projects.update_project(created.project_id, update_request)
+    updated = asyncio.run(projects.update_project(created.project_id, update_request))
     assert updated.name == "Updated"
 
-    projects.delete_project(created.project_id)
+    asyncio.run(projects.delete_project(created.project_id))
     with pytest.raises(HTTPException):
-        projects.get_project(created.project_id)
+        asyncio.run(projects.get_project(created.project_id))
+
+
+def test_stream_optimization_emits_groups_then_summary():
+    import json
+
+    from backend.app.models import OptimizationComponent, OptimizationConfig, OptimizationRequest
+    from backend.app.routers.optimize import stream_optimization
+
+    request = OptimizationRequest(
+        components=[
+            OptimizationComponent(id="A", section="57x57", material="Softwood", length=1500, quantity=6),
+            OptimizationComponent(id="B", section="63x63", material="Softwood", length=900, quantity=4),
+        ],
+        configuration=OptimizationConfig(use_cache=False),
+    )
+    response = stream_optimization(request)
+    assert response.media_type == "application/x-ndjson"
+
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    records = [json.loads(line) for line in asyncio.run(collect())]
+    assert [record["type"] for record in records] == ["group", "group", "summary"]
+    assert sorted(record["index"] for record in records[:2]) == [0, 1]
+    assert records[-1]["groups"] == 2
+    assert records[-1]["totalBars"] == sum(record["group"]["summary"]["totalBars"] for record in records[:2])
+
+    bad = OptimizationRequest(
+        components=[OptimizationComponent(id="C", section="57x57", material="Softwood", length=50)],
+        configuration=OptimizationConfig(use_cache=False),
+    )
+    response = stream_optimization(bad)
+    assert json.loads(asyncio.run(collect())[0])["type"] == "error"
+
+
+def test_schedule_optimization_nests_projects_and_attributes_pieces(tmp_path):
+    from datetime import date
+
+    from backend.app.models import ScheduleOptimizationRequest
+
+    projects = setup_test_database(tmp_path)
+    import backend.app.routers.optimize as optimize
+    importlib.reload(optimize)
+
+    def project(name, day, length, quantity):
+        component = Component(
+            id="C1", type="sash_stile", section="57x57", material="Softwood",
+            width=57, thickness=57, length=length, quantity=quantity,
+        )
+        request = ProjectCreate(
+            name=name,
+            scheduled_for=day,
+            payload=ProjectPayload(configuration={}, components=[component]),
+        )
+        return asyncio.run(projects.create_project(request)).project_id
+
+    first = project("Mon A", date(2024, 3, 4), 2800, 3)
+    second = project("Mon B", date(2024, 3, 4), 3000, 3)
+    project("Next week", date(2024, 3, 11), 1000, 5)
+
+    result = optimize.run_schedule_optimization(
+        ScheduleOptimizationRequest(date_from=date(2024, 3, 4), date_to=date(2024, 3, 5))
+    )
+
+    assert sorted(result.projects) == sorted([first, second])
+    group = result.groups[0]
+    pieces = [piece for bar in group.bars for piece in bar.pieces]
+    assert sorted(piece.projectId for piece in pieces) == sorted([first] * 3 + [second] * 3)
+    for bar in group.bars:
+        assert [piece.length for piece in bar.pieces] == bar.cuts
+    # Each project alone needs 2 bars; nested, a 2800 and a 3000 share every bar.
+    assert group.summary["totalBars"] == 3
+
+
+def test_project_optimization_only_recomputes_changed_groups(tmp_path):
+    projects = setup_test_database(tmp_path)
+
+    def components(frame_length):
+        return [
+            Component(id="S1", type="sash_stile", section="57x57", material="Softwood",
+                      width=57, thickness=57, length=1450, quantity=8),
+            Component(id="F1", type="frame_head", section="69x120", material="Softwood",
+                      width=120, thickness=69, length=frame_length, quantity=4),
+        ]
+
+    created = asyncio.run(projects.create_project(
+        ProjectCreate(name="Incremental", payload=ProjectPayload(configuration={}, components=components(900)))
+    ))
+    first = asyncio.run(projects.optimize_project(created.project_id))
+    assert [(ref.section, ref.material) for ref in first.recomputed] == [
+        ("57x57", "Softwood"),
+        ("69x120", "Softwood"),
+    ]
+
+    asyncio.run(projects.update_project(
+        created.project_id,
+        ProjectUpdate(payload=ProjectPayload(configuration={}, components=components(1100))),
+    ))
+    second = asyncio.run(projects.optimize_project(created.project_id))
+    assert [(ref.section, ref.material) for ref in second.recomputed] == [("69x120", "Softwood")]
+    assert second.groups[0] == first.groups[0]
+    assert second.groups[1].bars[0].cuts[0] == 1100
+
+    assert asyncio.run(projects.optimize_project(created.project_id)).recomputed == []
+
+    from backend.app.models import OptimizationConfig
+
+    # Without the cache every group is re-solved, but the run is still stored for the next one.
+    fresh = asyncio.run(projects.optimize_project(created.project_id, OptimizationConfig(use_cache=False)))
+    assert len(fresh.recomputed) == 2
+    assert fresh.groups == second.groups
+    assert asyncio.run(projects.optimize_project(created.project_id)).recomputed == []
+
+
+def test_project_summaries_page_with_keyset_cursor(tmp_path):
+    from datetime import date
+
+    projects = setup_test_database(tmp_path)
+    payload = ProjectPayload(configuration={}, components=[])
+    created = [
+        asyncio.run(projects.create_project(
+            ProjectCreate(
+                name=f"P{index}",
+                client="Acme" if index % 2 else "Other",
+                type="Sash",
+                scheduled_for=date(2024, 5, index + 1),
+                payload=payload,
+            )
+        )).project_id
+        for index in range(5)
+    ]
+
+    def page(cursor=None, **filters):
+        arguments = dict(client=None, project_type=None, scheduled_from=None, scheduled_to=None, limit=2)
+        arguments.update(filters)
+        return asyncio.run(projects.list_project_summaries(cursor=cursor, **arguments))
+
+    seen = []
+    cursor = None
+    while True:
+        result = page(cursor)
+        seen.extend(item.project_id for item in result.items)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+    assert seen == list(reversed(created))
+
+    acme = page(client="Acme", limit=10)
+    assert [item.name for item in acme.items] == ["P3", "P1"]
+    ranged = page(scheduled_from=date(2024, 5, 2), scheduled_to=date(2024, 5, 3), limit=10)
+    assert [item.name for item in ranged.items] == ["P2", "P1"]
+    with pytest.raises(HTTPException):
+        page(cursor="not-a-cursor")
+
+
+def test_components_are_normalized_and_totalled_in_sql(tmp_path):
+    import json
+    import sqlite3
+    import zlib
+    from datetime import date
+
+    projects = setup_test_database(tmp_path)
+    import backend.app.routers.components as components_router
+    importlib.reload(components_router)
+
+    def component(identifier, section, length, quantity):
+        return Component(
+            id=identifier, type="sash_stile", section=section, material="Hardwood",
+            width=57, thickness=57, length=length, quantity=quantity,
+            drawing="<svg/>", metadata={"sash": "top"},
+        )
+
+    payload = ProjectPayload(
+        configuration={"key": "2x2"},
+        components=[component("S1", "57x57", 1500, 4), component("B1", "18x35", 640, 6)],
+    )
+    created = asyncio.run(projects.create_project(
+        ProjectCreate(name="Normalized", scheduled_for=date(2024, 6, 3), payload=payload)
+    ))
+    assert asyncio.run(projects.get_project(created.project_id)).payload == payload
+    copy = asyncio.run(projects.duplicate_project(created.project_id))
+    assert asyncio.run(projects.get_project(copy.project_id)).payload == payload
+
+    def totals(**arguments):
+        defaults = dict(group_by=["section"], scheduled_from=None, scheduled_to=None, section=None, material=None)
+        defaults.update(arguments)
+        return components_router.component_totals(**defaults)
+
+    by_section = {row.section: row for row in totals()}
+    assert by_section["57x57"].pieces == 8
+    assert by_section["57x57"].metres == 12.0
+    assert by_section["18x35"].total_length == 7680.0
+
+    changed = ProjectPayload(configuration={}, components=[component("S1", "57x57", 1000, 1)])
+    asyncio.run(projects.update_project(copy.project_id, ProjectUpdate(payload=changed)))
+    assert asyncio.run(projects.get_project(copy.project_id)).payload == changed
+    per_project = totals(group_by=["project"], section="57x57", scheduled_from=date(2024, 6, 3))
+    assert {row.project_id: row.pieces for row in per_project} == {created.project_id: 4, copy.project_id: 1}
+    assert totals(scheduled_to=date(2024, 6, 2)) == []
+    with pytest.raises(HTTPException):
+        totals(group_by=["colour"])
+
+    # A row written before normalization keeps its components inside the payload.
+    legacy = {"configuration": {}, "components": [component("L1", "57x57", 900, 2).model_dump()]}
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.execute(
+            "INSERT INTO projects (project_id, name, payload) VALUES ('legacy', 'Legacy', ?)",
+            (json.dumps(legacy),),
+        )
+    import backend.app.database as database
+    database.init_db()
+    assert asyncio.run(projects.get_project("legacy")).payload.components[0].length == 900
+    with database.get_connection() as conn:
+        stored = conn.execute("SELECT payload FROM projects WHERE project_id = 'legacy'").fetchone()
+    assert "components" not in json.loads(zlib.decompress(stored["payload"]))
+
+
+def test_drawings_are_stored_once_and_served_by_reference(tmp_path):
+    import base64
+
+    projects = setup_test_database(tmp_path)
+    import backend.app.database as database
+    import backend.app.routers.blobs as blobs
+    importlib.reload(blobs)
+
+    png = b"\x89PNG\r\n\x1a\n" + bytes(range(256))
+    data_url = "data:image/png;base64," + base64.b64encode(png).decode()
+
+    def component(identifier, drawing):
+        return Component(
+            id=identifier, type="glazing_bar", section="18x35", material="Hardwood",
+            width=18, thickness=35, length=640, quantity=2, drawing=drawing,
+        )
+
+    payload = ProjectPayload(
+        configuration={},
+        components=[component("G1", data_url), component("G2", data_url), component("G3", "https://example.com/g3.svg")],
+    )
+    created = asyncio.run(projects.create_project(ProjectCreate(name="Drawings", payload=payload)))
+    copy = asyncio.run(projects.duplicate_project(created.project_id))
+
+    def blob_count():
+        with database.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    assert blob_count() == 1
+    fetched = asyncio.run(projects.get_project(copy.project_id))
+    reference = fetched.payload.components[0].drawing
+    assert reference.startswith("/api/blobs/")
+    assert fetched.payload.components[2].drawing == "https://example.com/g3.svg"
+    assert asyncio.run(projects.get_project(copy.project_id, inline_drawings=True)).payload == payload
+
+    response = blobs.get_blob(reference.rsplit("/", 1)[1])
+    assert response.body == png
+    assert response.media_type == "image/png"
+    with pytest.raises(HTTPException):
+        blobs.get_blob("0" * 64)
+
+    # Saving the by-reference payload back keeps the drawing.
+    asyncio.run(projects.update_project(copy.project_id, ProjectUpdate(payload=fetched.payload)))
+    assert asyncio.run(projects.get_project(copy.project_id, inline_drawings=True)).payload == payload
+
+    # Purging only looks at the hashes an edit or delete let go of, not at every stored blob.
+    with database.get_connection() as conn:
+        stray = database.store_blob(conn, "image/png", b"unreferenced")
+    asyncio.run(projects.delete_project(created.project_id))
+    assert blob_count() == 2
+    asyncio.run(projects.delete_project(copy.project_id))
+    assert blob_count() == 1
+    with database.get_connection() as conn:
+        assert database.load_blob(conn, stray) is not None
+
+
+def test_project_etags_and_optimistic_concurrency(tmp_path):
+    from fastapi import Response
+
+    projects = setup_test_database(tmp_path)
+    payload = ProjectPayload(configuration={}, components=[])
+    created = asyncio.run(projects.create_project(ProjectCreate(name="Versioned", payload=payload)))
+    assert created.version == 1
+
+    response = Response()
+    asyncio.run(projects.get_project(created.project_id, response=response))
+    etag = response.headers["ETag"]
+    with pytest.raises(HTTPException) as not_modified:
+        asyncio.run(projects.get_project(created.project_id, if_none_match=etag))
+    assert not_modified.value.status_code == 304
+
+    listing = Response()
+    asyncio.run(projects.list_projects(response=listing))
+    with pytest.raises(HTTPException):
+        asyncio.run(projects.list_projects(if_none_match=listing.headers["ETag"]))
+
+    # Two workstations both loaded version 1; the second save must not win silently.
+    first = asyncio.run(projects.update_project(created.project_id, ProjectUpdate(name="First"), if_match=etag))
+    assert first.version == 2
+    with pytest.raises(HTTPException) as conflict:
+        asyncio.run(projects.update_project(created.project_id, ProjectUpdate(name="Second"), if_match=etag))
+    assert conflict.value.status_code == 412
+    assert asyncio.run(projects.get_project(created.project_id)).name == "First"
+
+    assert asyncio.run(projects.get_project(created.project_id, if_none_match=etag)).version == 2
+    assert len(asyncio.run(projects.list_projects(if_none_match=listing.headers["ETag"]))) == 1
+
+    # Deleted and re-created under the same id: version is 1 again, but the old tags must not match.
+    asyncio.run(projects.delete_project(created.project_id))
+    recreated = asyncio.run(
+        projects.create_project(ProjectCreate(project_id=created.project_id, name="Again", payload=payload))
+    )
+    assert recreated.version == 1
+    fresh = Response()
+    assert asyncio.run(projects.get_project(created.project_id, if_none_match=etag, response=fresh)).name == "Again"
+    assert fresh.headers["ETag"] != etag
+    with pytest.raises(HTTPException) as stale:
+        asyncio.run(projects.update_project(created.project_id, ProjectUpdate(name="Stale"), if_match=etag))
+    assert stale.value.status_code == 412
+    assert stale.value.headers["ETag"] == fresh.headers["ETag"]
+    with pytest.raises(HTTPException):
+        asyncio.run(projects.update_project(created.project_id, ProjectUpdate(name="Bare"), if_match='"1"'))
+
+
+def test_patch_project_writes_only_what_changed(tmp_path):
+    projects = setup_test_database(tmp_path)
+    import backend.app.database as database
+
+    def component(index):
+        return Component(
+            id=f"C{index}", type="sash_stile", section="57x57", material="Softwood",
+            width=57, thickness=57, length=1000 + index, quantity=1,
+        )
+
+    created = asyncio.run(projects.create_project(
+        ProjectCreate(
+            name="Patched",
+            payload=ProjectPayload(configuration={"key": "2x2"}, components=[component(i) for i in range(200)]),
+        )
+    ))
+
+    def rowids():
+        with database.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT position, rowid FROM project_components WHERE project_id = ?", (created.project_id,)
+            ).fetchall()
+        return {row["position"]: row["rowid"] for row in rows}
+
+    def patch(document, content_type=None, **headers):
+        before = rowids()
+        project = asyncio.run(projects.patch_project(created.project_id, document, content_type=content_type, **headers))
+        after = rowids()
+        return project, [position for position in sorted(after) if before.get(position) != after[position]]
+
+    project, written = patch([
+        {"op": "test", "path": "/components/5/id", "value": "C5"},
+        {"op": "replace", "path": "/components/5/length", "value": 2222},
+        {"op": "add", "path": "/cut_list/-", "value": {"bar": 1}},
+    ])
+    assert project.payload.components[5].length == 2222
+    assert project.payload.cut_list == [{"bar": 1}]
+    assert project.version == 2
+    # Only the edited component row is rewritten.
+    assert written == [5]
+
+    project, written = patch({"configuration": {"key": "3x3"}}, content_type="application/merge-patch+json")
+    assert project.payload.configuration == {"key": "3x3"}
+    assert written == []
+
+    new = component(999).model_dump()
+    project, _ = patch([
+        {"op": "remove", "path": "/components/0"},
+        {"op": "add", "path": "/components/10", "value": new},
+        {"op": "move", "from": "/components/199", "path": "/components/0"},
+    ])
+    ids = [item.id for item in project.payload.components]
+    assert ids[0] == "C199" and ids[11] == "C999" and ids[1:11] == [f"C{i}" for i in range(1, 11)]
+    assert len(ids) == 200 and asyncio.run(projects.get_project(created.project_id)).payload == project.payload
+
+    for bad, code in (
+        ([{"op": "test", "path": "/components/0/id", "value": "nope"}], 409),
+        ([{"op": "remove", "path": "/components/500"}], 400),
+        ([{"op": "replace", "path": "/components/0/quantity", "value": 0}], 422),
+        ({"configuration": {}}, 400),
+    ):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(projects.patch_project(
+                created.project_id, bad, content_type="application/json-patch+json" if code == 400 else None
+            ))
+        assert error.value.status_code == code
+    with pytest.raises(HTTPException) as stale:
+        asyncio.run(projects.patch_project(created.project_id, [], if_match='"1"'))
+    assert stale.value.status_code == 412
+    assert asyncio.run(projects.get_project(created.project_id)).version == 4
+
+
+def test_ndjson_import_and_export_round_trip(tmp_path):
+    import json
+
+    from starlette.requests import Request
+
+    projects = setup_test_database(tmp_path)
+    projects.IMPORT_BATCH_SIZE = 3
+    projects.EXPORT_PAGE_SIZE = 2
+
+    component = {
+        "id": "S1", "type": "sash_stile", "section": "57x57", "material": "Softwood",
+        "width": 57, "thickness": 57, "length": 1450, "quantity": 2,
+    }
+    lines = [
+        json.dumps({"project_id": f"site-a-{index}", "name": f"P{index}",
+                    "payload": {"configuration": {}, "components": [component]}})
+        for index in range(7)
+    ]
+    lines.insert(2, "{not json")
+    lines.insert(5, json.dumps({"project_id": "site-a-0", "name": "Again",
+                                "payload": {"configuration": {}, "components": []}}))
+    body = ("\n".join(lines) + "\n").encode()
+
+    def request_for(data, chunk=37):
+        chunks = [data[start:start + chunk] for start in range(0, len(data), chunk)]
+
+        async def receive():
+            return {"type": "http.request", "body": chunks.pop(0) if chunks else b"", "more_body": bool(chunks)}
+
+        return Request({"type": "http", "method": "POST", "headers": []}, receive)
+
+    result = asyncio.run(projects.import_projects(request_for(body)))
+    assert (result.imported, result.failed) == (7, 2)
+    assert [(error.line, error.project_id) for error in result.errors] == [(3, None), (6, "site-a-0")]
+    assert asyncio.run(projects.get_project("site-a-4")).payload.components[0].length == 1450
+
+    response = asyncio.run(projects.export_projects())
+
+    async def collect():
+        return [chunk async for chunk in response.body_iterator]
+
+    exported = [json.loads(line) for line in "".join(asyncio.run(collect())).splitlines()]
+    assert [project["project_id"] for project in exported] == [f"site-a-{index}" for index in range(7)]
+
+    target = setup_test_database(tmp_path / "other")
+    reimport = "".join(json.dumps(project) + "\n" for project in exported).encode()
+    assert asyncio.run(target.import_projects(request_for(reimport))).imported == 7
+    assert asyncio.run(target.get_project("site-a-6", inline_drawings=True)).payload.model_dump() == exported[6]["payload"]
+
+
+def test_search_projects_ranks_and_stays_in_sync(tmp_path):
+    projects = setup_test_database(tmp_path)
+    import backend.app.database as database
+
+    def create(name, client, address, component_id):
+        component = Component(
+            id=component_id, type="sash_stile", section="57x57", material="Softwood",
+            width=57, thickness=57, length=1450,
+        )
+        return asyncio.run(projects.create_project(
+            ProjectCreate(
+                name=name, client=client, metadata={"address": address},
+                payload=ProjectPayload(configuration={}, components=[component]),
+            )
+        )).project_id
+
+    manor = create("Manor Road sashes", "Wiśniewski", "12 High Street, Bath", "W0001-stile")
+    church = create("Church refit", "Smith", "3 Manor Road, Bath", "W0002-stile")
+
+    def search(text):
+        return asyncio.run(projects.search_projects(text, limit=20))
+
+    # A name hit outranks a metadata hit; diacritics fold; words match as prefixes.
+    assert [hit.project_id for hit in search("manor")] == [manor, church]
+    assert search("manor")[0].highlights["name"] == "<mark>Manor</mark> Road sashes"
+    assert [hit.project_id for hit in search("wisniewski")] == [manor]
+    assert [hit.project_id for hit in search("W0002")] == [church]
+    assert "components" in search("W0002")[0].highlights
+    assert search('") OR *') == []
+
+    asyncio.run(projects.update_project(church, ProjectUpdate(client="Jones")))
+    assert search("smith") == []
+    asyncio.run(projects.patch_project(church, [{"op": "replace", "path": "/components/0/id", "value": "W0099-stile"}]))
+    assert [hit.project_id for hit in search("W0099")] == [church]
+    copy = asyncio.run(projects.duplicate_project(manor))
+    assert {hit.project_id for hit in search("wisniewski")} == {manor, copy.project_id}
+    asyncio.run(projects.delete_project(manor))
+    assert [hit.project_id for hit in search("wisniewski")] == [copy.project_id]
+
+    with database.get_connection() as conn:
+        conn.execute("DELETE FROM project_search")
+    database.init_db()
+    assert [hit.project_id for hit in search("jones")] == [church]
+
+
+def test_summary_columns_are_maintained_on_write_and_backfilled(tmp_path):
+    import sqlite3
+
+    projects = setup_test_database(tmp_path)
+    import backend.app.database as database
+
+    def component(identifier, section, length, quantity):
+        return Component(
+            id=identifier, type="sash_stile", section=section, material="Softwood",
+            width=57, thickness=57, length=length, quantity=quantity,
+        )
+
+    def create(name, configuration, components):
+        return asyncio.run(projects.create_project(
+            ProjectCreate(name=name, payload=ProjectPayload(configuration=configuration, components=components))
+        )).project_id
+
+    small = create("Small", {"key": "2x2"}, [component("S1", "57x57", 1000, 2)])
+    large = create(
+        "Large", {"key": "custom", "rows": 3, "cols": 4},
+        [component("L1", "57x57", 1500, 4), component("L2", "18x35", 500, 6)],
+    )
+    plain = create("Plain", {}, [])
+
+    def page(cursor=None, **filters):
+        arguments = dict(client=None, project_type=None, scheduled_from=None, scheduled_to=None, limit=10)
+        arguments.update(filters)
+        return asyncio.run(projects.list_project_summaries(cursor=cursor, **arguments))
+
+    by_id = {item.project_id: item for item in page().items}
+    assert (by_id[large].component_count, by_id[large].piece_count, by_id[large].total_metres) == (2, 10, 9.0)
+    assert [(total.section, total.pieces, total.metres) for total in by_id[large].sections] == [
+        ("57x57", 4, 6.0), ("18x35", 6, 3.0),
+    ]
+    assert (by_id[small].pane_count, by_id[large].pane_count, by_id[plain].pane_count) == (4, 12, 0)
+
+    seen, cursor = [], None
+    while True:
+        result = page(cursor, sort="total_metres", order="asc", limit=1)
+        seen.extend(item.project_id for item in result.items)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+    assert seen == [plain, small, large]
+    assert [item.project_id for item in page(section="18x35").items] == [large]
+    assert [item.project_id for item in page(min_panes=5).items] == [large]
+    assert [item.project_id for item in page(min_metres=1, max_metres=5).items] == [small]
+    with pytest.raises(HTTPException):
+        page(sort="payload")
+
+    asyncio.run(projects.patch_project(small, [{"op": "replace", "path": "/components/0/quantity", "value": 5}]))
+    asyncio.run(projects.patch_project(plain, {"configuration": {"key": "3x3"}}))
+    copy = asyncio.run(projects.duplicate_project(large)).project_id
+    by_id = {item.project_id: item for item in page().items}
+    assert (by_id[small].piece_count, by_id[small].total_metres) == (5, 5.0)
+    assert by_id[plain].pane_count == 9
+    assert by_id[copy].total_metres == 9.0
+    asyncio.run(projects.update_project(copy, ProjectUpdate(payload=ProjectPayload(configuration={}, components=[]))))
+    assert [item.project_id for item in page(section="18x35").items] == [large]
+
+    # Rows written before the summary columns existed are filled in by init_db or the backfill command.
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.execute("UPDATE projects SET component_count = NULL, piece_count = NULL, total_metres = NULL")
+        conn.execute("DELETE FROM project_section_totals")
+    from backend.app.backfill import backfill
+    assert backfill(recompute=False, batch_size=2) == 4
+    assert backfill(recompute=False) == 0
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.execute("UPDATE projects SET total_metres = NULL, component_count = NULL WHERE project_id = ?", (large,))
+    database.init_db()
+    assert {item.project_id: item.total_metres for item in page().items}[large] == 9.0
+
+
+def test_revision_history_rebuilds_and_diffs_from_compact_deltas(tmp_path):
+    import base64
+
+    projects = setup_test_database(tmp_path)
+    import backend.app.database as database
+    database.REVISION_MAX_CHAIN = 8
+
+    drawing = "data:image/png;base64," + base64.b64encode(b"\x89PNG\r\n\x1a\n" + bytes(range(256))).decode()
+
+    def component(index):
+        return Component(
+            id=f"C{index}", type="sash_stile", section="57x57", material="Softwood",
+            width=57, thickness=57, length=1000 + index, quantity=1,
+            drawing=drawing if index == 0 else None,
+        )
+
+    project_id = asyncio.run(projects.create_project(
+        ProjectCreate(name="History", payload=ProjectPayload(configuration={"key": "2x2"}, components=[
+            component(index) for index in range(150)
+        ]))
+    )).project_id
+    assert asyncio.run(projects.list_revisions(project_id)) == []
+
+    expected = {1: asyncio.run(projects.get_project(project_id)).payload}
+    for version in range(2, 22):
+        if version % 5:
+            operations = [{"op": "replace", "path": f"/components/{version}/length", "value": 2000 + version}]
+            project = asyncio.run(projects.patch_project(project_id, operations))
+        else:
+            project = asyncio.run(projects.update_project(project_id, ProjectUpdate(name=f"History {version}")))
+        expected[version] = project.payload
+    # Dropping the drawn component must not lose the drawing of older revisions.
+    remaining = ProjectPayload(configuration={"key": "3x3"}, components=expected[21].components[1:])
+    asyncio.run(projects.update_project(project_id, ProjectUpdate(payload=remaining)))
+    expected[22] = asyncio.run(projects.get_project(project_id)).payload
+
+    revisions = asyncio.run(projects.list_revisions(project_id))
+    assert [revision.version for revision in revisions] == list(range(22, 0, -1))
+    assert sum(revision.snapshot for revision in revisions) >= 3
+    for version, payload in expected.items():
+        assert asyncio.run(projects.get_revision(project_id, version)).payload == payload
+    assert asyncio.run(projects.get_revision(project_id, 10)).name == "History 10"
+
+    # Deltas stay tiny next to a snapshot of 150 components.
+    snapshot_size = revisions[-1].size
+    deltas = [revision for revision in revisions if not revision.snapshot]
+    assert deltas and all(revision.size * 10 < snapshot_size for revision in deltas)
+
+    diff = asyncio.run(projects.diff_revisions(project_id, from_version=2, to_version=4))
+    assert diff.operations == [
+        {"op": "replace", "path": "/payload/components/3/length", "value": 2003},
+        {"op": "replace", "path": "/payload/components/4/length", "value": 2004},
+    ]
+    assert asyncio.run(projects.diff_revisions(project_id, from_version=7, to_version=7)).operations == []
+
+    old_drawing = asyncio.run(projects.get_revision(project_id, 1)).payload.components[0].drawing
+    with database.get_connection() as conn:
+        assert database.load_blob(conn, old_drawing.rsplit("/", 1)[-1]) is not None
+    inline = asyncio.run(projects.get_revision(project_id, 1, inline_drawings=True)).payload.components
+    assert inline[0].drawing == drawing and inline[1].drawing is None
+    assert asyncio.run(projects.get_revision(project_id, 22, inline_drawings=True)).payload == expected[22]
+
+    with pytest.raises(HTTPException):
+        asyncio.run(projects.get_revision(project_id, 99))
+    asyncio.run(projects.delete_project(project_id))
+    with pytest.raises(HTTPException):
+        asyncio.run(projects.list_revisions(project_id))
+    with database.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM project_revisions").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
@@ -0,0 +1,47 @@
+import importlib
+import os
+import threading
+
+import pytest
+
+
+def setup_database(tmp_path):
+    os.environ["PRODUCTION_DB_PATH"] = str(tmp_path / "pool.db")
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    return database
+
+
+def test_connections_use_wal_and_are_reused_per_thread(tmp_path):
+    database = setup_database(tmp_path)
+    with database.get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        first = conn
+    with database.get_connection() as conn:
+        assert conn is first
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(database._thread_connection()))
+    thread.start()
+    thread.join()
+    assert seen[0] is not first
+
+
+def test_errors_roll_back_the_outermost_transaction(tmp_path):
+    database = setup_database(tmp_path)
+    insert = "INSERT INTO projects (project_id, name, payload) VALUES (?, 'P', '{}')"
+
+    with pytest.raises(RuntimeError):
+        with database.get_connection() as conn:
+            conn.execute(insert, ("outer",))
+            with database.get_connection() as nested:
+                nested.execute(insert, ("nested",))
+            raise RuntimeError("boom")
+
+    with database.get_connection() as conn:
+        conn.execute(insert, ("kept",))
+    with database.get_connection() as conn:
+        rows = conn.execute("SELECT project_id FROM projects").fetchall()
+    assert [row["project_id"] for row in rows] == ["kept"]
@@ -17,3 +17,45 @@ def test_best_fit_decreasing_groups_lengths():
     assert group.summary["totalBars"] >= 1
     for bar in group.bars:
         assert sum(bar.cuts) <= config.stock_length
+
+
+def test_best_fit_index_matches_linear_scan():
+    from backend.benchmarks.best_fit_index import linear_best_fit, random_pieces
+    from backend.app.optimizer.heuristics import _pack_best_fit
+
+    config = OptimizationConfig(stock_length=5900, kerf=3, end_trim=10, minimum_piece=200)
+    pieces = random_pieces(3000, seed=11) + [("T", 1940.0)] * 40
+
+    indexed = _pack_best_fit("57x57", pieces, config)
+    linear = linear_best_fit("57x57", pieces, config)
+
+    assert [(bar.identifier, bar.cuts, bar.remaining) for bar in indexed] == [
+        (bar.identifier, bar.cuts, bar.remaining) for bar in linear
+    ]
+
+
+def test_pack_patterns_places_identical_pieces_in_bulk():
+    from backend.app.optimizer.heuristics import _pack_patterns
+
+    config = OptimizationConfig(stock_length=5900, kerf=3, end_trim=10, minimum_piece=200)
+    patterns = _pack_patterns("18x35", {640.0: 500}, config)
+
+    assert [(pattern.cuts, pattern.count) for pattern in patterns] == [([640.0] * 9, 55), ([640.0] * 5, 1)]
+
+
+def test_lower_bound_uses_l2_for_large_pieces():
+    import random
+
+    from backend.app.optimizer.heuristics import _lower_bound, _pack_best_fit
+
+    config = OptimizationConfig()
+    # Volume alone says 2 bars, but no two 3000 mm pieces share a 5900 mm bar.
+    assert _lower_bound({3000: 4}, config) == 4
+    assert _lower_bound({5000: 2, 800: 3}, config) == 3
+    assert _lower_bound({}, config) == 0
+
+    rng = random.Random(7)
+    for _ in range(50):
+        demand = {float(rng.randint(200, 5000)): rng.randint(1, 4) for _ in range(rng.randint(1, 20))}
+        pieces = [("P", length) for length, count in demand.items() for _ in range(count)]
+        assert _lower_bound(demand, config) <= len(_pack_best_fit("S", pieces, config))
@@ -0,0 +1,83 @@
+import importlib
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app.models import OptimizationComponent, OptimizationConfig, OptimizationRequest
+
+
+def setup_jobs(tmp_path):
+    os.environ["PRODUCTION_DB_PATH"] = str(tmp_path / "jobs.db")
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    from backend.app import jobs
+    return database, jobs
+
+
+def _wait(manager, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.status(job_id)
+        if job.status in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def _request(length=1500):
+    return OptimizationRequest(
+        components=[
+            OptimizationComponent(id="A", section="57x57", material="Softwood", length=length, quantity=6),
+            OptimizationComponent(id="B", section="63x63", material="Softwood", length=900, quantity=4),
+        ],
+        configuration=OptimizationConfig(use_cache=False),
+    )
+
+
+def test_optimize_job_reports_progress_and_result(tmp_path, monkeypatch):
+    _, jobs = setup_jobs(tmp_path)
+    manager = jobs.JobManager(max_workers=1)
+    try:
+        submitted = manager.submit("optimize", _request().model_dump_json())
+        assert submitted.status in ("queued", "running", "done")
+
+        job = _wait(manager, submitted.job_id)
+        assert job.status == "done"
+        assert job.progress == 100.0
+        assert job.expires_at > job.finished_at
+        result = manager.result(job.job_id)
+        assert [group["section"] for group in result["groups"]] == ["57x57", "63x63"]
+
+        failed = _wait(manager, manager.submit("optimize", _request(length=50).model_dump_json()).job_id)
+        assert failed.status == "failed"
+        assert "below minimum" in failed.error
+
+        from backend.app.routers import jobs as jobs_router
+        monkeypatch.setattr(jobs_router, "job_manager", manager)
+        with pytest.raises(HTTPException) as error:
+            jobs_router.get_job_result(failed.job_id)
+        assert error.value.status_code == 422
+        assert error.value.detail == failed.error
+    finally:
+        manager.shutdown()
+
+
+def test_queued_jobs_survive_restart_and_expire(tmp_path):
+    database, jobs = setup_jobs(tmp_path)
+    with database.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO jobs (id, kind, status, progress, request, created_at) VALUES (?, 'optimize', ?, 0, ?, ?)",
+            ("left-running", "running", _request().model_dump_json(), "2024-01-01T00:00:00"),
+        )
+
+    restarted = jobs.JobManager(max_workers=1, retention_hours=0)
+    try:
+        assert restarted.resume() == ["left-running"]
+        assert _wait(restarted, "left-running").status == "done"
+    finally:
+        restarted.shutdown()
+    assert restarted.purge_expired() == 1
+    assert restarted.status("left-running") is None
@@ -0,0 +1,92 @@
+import importlib
+import os
+
+import pytest
+
+from fastapi import HTTPException
+
+from backend.app.models import (
+    OptimizationComponent,
+    OptimizationConfig,
+    OptimizationRequest,
+    RemnantCommit,
+    RemnantCreate,
+)
+
+
+def setup_test_database(tmp_path):
+    os.environ["PRODUCTION_DB_PATH"] = str(tmp_path / "remnants.db")
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    import backend.app.routers.remnants as remnants
+    importlib.reload(remnants)
+    import backend.app.routers.optimize as optimize
+    importlib.reload(optimize)
+    return remnants, optimize
+
+
+def test_optimizer_fills_remnants_before_new_stock(tmp_path):
+    remnants, optimize = setup_test_database(tmp_path)
+    first = remnants.create_remnant(RemnantCreate(section="57x57", material="Softwood", length=2100))
+    remnants.create_remnant(RemnantCreate(section="57x57", material="Oak", length=3000))
+
+    request = OptimizationRequest(
+        components=[
+            OptimizationComponent(id="A", section="57x57", material="Softwood", length=1000, quantity=2),
+            OptimizationComponent(id="B", section="57x57", material="Softwood", length=2500, quantity=3),
+        ],
+        configuration=OptimizationConfig(use_remnants=True),
+    )
+    group = optimize.run_optimization(request).groups[0]
+
+    assert group.bars[0].remnantId == first.id
+    assert group.bars[0].cuts == [1000, 1000]
+    assert group.summary["remnantsUsed"] == 1
+    assert group.summary["totalBars"] == 2
+    assert all(1000 not in bar.cuts for bar in group.bars[1:])
+    assert group.bars[-1].offcut == pytest.approx(5900 - 10 - 2500 - 3)
+
+
+def test_commit_reserves_remnants_and_records_offcuts_atomically(tmp_path):
+    remnants, optimize = setup_test_database(tmp_path)
+    remnants.create_remnant(RemnantCreate(section="57x57", material="Softwood", length=2100))
+    request = OptimizationRequest(
+        components=[OptimizationComponent(id="A", section="57x57", material="Softwood", length=1000, quantity=3)],
+        configuration=OptimizationConfig(use_remnants=True, use_cache=False),
+    )
+    run = optimize.run_optimization(request)
+
+    result = remnants.commit_run(RemnantCommit(groups=run.groups, source="P-1"))
+    assert len(result.reserved) == 1
+    assert [remnant.length for remnant in result.created] == [run.groups[0].bars[1].offcut]
+    available = remnants.list_remnants(section="57x57", material="Softwood", status_filter="available")
+    assert [remnant.id for remnant in available] == [result.created[0].id]
+
+    with pytest.raises(HTTPException) as error:
+        remnants.commit_run(RemnantCommit(groups=run.groups))
+    assert error.value.status_code == 409
+    assert len(remnants.list_remnants(section=None, material=None, status_filter=None)) == 2
+
+
+def test_pattern_mode_commit_records_offcuts_next_to_remnant_bars(tmp_path):
+    remnants, optimize = setup_test_database(tmp_path)
+    remnants.create_remnant(RemnantCreate(section="57x57", material="Softwood", length=2100))
+    request = OptimizationRequest(
+        components=[
+            OptimizationComponent(id="A", section="57x57", material="Softwood", length=1000, quantity=2),
+            OptimizationComponent(id="B", section="57x57", material="Softwood", length=2500, quantity=3),
+        ],
+        configuration=OptimizationConfig(use_remnants=True, pattern_mode=True, use_cache=False),
+    )
+    group = optimize.run_optimization(request).groups[0]
+    assert [bar.remnantId is not None for bar in group.bars] == [True]
+    assert group.patterns_unexpanded()
+    expected = sorted(
+        pattern.offcut for pattern in group.patterns if pattern.offcut is not None for _ in range(pattern.count)
+    )
+    assert expected
+
+    result = remnants.commit_run(RemnantCommit(groups=[group], source="P-2"))
+    assert len(result.reserved) == 1
+    assert sorted(remnant.length for remnant in result.created) == expected
@@ -0,0 +1,273 @@
+import random
+
+import pytest
+from pydantic import ValidationError
+
+from backend.app.models import OptimizationComponent, OptimizationConfig
+from backend.app.optimizer import column_generation
+from backend.app.optimizer.heuristics import best_fit_decreasing
+from backend.app.optimizer import solver
+from backend.app.optimizer.solver import solve_cutting_stock
+
+
+def _hard_components():
+    rng = random.Random(4)
+    return [
+        OptimizationComponent(
+            id=f"C{index}",
+            section="57x57",
+            material="Softwood",
+            length=rng.randint(1200, 3000),
+            quantity=rng.randint(1, 4),
+        )
+        for index in range(25)
+    ]
+
+
+@pytest.mark.parametrize("pure_python", [False, True])
+def test_column_generation_saves_bars(monkeypatch, pure_python):
+    if pure_python:
+        monkeypatch.setattr(column_generation, "pywraplp", None)
+    components = _hard_components()
+    config = OptimizationConfig(solver="ortools", time_limit_ms=5000)
+
+    heuristic = best_fit_decreasing(components, config)[0]
+    group = solve_cutting_stock(components, config)[0]
+
+    assert group.summary["engine"] == "column_generation"
+    assert group.summary["totalBars"] < heuristic.summary["totalBars"]
+    expected = sorted(component.length for component in components for _ in range(component.quantity))
+    assert sorted(cut for bar in group.bars for cut in bar.cuts) == expected
+    usable = config.stock_length - 2 * config.end_trim
+    for bar in group.bars:
+        assert sum(bar.cuts) + config.kerf * (len(bar.cuts) - 1) <= usable + 1e-6
+
+
+def test_exact_solver_keeps_heuristic_when_it_cannot_improve():
+    components = [
+        OptimizationComponent(id="A", section="63x63", material="Softwood", length=1120, quantity=2),
+        OptimizationComponent(id="B", section="63x63", material="Softwood", length=845, quantity=3),
+    ]
+    config = OptimizationConfig(solver="ortools")
+
+    group = solve_cutting_stock(components, config)[0]
+
+    assert group.summary["engine"] == "heuristic"
+    assert group.bars == best_fit_decreasing(components, config)[0].bars
+
+
+def test_exact_solver_rejects_short_pieces():
+    components = [OptimizationComponent(id="A", section="63x63", material="Softwood", length=150)]
+    with pytest.raises(ValueError):
+        solve_cutting_stock(components, OptimizationConfig(solver="ortools"))
+
+
+def test_pattern_mode_emits_multiplicities_and_optional_bars():
+    components = [
+        OptimizationComponent(id="GB", section="18x35", material="Oak", length=640, quantity=500),
+        OptimizationComponent(id="GB2", section="18x35", material="Oak", length=410, quantity=333),
+    ]
+
+    group = solve_cutting_stock(components, OptimizationConfig(pattern_mode=True))[0]
+    assert group.bars == []
+    assert group.summary["totalBars"] == sum(pattern.count for pattern in group.patterns)
+    assert sum(pattern.cuts.count(640.0) * pattern.count for pattern in group.patterns) == 500
+
+    expanded = solve_cutting_stock(components, OptimizationConfig(pattern_mode=True, expand_patterns=True))[0]
+    assert len(expanded.bars) == group.summary["totalBars"]
+    assert expanded.bars[-1].barId == f"18x35-{len(expanded.bars):04d}"
+
+
+def test_process_execution_matches_serial_order():
+    rng = random.Random(9)
+    components = [
+        OptimizationComponent(
+            id=f"C{index}",
+            section=rng.choice(["57x57", "57x90", "57x43"]),
+            material=rng.choice(["Softwood", "Sapele"]),
+            length=rng.randint(400, 2400),
+            quantity=rng.randint(1, 5),
+        )
+        for index in range(120)
+    ]
+
+    serial = solve_cutting_stock(components, OptimizationConfig())
+    parallel = solve_cutting_stock(components, OptimizationConfig(execution="process", workers=3))
+    pool = solver._pool
+    again = solve_cutting_stock(components, OptimizationConfig(execution="process", workers=2))
+
+    assert [group.model_dump() for group in parallel] == [group.model_dump() for group in serial]
+    assert [group.model_dump() for group in again] == [group.model_dump() for group in serial]
+    assert pool is not None and solver._pool is pool
+    solver.shutdown_pool()
+    assert solver._pool is None
+
+    with pytest.raises(ValidationError):
+        OptimizationConfig(execution="threads")
+
+
+def _two_section_components(sash_length=1000):
+    return [
+        OptimizationComponent(id="S", section="57x57", material="Softwood", length=sash_length, quantity=6),
+        OptimizationComponent(id="R", section="57x90", material="Softwood", length=800, quantity=4),
+    ]
+
+
+def test_cache_reuses_unchanged_groups():
+    from backend.app.optimizer.cache import OptimizationCache
+
+    cache = OptimizationCache(max_entries=8)
+    config = OptimizationConfig()
+
+    first = solve_cutting_stock(_two_section_components(), config, cache=cache)
+    assert cache.stats()["misses"] == 2
+    assert solve_cutting_stock(_two_section_components(), config, cache=cache) == first
+    assert cache.stats()["hits"] == 2
+
+    solve_cutting_stock(_two_section_components(sash_length=1200), config, cache=cache)
+    assert cache.stats()["hits"] == 3
+    assert cache.stats()["misses"] == 3
+
+    solve_cutting_stock(_two_section_components(), OptimizationConfig(kerf=4), cache=cache)
+    assert cache.stats()["misses"] == 5
+
+
+def test_cache_is_bounded_and_survives_restart(tmp_path, monkeypatch):
+    import importlib
+
+    monkeypatch.setenv("PRODUCTION_DB_PATH", str(tmp_path / "cache.db"))
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    from backend.app.optimizer.cache import OptimizationCache
+
+    config = OptimizationConfig()
+    cache = OptimizationCache(max_entries=1, persist=True)
+    solve_cutting_stock(_two_section_components(), config, cache=cache)
+    assert cache.stats()["entries"] == 1
+
+    restarted = OptimizationCache(max_entries=1, persist=True)
+    solve_cutting_stock(_two_section_components(), config, cache=restarted)
+    assert restarted.stats()["hits"] == 2
+
+
+def test_persistent_cache_table_keeps_only_the_newest_entries(tmp_path, monkeypatch):
+    import importlib
+
+    monkeypatch.setenv("PRODUCTION_DB_PATH", str(tmp_path / "cache.db"))
+    import backend.app.database as database
+    importlib.reload(database)
+    database.init_db()
+    from backend.app.optimizer.cache import OptimizationCache
+
+    cache = OptimizationCache(max_entries=2, persist=True, persist_entries=3)
+    groups = solve_cutting_stock(_two_section_components(), OptimizationConfig())
+    for index in range(7):
+        cache.put(f"key-{index}", groups[index % 2])
+    cache.put("key-5", groups[0])
+
+    with database.get_connection() as conn:
+        keys = [row["cache_key"] for row in conn.execute("SELECT cache_key FROM optimization_cache ORDER BY rowid")]
+    assert keys == ["key-4", "key-6", "key-5"]
+    assert cache.stats()["entries"] == 2
+
+
+def test_improvement_phase_reports_savings_over_best_fit():
+    components = _hard_components()
+    config = OptimizationConfig(improve=True, time_limit_ms=3000)
+
+    heuristic = best_fit_decreasing(components, config)[0]
+    group = solve_cutting_stock(components, config)[0]
+
+    assert group.summary["improvedBars"] >= 1
+    assert group.summary["totalBars"] == heuristic.summary["totalBars"] - group.summary["improvedBars"]
+    assert group.summary["improvedWaste"] > 0
+    expected = sorted(component.length for component in components for _ in range(component.quantity))
+    assert sorted(cut for bar in group.bars for cut in bar.cuts) == expected
+    usable = config.stock_length - 2 * config.end_trim
+    for bar in group.bars:
+        assert sum(bar.cuts) + config.kerf * (len(bar.cuts) - 1) <= usable + 1e-6
+
+
+def test_stock_lengths_pick_cheapest_mix():
+    components = _hard_components()
+    stock = [
+        {"length": 6500, "cost": 30},
+        {"length": 5900, "cost": 28},
+        {"length": 3000, "cost": 15, "available": 3},
+        {"length": 12000, "cost": 1, "section": "other"},
+    ]
+    config = OptimizationConfig(stock_lengths=stock)
+
+    group = solve_cutting_stock(components, config)[0]
+
+    single = solve_cutting_stock(components, OptimizationConfig(stock_length=6500))[0]
+    assert group.summary["totalCost"] <= single.summary["totalBars"] * 30
+    assert group.summary["totalCost"] == sum(bar.cost for bar in group.bars)
+    assert sum(group.summary["stockUsage"].values()) == group.summary["totalBars"]
+    assert group.summary["stockUsage"].get("3000", 0) <= 3
+    assert "12000" not in group.summary["stockUsage"]
+    expected = sorted(component.length for component in components for _ in range(component.quantity))
+    assert sorted(cut for bar in group.bars for cut in bar.cuts) == expected
+    for bar in group.bars:
+        usable = bar.stockLength - 2 * config.end_trim
+        assert sum(bar.cuts) + config.kerf * (len(bar.cuts) - 1) <= usable + 1e-6
+
+
+def test_stock_lengths_respect_availability():
+    components = _hard_components()
+    config = OptimizationConfig(stock_lengths=[{"length": 6500, "cost": 10, "available": 2}])
+
+    with pytest.raises(ValueError):
+        solve_cutting_stock(components, config)
+
+    pattern = solve_cutting_stock(
+        components,
+        OptimizationConfig(pattern_mode=True, stock_lengths=[{"length": 6500, "cost": 10}]),
+    )[0]
+    assert pattern.summary["totalCost"] == pattern.summary["totalBars"] * 10
+    assert all(item.stockLength == 6500 for item in pattern.patterns)
+
+
+def test_limited_stock_is_shared_across_groups():
+    components = [
+        OptimizationComponent(id="S", section="57x57", material="Softwood", length=5000, quantity=2),
+        OptimizationComponent(id="B", section="18x35", material="Softwood", length=5000, quantity=2),
+    ]
+    stock = [{"length": 6000, "cost": 10, "available": 3}, {"length": 5500, "cost": 30}]
+
+    for pattern_mode in (False, True):
+        groups = solve_cutting_stock(components, OptimizationConfig(stock_lengths=stock, pattern_mode=pattern_mode))
+        assert [group.section for group in groups] == ["57x57", "18x35"]
+        usage = [group.summary["stockUsage"] for group in groups]
+        assert usage == [{"6000": 2}, {"6000": 1, "5500": 1}]
+
+    with pytest.raises(ValueError):
+        solve_cutting_stock(components, OptimizationConfig(stock_lengths=[{"length": 6000, "available": 3}]))
+
+
+def test_summary_reports_gap_to_lower_bound():
+    components = _hard_components()
+    group = solve_cutting_stock(components, OptimizationConfig())[0]
+
+    assert 0 < group.summary["lowerBound"] <= group.summary["totalBars"]
+    assert group.summary["gapBars"] == group.summary["totalBars"] - group.summary["lowerBound"]
+    assert group.summary["gapPct"] == round(group.summary["gapBars"] / group.summary["lowerBound"] * 100, 1)
+
+
+def test_benchmark_suite_reports_and_flags_regressions():
+    from backend.benchmarks.optimizer_suite import compare, run_suite, window_components
+
+    components = window_components(1, "3x3", 1200, 1800)
+    assert {component.section for component in components} >= {"28 x 141", "57 x 57", "18 x 35"}
+
+    report = run_suite([1, 5], ["heuristic", "pattern"], seed=3)
+    assert [(entry["solver"], entry["windows"]) for entry in report["results"]] == [
+        ("heuristic", 1), ("heuristic", 5), ("pattern", 1), ("pattern", 5),
+    ]
+    assert all(entry["bars"] >= entry["lowerBound"] > 0 for entry in report["results"])
+
+    baseline = {"results": [dict(entry) for entry in report["results"]]}
+    baseline["results"][1]["bars"] -= 1
+    comparison = compare(report, baseline, time_tolerance=100)
+    assert [entry["regressions"] for entry in comparison] == [[], ["bars"], [], []]
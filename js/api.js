@@ -8,22 +8,117 @@ async function handleResponse(response) {
   return response.json();
 }
 
+// Last response per URL, revalidated with If-None-Match.
+const etagCache = new Map();
+// Last ETag seen per project, sent back as If-Match on save.
+const projectTags = new Map();
+
+function rememberTag(project, etag) {
+  if (etag && project && project.project_id) projectTags.set(project.project_id, etag);
+  return project;
+}
+
+async function fetchCached(url) {
+  const cached = etagCache.get(url);
+  const headers = cached ? { 'If-None-Match': cached.etag } : {};
+  const response = await fetch(url, { headers });
+  if (response.status === 304 && cached) return cached.body;
+  const body = await handleResponse(response);
+  const etag = response.headers.get('ETag');
+  if (etag) etagCache.set(url, { etag, body });
+  return body;
+}
+
 export async function fetchProjects() {
-  const response = await fetch(`${API_BASE}/projects`);
+  return fetchCached(`${API_BASE}/projects`);
+}
+
+export async function fetchProject(projectId, { inlineDrawings = false } = {}) {
+  const url = `${API_BASE}/projects/${projectId}${inlineDrawings ? '?inline_drawings=true' : ''}`;
+  const project = await fetchCached(url);
+  return rememberTag(project, etagCache.get(url)?.etag);
+}
+
+export async function fetchProjectSummaries(params = {}) {
+  const query = new URLSearchParams(Object.entries(params).filter(([, value]) => value != null && value !== ''));
+  const response = await fetch(`${API_BASE}/projects/summary?${query}`);
+  return handleResponse(response);
+}
+
+export async function fetchComponentTotals({ groupBy = ['section', 'material'], ...filters } = {}) {
+  const query = new URLSearchParams(Object.entries(filters).filter(([, value]) => value != null && value !== ''));
+  groupBy.forEach((field) => query.append('group_by', field));
+  const response = await fetch(`${API_BASE}/components/totals?${query}`);
+  return handleResponse(response);
+}
+
+export async function searchProjects(q, limit = 20) {
+  const query = new URLSearchParams({ q, limit });
+  const response = await fetch(`${API_BASE}/projects/search?${query}`);
+  return handleResponse(response);
+}
+
+export async function fetchRevisions(projectId) {
+  const response = await fetch(`${API_BASE}/projects/${projectId}/revisions`);
+  return handleResponse(response);
+}
+
+export async function fetchRevision(projectId, version, { inlineDrawings = false } = {}) {
+  const query = inlineDrawings ? '?inline_drawings=true' : '';
+  const response = await fetch(`${API_BASE}/projects/${projectId}/revisions/${version}${query}`);
+  return handleResponse(response);
+}
+
+export async function diffRevisions(projectId, from, to) {
+  const query = new URLSearchParams({ from, to });
+  const response = await fetch(`${API_BASE}/projects/${projectId}/revisions/diff?${query}`);
   return handleResponse(response);
 }
 
 export async function saveProject(project) {
   const method = project.project_id ? 'PUT' : 'POST';
   const url = project.project_id ? `${API_BASE}/projects/${project.project_id}` : `${API_BASE}/projects`;
+  const headers = { 'Content-Type': 'application/json' };
+  if (project.project_id && projectTags.has(project.project_id)) headers['If-Match'] = projectTags.get(project.project_id);
   const response = await fetch(url, {
     method,
-    headers: { 'Content-Type': 'application/json' },
+    headers,
     body: JSON.stringify(project),
   });
+  return rememberTag(await handleResponse(response), response.headers.get('ETag'));
+}
+
+export async function patchProject(project, patch) {
+  const headers = {
+    'Content-Type': Array.isArray(patch) ? 'application/json-patch+json' : 'application/merge-patch+json',
+  };
+  if (projectTags.has(project.project_id)) headers['If-Match'] = projectTags.get(project.project_id);
+  const response = await fetch(`${API_BASE}/projects/${project.project_id}`, {
+    method: 'PATCH',
+    headers,
+    body: JSON.stringify(patch),
+  });
+  return rememberTag(await handleResponse(response), response.headers.get('ETag'));
+}
+
+export async function importProjects(file) {
+  const response = await fetch(`${API_BASE}/projects/import`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-ndjson' },
+    body: file,
+  });
   return handleResponse(response);
 }
 
+export function exportProjects() {
+  const link = document.createElement('a');
+  link.href = `${API_BASE}/projects/export`;
+  link.download = 'projects.ndjson';
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+}
+
 export async function runOptimization(components, config) {
   const response = await fetch(`${API_BASE}/optimize`, {
     method: 'POST',
@@ -33,6 +128,56 @@ export async function runOptimization(components, config) {
   return handleResponse(response);
 }
 
+export async function optimizeProject(projectId, config) {
+  const response = await fetch(`${API_BASE}/projects/${projectId}/optimize`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(config || {}),
+  });
+  return handleResponse(response);
+}
+
+export async function streamOptimization(components, config, onGroup) {
+  const response = await fetch(`${API_BASE}/optimize/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ components, configuration: config }),
+  });
+  if (!response.ok) {
+    await handleResponse(response);
+  }
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines.filter(Boolean)) {
+      const record = JSON.parse(line);
+      if (record.type === 'group') onGroup(record.group, record.index);
+      if (record.type === 'error') throw new Error(record.detail);
+      if (record.type === 'summary') return record;
+    }
+    if (done) throw new Error('Optimization stream ended early');
+  }
+}
+
+export async function submitJob(kind, payload) {
+  const response = await fetch(`${API_BASE}/jobs/${kind}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload),
+  });
+  return handleResponse(response);
+}
+
+export async function fetchJob(jobId) {
+  const response = await fetch(`${API_BASE}/jobs/${jobId}`);
+  return handleResponse(response);
+}
+
 async function downloadFile(endpoint, payload) {
   const response = await fetch(endpoint, {
     method: 'POST',